@@ -0,0 +1,79 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compare receipt rendering throughput: compiled template engine vs. full platypus layout.
+
+Run from the ``banking-mcp-server`` directory::
+
+    PYTHONPATH=src python benchmarks/receipt_render.py --count 5000
+
+Both renderers run on a single core in this process, so the numbers are
+receipts per second per core.
+"""
+
+import argparse
+import time
+import uuid
+from typing import Callable
+
+from banking_mcp_server.payment_models import Party, PaymentContext
+from banking_mcp_server.receipt_render import _render_receipt_flowables, get_receipt_engine
+
+
+def _payments(count: int) -> list[PaymentContext]:
+    return [
+        PaymentContext(
+            transaction_id=str(uuid.uuid4()),
+            currency="USD",
+            amount=round(10 + index * 1.37, 2),
+            sender=Party(account_id=f"ACC-{index:08d}", name="Alex Perera", bank_name="Finthesis Bank"),
+            beneficiary=Party(account_id=f"BEN-{index:08d}", name="Sam Fernando", bank_name="Other Bank"),
+            remarks=f"Invoice {index}",
+        )
+        for index in range(count)
+    ]
+
+
+def _measure(render: Callable[[PaymentContext], object], payments: list[PaymentContext]) -> float:
+    """Return receipts per second after one warm-up render."""
+    render(payments[0])
+    started = time.perf_counter()
+    for payment in payments:
+        render(payment)
+    return len(payments) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="receipts rendered by the engine")
+    parser.add_argument("--baseline-count", type=int, default=200, help="receipts rendered by the platypus layout")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = get_receipt_engine()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    baseline = _measure(_render_receipt_flowables, _payments(max(1, args.baseline_count)))
+    compiled = _measure(engine.render, _payments(max(1, args.count)))
+
+    print(f"template compile:  {compile_ms:10.1f} ms (once per process)")
+    print(f"platypus layout:   {baseline:10.0f} receipts/s")
+    print(f"compiled template: {compiled:10.0f} receipts/s")
+    print(f"speed-up:          {compiled / baseline:10.1f}x per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compare receipt storage throughput: one file per receipt vs. packed segments.
+
+Run from the ``banking-mcp-server`` directory::
+
+    PYTHONPATH=src python benchmarks/receipt_store.py --count 20000
+
+Each store gets the same receipts written one after another, then reads a
+random sample back in full. Stores live in a temporary directory.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from io import BytesIO
+from pathlib import Path
+
+from banking_mcp_server.receipt_store import FileReceiptStore, ReceiptStore, SegmentReceiptStore
+from banking_mcp_server.payment_models import Party, PaymentContext
+from banking_mcp_server.receipt_render import get_receipt_engine
+
+
+def _receipt() -> bytes:
+    payment = PaymentContext(
+        transaction_id=str(uuid.uuid4()),
+        currency="USD",
+        amount=42.0,
+        sender=Party(account_id="ACC-00000001", name="Alex Perera", bank_name="Finthesis Bank"),
+        beneficiary=Party(account_id="BEN-00000001", name="Sam Fernando", bank_name="Other Bank"),
+        remarks="Invoice 1",
+    )
+    return get_receipt_engine().render(payment).getvalue()
+
+
+def _files_on_disk(root: Path) -> int:
+    return sum(len(files) for _, _, files in os.walk(root))
+
+
+async def _measure(name: str, store: ReceiptStore, root: Path, pdf: bytes, ids: list[str], reads: int) -> None:
+    await store.start()
+    try:
+        started = time.perf_counter()
+        for transaction_id in ids:
+            await store.save(transaction_id, BytesIO(pdf))
+        write_rate = len(ids) / (time.perf_counter() - started)
+
+        sample = random.choices(ids, k=reads)
+        started = time.perf_counter()
+        for transaction_id in sample:
+            receipt = await store.lookup(transaction_id)
+            if isinstance(receipt, Path):
+                receipt.read_bytes()
+            else:
+                bytes(receipt)
+        read_rate = reads / (time.perf_counter() - started)
+    finally:
+        await store.stop()
+    print(f"{name:9} writes {write_rate:9.0f}/s   reads {read_rate:9.0f}/s   files {_files_on_disk(root):8d}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="receipts written to each store")
+    parser.add_argument("--reads", type=int, default=10000, help="random receipts read back")
+    args = parser.parse_args()
+
+    pdf = _receipt()
+    ids = [str(uuid.uuid4()) for _ in range(args.count)]
+    print(f"{args.count} receipts of {len(pdf)} bytes, {args.reads} random reads")
+    with tempfile.TemporaryDirectory() as directory:
+        files_root = Path(directory, "files")
+        segments_root = Path(directory, "segments")
+        await _measure("files", FileReceiptStore(str(files_root)), files_root, pdf, ids, args.reads)
+        await _measure(
+            "segments",
+            SegmentReceiptStore(
+                str(segments_root),
+                segment_max_bytes=64 * 1024 * 1024,
+                retention=0,
+                compact_interval=0,
+                compact_ratio=0.5,
+            ),
+            segments_root,
+            pdf,
+            ids,
+            args.reads,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
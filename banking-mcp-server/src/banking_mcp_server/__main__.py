@@ -26,7 +26,9 @@ def main():
         app,
         host=configs.mcp_host,
         port=configs.mcp_port,
-        log_level="info"
+        log_level="info",
+        # Let uvicorn records propagate to the queued root handler
+        log_config=None,
     )
 
 
@@ -0,0 +1,259 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Literal, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GroupBy = Literal["category", "merchant", "day", "week", "month", "none"]
+Direction = Literal["debit", "credit", "all"]
+
+# ISO 18245 merchant category codes seen in retail banking data, mapped to spending categories
+_MCC_CATEGORIES: Dict[str, str] = {
+    "4111": "Transport", "4121": "Transport", "4131": "Transport", "4511": "Travel",
+    "4814": "Utilities", "4900": "Utilities",
+    "5300": "Shopping", "5311": "Shopping", "5399": "Shopping", "5732": "Shopping", "5942": "Shopping",
+    "5411": "Groceries", "5422": "Groceries", "5441": "Groceries", "5499": "Groceries",
+    "5541": "Fuel", "5542": "Fuel",
+    "5812": "Dining", "5813": "Dining", "5814": "Dining",
+    "5912": "Health", "8011": "Health", "8062": "Health",
+    "7011": "Travel", "7832": "Entertainment", "7922": "Entertainment",
+}
+
+
+def _field(transaction: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """A nested object of a transaction, or an empty dict if it is missing or malformed."""
+    value = transaction.get(name)
+    return value if isinstance(value, dict) else {}
+
+
+def _category(transaction: Dict[str, Any]) -> str:
+    merchant = _field(transaction, "MerchantDetails")
+    category = _MCC_CATEGORIES.get(str(merchant.get("MerchantCategoryCode", "")))
+    if category:
+        return category
+    if merchant:
+        return "Other"
+    code = str(_field(transaction, "BankTransactionCode").get("Code", ""))
+    if "Transfer" in code:
+        return "Transfers"
+    return "Other"
+
+
+def _merchant(transaction: Dict[str, Any]) -> str:
+    merchant = _field(transaction, "MerchantDetails")
+    if merchant.get("MerchantName"):
+        return str(merchant["MerchantName"])
+    counterparty = _field(transaction, "CreditorAccount" if transaction.get("CreditDebitIndicator") == "Debit"
+                          else "DebtorAccount")
+    if counterparty.get("Name"):
+        return str(counterparty["Name"])
+    return str(transaction.get("TransactionInformation") or "Unknown")
+
+
+def _booking_date(transaction: Dict[str, Any]) -> np.datetime64:
+    """Booking day of a transaction, or NaT if it is missing or unparsable."""
+    try:
+        return np.datetime64(str(transaction.get("BookingDateTime") or "")[:10] or "NaT", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def _currency(transaction: Dict[str, Any]) -> str:
+    return str(_field(transaction, "Amount").get("Currency") or "")
+
+
+def _encode(labels: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary-encode string labels into int32 codes."""
+    lookup: Dict[str, int] = {}
+    codes = np.fromiter((lookup.setdefault(label, len(lookup)) for label in labels), dtype=np.int32, count=len(labels))
+    return codes, list(lookup)
+
+
+class TransactionColumns:
+    """Columnar view of one account's transactions.
+
+    Amounts, booking dates and direction are NumPy arrays; category, merchant
+    and currency are dictionary-encoded into integer codes so group-bys run as
+    ``bincount``. Rows without a readable booking date get NaT and are left out
+    of date filters and date buckets.
+    """
+
+    __slots__ = ("amounts", "dates", "is_debit", "category_codes", "categories",
+                 "merchant_codes", "merchants", "currency_codes", "currencies")
+
+    def __init__(self, transactions: List[Dict[str, Any]]):
+        rows = [t for t in transactions if isinstance(t, dict)]
+        self.amounts: np.ndarray = np.fromiter(
+            (_amount(t) for t in rows), dtype=np.float64, count=len(rows)
+        )
+        self.dates: np.ndarray = np.array([_booking_date(t) for t in rows], dtype="datetime64[D]")
+        self.is_debit: np.ndarray = np.fromiter(
+            (t.get("CreditDebitIndicator") == "Debit" for t in rows), dtype=bool, count=len(rows)
+        )
+        self.category_codes, self.categories = _encode([_category(t) for t in rows])
+        self.merchant_codes, self.merchants = _encode([_merchant(t) for t in rows])
+        self.currency_codes, self.currencies = _encode([_currency(t) for t in rows])
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def summarize(
+            self,
+            *,
+            group_by: GroupBy = "category",
+            direction: Direction = "debit",
+            start_date: str = "",
+            end_date: str = "",
+            top_n: int = 10,
+            currency: str = "",
+    ) -> Dict[str, Any]:
+        """Aggregate sum, count and average per group over the selected transactions.
+
+        Amounts are only added up within one currency: ``currency`` selects it, and
+        may be left blank when the selected transactions share a single currency.
+
+        Returns:
+            A compact table: ``columns`` names and ``rows`` ordered by total descending
+            (chronologically for date buckets), plus overall totals.
+
+        Raises:
+            ValueError: If a date is malformed or the selection spans several currencies
+        """
+        dated = start_date or end_date or group_by in ("day", "week", "month")
+        mask = ~np.isnat(self.dates) if dated else np.ones(len(self), dtype=bool)
+        if direction == "debit":
+            mask &= self.is_debit
+        elif direction == "credit":
+            mask &= ~self.is_debit
+        if start_date:
+            mask &= self.dates >= np.datetime64(start_date[:10], "D")
+        if end_date:
+            mask &= self.dates <= np.datetime64(end_date[:10], "D")
+        if currency:
+            code = self.currencies.index(currency) if currency in self.currencies else -1
+            mask &= self.currency_codes == code
+        # Rows without a currency are counted with whichever currency the rest share
+        present = sorted(self.currencies[c] for c in np.unique(self.currency_codes[mask]) if self.currencies[c])
+        if len(present) > 1:
+            raise ValueError(
+                f"transactions are in several currencies ({', '.join(present)}); set currency to summarize one"
+            )
+
+        amounts = self.amounts[mask]
+        summary: Dict[str, Any] = {
+            "group_by": group_by,
+            "direction": direction,
+            "currency": present[0] if present else currency,
+            "transactions": int(amounts.size),
+            "total": round(float(amounts.sum()), 2),
+        }
+        if group_by == "none" or amounts.size == 0:
+            summary["average"] = round(float(amounts.mean()), 2) if amounts.size else 0.0
+            return summary
+
+        if group_by in ("category", "merchant"):
+            codes = (self.category_codes if group_by == "category" else self.merchant_codes)[mask]
+            labels = self.categories if group_by == "category" else self.merchants
+            keys, inverse = np.unique(codes, return_inverse=True)
+            names = [labels[k] for k in keys]
+            chronological = False
+        else:
+            buckets = _date_buckets(self.dates[mask], group_by)
+            keys, inverse = np.unique(buckets, return_inverse=True)
+            names = [str(k) for k in keys]
+            chronological = True
+
+        totals = np.bincount(inverse, weights=amounts, minlength=len(keys))
+        counts = np.bincount(inverse, minlength=len(keys))
+
+        limit = max(1, top_n)
+        if chronological:
+            order = np.arange(len(keys))[-limit:]
+        elif len(keys) > limit:
+            top = np.argpartition(-totals, limit - 1)[:limit]
+            order = top[np.argsort(-totals[top], kind="stable")]
+        else:
+            order = np.argsort(-totals, kind="stable")
+
+        summary["columns"] = [group_by, "total", "count", "average"]
+        summary["rows"] = [
+            [names[i], round(float(totals[i]), 2), int(counts[i]), round(float(totals[i] / counts[i]), 2)]
+            for i in order
+        ]
+        summary["groups"] = int(len(keys))
+        return summary
+
+
+def _amount(transaction: Dict[str, Any]) -> float:
+    try:
+        return float(_field(transaction, "Amount").get("Amount", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _date_buckets(dates: np.ndarray, group_by: str) -> np.ndarray:
+    if group_by == "month":
+        return dates.astype("datetime64[M]")
+    if group_by == "week":
+        days = dates.astype(np.int64)
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (days - (days + 3) % 7).astype("datetime64[D]")
+    return dates
+
+
+class TransactionStore:
+    """Per-identity columnar transaction store with LRU eviction.
+
+    Columns are rebuilt only when the source payload object changes, so repeat
+    summaries over a cached backend response skip the conversion entirely.
+    """
+
+    def __init__(self, max_accounts: int):
+        self._max_accounts = max_accounts
+        # The source list is held by reference to detect a changed payload by identity
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[Dict[str, Any]], TransactionColumns]]" = OrderedDict()
+        self.builds = 0
+        self.reuses = 0
+
+    def columns(self, identity: str, account_id: str, transactions: List[Dict[str, Any]]) -> TransactionColumns:
+        """Return columns for an account, rebuilding them if ``transactions`` is a new payload."""
+        key = (identity, account_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is transactions:
+            self._entries.move_to_end(key)
+            self.reuses += 1
+            return entry[1]
+
+        columns = TransactionColumns(transactions)
+        self.builds += 1
+        self._entries[key] = (transactions, columns)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_accounts:
+            self._entries.popitem(last=False)
+        return columns
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self._entries),
+            "rows": sum(len(columns) for _, columns in self._entries.values()),
+            "builds": self.builds,
+            "reuses": self.reuses,
+        }
@@ -0,0 +1,274 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+SHARED_TIER = "shared"
+PRIVATE_TIER = "private"
+
+
+def identity_hash(authorization: Optional[str]) -> Optional[str]:
+    """Return a stable, non-reversible key for a bearer token, or None if absent."""
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def match_route(path: str, routes: dict[str, float]) -> Optional[tuple[str, float]]:
+    """Find the longest configured route prefix matching ``path`` on segment boundaries.
+
+    Args:
+        path: Request path relative to the backend base URL, e.g. ``/accounts/123``.
+        routes: Mapping of route prefix to TTL in seconds.
+
+    Returns:
+        Tuple of (route, ttl) for the best match, or None if no route matches.
+    """
+    best: Optional[tuple[str, float]] = None
+    for route, ttl in routes.items():
+        prefix = route.rstrip("/")
+        if path == prefix or path.startswith(prefix + "/"):
+            if best is None or len(prefix) > len(best[0]):
+                best = (prefix, ttl)
+    return best
+
+
+@dataclass
+class CacheStats:
+    """Counters for a single cache tier."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    revalidations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "revalidations": self.revalidations,
+        }
+
+
+@dataclass
+class CacheEntry:
+    """A cached payload with its absolute expiry time and HTTP validators."""
+
+    value: Any
+    expires_at: float
+    route: str = ""
+    identity: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Fresh hits since the entry was stored or last refreshed ahead of expiry
+    hits: int = 0
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers turning a refetch of this entry into a conditional request."""
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class TTLCache:
+    """Bounded LRU cache with per-entry TTLs.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is reached.
+    Expired entries are dropped lazily on lookup, unless they carry validators, in
+    which case they are kept as stale so the caller can revalidate them.
+    """
+
+    max_entries: int
+    stats: CacheStats = field(default_factory=CacheStats)
+    _entries: "OrderedDict[Hashable, CacheEntry]" = field(default_factory=OrderedDict)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> tuple[Optional[CacheEntry], bool]:
+        """Return ``(entry, fresh)``; a stale entry is returned only if it can be revalidated."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None, False
+        self._entries.move_to_end(key)
+        if entry.expires_at <= time.monotonic():
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            if not entry.revalidatable:
+                del self._entries[key]
+                return None, False
+            return entry, False
+        self.stats.hits += 1
+        entry.hits += 1
+        return entry, True
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return an entry, fresh or not, without touching stats or recency."""
+        return self._entries.get(key)
+
+    def items(self) -> list[tuple[Hashable, CacheEntry]]:
+        return list(self._entries.items())
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry, fresh = self.lookup(key)
+        return entry if fresh else None
+
+    def set(self, key: Hashable, entry: CacheEntry) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, identity: Optional[str] = None, route: Optional[str] = None) -> int:
+        """Drop entries matching the given identity and/or route. Returns the number removed."""
+        stale = [
+            key for key, entry in self._entries.items()
+            if (identity is None or entry.identity == identity)
+            and (route is None or entry.route == route)
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ResponseCache:
+    """Two-tier response cache for backend GETs.
+
+    The shared tier holds public resources (e.g. ``/products``) that are identical
+    for every caller. The private tier holds per-customer resources keyed by a hash
+    of the caller's bearer token, so one customer's data is never served to another.
+    """
+
+    def __init__(
+            self,
+            *,
+            shared_routes: dict[str, float],
+            private_routes: dict[str, float],
+            shared_max_entries: int,
+            private_max_entries: int,
+    ):
+        self._shared_routes = shared_routes
+        self._private_routes = private_routes
+        self._tiers: dict[str, TTLCache] = {
+            SHARED_TIER: TTLCache(max_entries=shared_max_entries),
+            PRIVATE_TIER: TTLCache(max_entries=private_max_entries),
+        }
+
+    def resolve(self, path: str, authorization: Optional[str]) -> Optional[tuple[str, str, float, Optional[str]]]:
+        """Decide whether a request path is cacheable.
+
+        Returns:
+            Tuple of (tier, route, ttl, identity), or None if the path is not cacheable.
+        """
+        match = match_route(path, self._shared_routes)
+        if match:
+            return SHARED_TIER, match[0], match[1], None
+
+        match = match_route(path, self._private_routes)
+        identity = identity_hash(authorization)
+        if match and identity:
+            return PRIVATE_TIER, match[0], match[1], identity
+
+        return None
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict[str, Any]], identity: Optional[str]) -> tuple:
+        frozen_params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+        return identity, url, frozen_params
+
+    def get(self, tier: str, key: tuple) -> Optional[Any]:
+        entry = self._tiers[tier].get(key)
+        return entry.value if entry is not None else None
+
+    def lookup(self, tier: str, key: tuple) -> tuple[Optional[CacheEntry], bool]:
+        """Return ``(entry, fresh)``; see :meth:`TTLCache.lookup`."""
+        return self._tiers[tier].lookup(key)
+
+    def peek(self, tier: str, key: tuple) -> Optional[CacheEntry]:
+        return self._tiers[tier].peek(key)
+
+    def entries(self, tier: str) -> list[tuple[tuple, CacheEntry]]:
+        """Snapshot of a tier's keys and entries, least recently used first."""
+        return self._tiers[tier].items()
+
+    def seed(self, tier: str, key: tuple, entry: CacheEntry) -> None:
+        """Insert a prepared entry, e.g. one restored from the warm-start store."""
+        self._tiers[tier].set(key, entry)
+
+    def set(self, tier: str, key: tuple, value: Any, *, route: str, ttl: float,
+            identity: Optional[str], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        if ttl <= 0:
+            return
+        self._tiers[tier].set(
+            key,
+            CacheEntry(
+                value=value,
+                expires_at=time.monotonic() + ttl,
+                route=route,
+                identity=identity,
+                etag=etag,
+                last_modified=last_modified,
+            ),
+        )
+
+    def refresh(self, tier: str, key: tuple, entry: CacheEntry, *, ttl: float) -> None:
+        """Extend a revalidated entry after the backend answered ``304 Not Modified``."""
+        entry.expires_at = time.monotonic() + ttl
+        cache = self._tiers[tier]
+        cache.stats.revalidations += 1
+        cache.set(key, entry)
+
+    def invalidate_private(self, authorization: Optional[str], path: str) -> int:
+        """Drop a customer's private entries for the route owning ``path``."""
+        identity = identity_hash(authorization)
+        match = match_route(path, self._private_routes)
+        if not identity or not match:
+            return 0
+        removed = self._tiers[PRIVATE_TIER].invalidate(identity=identity, route=match[0])
+        logger.debug("Invalidated %d private cache entries for route %s", removed, match[0])
+        return removed
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {**tier.stats.as_dict(), "size": len(tier), "max_entries": tier.max_entries}
+            for name, tier in self._tiers.items()
+        }
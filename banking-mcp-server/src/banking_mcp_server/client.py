@@ -14,29 +14,135 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import asyncio
+import importlib.util
 import logging
+import time
 from typing import Any, Optional
+from urllib.parse import urlsplit
 
-import requests
-from requests import Response
+import httpx
 
+from .cache import SHARED_TIER, CacheEntry, ResponseCache, identity_hash, match_route
 from .config import ServerConfigs
+from .hedging import Hedger
+from .logging_config import payload_for_log
+from .metrics import RouteTransferStats, route_template
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
+def _supported_encodings() -> str:
+    """Content codings httpx can decode in this environment, best first."""
+    encodings = []
+    if importlib.util.find_spec("zstandard"):
+        encodings.append("zstd")
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return ", ".join(encodings)
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
 class HTTPClient:
+    """Async HTTP client backed by a single pooled, keep-alive session.
+
+    The session is opened once in the Starlette lifespan (see ``server.py``) and
+    shared by every tool, so backend calls reuse connections and never block the
+    event loop.
+    """
 
     def __init__(self, configs: ServerConfigs):
         self._configs = configs
+        self._session: Optional[httpx.AsyncClient] = None
+        self._transfer_stats: RouteTransferStats = RouteTransferStats()
+        self._base_path: str = urlsplit(configs.server_url).path.rstrip("/")
+        self._cache: Optional[ResponseCache] = None
+        if configs.cache_enabled:
+            self._cache = ResponseCache(
+                shared_routes=configs.cache_shared_routes,
+                private_routes=configs.cache_private_routes,
+                shared_max_entries=configs.cache_shared_max_entries,
+                private_max_entries=configs.cache_private_max_entries,
+            )
+        self._single_flight: Optional[SingleFlight] = SingleFlight() if configs.http_coalesce_requests else None
+        self._hedger: Optional[Hedger] = None
+        self._hedge_routes: dict[str, float] = {route: 0.0 for route in configs.http_hedge_routes}
+        if configs.http_hedge_enabled:
+            self._hedger = Hedger(
+                percentile=configs.http_hedge_percentile,
+                initial_delay=configs.http_hedge_initial_delay,
+                min_delay=configs.http_hedge_min_delay,
+                max_delay=configs.http_hedge_max_delay,
+                budget_ratio=configs.http_hedge_budget_ratio,
+                budget_burst=configs.http_hedge_budget_burst,
+            )
+
+    async def __aenter__(self) -> "HTTPClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def start(self) -> None:
+        """Open the shared connection pool if it is not already open."""
+        if self._session is not None and not self._session.is_closed:
+            return
 
-    def get(
+        limits = httpx.Limits(
+            max_connections=self._configs.http_max_connections,
+            max_keepalive_connections=self._configs.http_max_keepalive_connections,
+            keepalive_expiry=self._configs.http_keepalive_expiry,
+        )
+        http2 = self._configs.http_http2
+        if http2 and not _http2_available():
+            logger.warning("OB_HTTP_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1.")
+            http2 = False
+
+        accept_encoding = self._configs.http_accept_encoding or _supported_encodings()
+        self._session = httpx.AsyncClient(
+            limits=limits,
+            timeout=self._configs.http_timeout,
+            http2=http2,
+            headers={"Accept-Encoding": accept_encoding},
+        )
+        logger.info(
+            "HTTP connection pool opened: max_connections=%s, max_keepalive=%s, keepalive_expiry=%ss, "
+            "http2=%s, accept_encoding=%s",
+            limits.max_connections,
+            limits.max_keepalive_connections,
+            limits.keepalive_expiry,
+            http2,
+            accept_encoding,
+        )
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool."""
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+            logger.info("HTTP connection pool closed.")
+
+    async def _get_session(self) -> httpx.AsyncClient:
+        # Fall back to a lazily opened pool when used outside the lifespan
+        if self._session is None or self._session.is_closed:
+            await self.start()
+        assert self._session is not None
+        return self._session
+
+    async def get(
             self,
             url: str,
             *,
             headers: Optional[dict[str, str]] = None,
             params: Optional[dict[str, Any]] = None,
-            timeout: float = 10.0,
+            timeout: Optional[float] = None,
+            refresh: bool = False,
     ) -> Any:
         """Perform an HTTP GET and return the parsed JSON payload.
 
@@ -44,7 +150,8 @@ class HTTPClient:
             url: The URL to fetch.
             headers: Optional additional headers to include in the request.
             params: Optional query parameters for the request.
-            timeout: Socket timeout in seconds.
+            timeout: Socket timeout in seconds. Defaults to ``http_timeout``.
+            refresh: Bypass a fresh cache entry and revalidate it with the backend.
 
         Returns:
             Parsed JSON (could be dict, list, etc.).
@@ -56,35 +163,76 @@ class HTTPClient:
         if headers:
             base_headers.update(headers)
 
-        request_kwargs: dict[str, Any] = {
-            "headers": base_headers,
-            "params": params,
-            "timeout": timeout,
-        }
-
-        logger.debug(f"HTTP GET Request: url={url}, headers={base_headers}, params={params}, timeout={timeout}")
-        try:
-            response: Response = requests.get(url, **request_kwargs)
-            logger.debug(f"HTTP GET Response: status_code={response.status_code}, content={response.text}")
-            response.raise_for_status()  # Raises HTTPError for bad responses (4xx, 5xx)
-            result: dict[str, Any] = response.json()
-            data = result.get("data") or result.get("Data")
-            if data is not None:
-                return data
+        cache_target = self._resolve_cache_target(url, base_headers)
+        stale: Optional[CacheEntry] = None
+        if cache_target is not None:
+            tier, route, ttl, identity = cache_target
+            key = ResponseCache.make_key(url, params, identity)
+            if refresh:
+                entry, fresh = self._cache.peek(tier, key), False
             else:
-                logger.debug("No 'data' or 'Data' key found in response JSON.")
-                return result
-        except requests.RequestException as e:
-            logger.error(f"HTTP GET request to {url} failed. Caused by: {e}")
-            return {"error": str(e)}
+                entry, fresh = self._cache.lookup(tier, key)
+            if fresh:
+                logger.debug("Cache hit (%s) for GET %s", tier, url)
+                return entry.value
+            # An expired entry with validators can still be revalidated with a 304
+            stale = entry if entry is not None and entry.revalidatable else None
+
+        async def fetch() -> Any:
+            request_headers = base_headers
+            if stale is not None:
+                request_headers = {**base_headers, **stale.conditional_headers()}
+
+            response = await self._send_get(url, headers=request_headers, params=params, timeout=timeout)
+            if _is_error(response):
+                return response
+
+            if response.status_code == 304 and stale is not None:
+                logger.debug("Revalidated cached entry (%s) for GET %s", tier, url)
+                self._cache.refresh(tier, key, stale, ttl=ttl)
+                return stale.value
+
+            result = self._decode("GET", url, response)
+            if cache_target is not None and not _is_error(result):
+                self._cache.set(
+                    tier, key, result, route=route, ttl=ttl, identity=identity,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+            return result
+
+        if self._single_flight is None:
+            return await fetch()
 
-    def post(
+        # Identical concurrent GETs from the same caller share one upstream request
+        flight_key = ResponseCache.make_key(url, params, identity_hash(base_headers.get("Authorization")))
+        return await self._single_flight.do(flight_key, fetch)
+
+    async def _send_get(
+            self,
+            url: str,
+            *,
+            headers: dict[str, str],
+            params: Optional[dict[str, Any]],
+            timeout: Optional[float],
+    ) -> httpx.Response | dict[str, str]:
+        """Send a GET, hedging it when the route is opted in. Writes never come through here."""
+        def attempt():
+            return self._exchange("GET", url, headers=headers, params=params, timeout=timeout)
+
+        if self._hedger is not None:
+            match = match_route(self._relative_path(url), self._hedge_routes)
+            if match is not None:
+                return await self._hedger.run(match[0], attempt, _is_error)
+        return await attempt()
+
+    async def post(
             self,
             url: str,
             *,
             json: Optional[dict[str, Any]] = None,
             headers: Optional[dict[str, str]] = None,
-            timeout: float = 10.0,
+            timeout: Optional[float] = None,
     ) -> Any:
         """Perform an HTTP POST and return the parsed JSON payload.
 
@@ -92,7 +240,7 @@ class HTTPClient:
             url: The URL to post to.
             json: Optional JSON data to include in the request body.
             headers: Optional additional headers to include in the request.
-            timeout: Socket timeout in seconds.
+            timeout: Socket timeout in seconds. Defaults to ``http_timeout``.
 
         Returns:
             Parsed JSON (could be dict, list, etc.).
@@ -105,24 +253,155 @@ class HTTPClient:
         if headers:
             base_headers.update(headers)
 
+        result = await self._request("POST", url, headers=base_headers, json=json, timeout=timeout)
+        if self._cache is not None:
+            # A write makes the caller's cached view of that resource stale
+            self._cache.invalidate_private(base_headers.get("Authorization"), self._relative_path(url))
+        return result
+
+    async def prewarm(self, url: str, *, connections: int, headers: Optional[dict[str, str]] = None) -> int:
+        """Open up to ``connections`` keep-alive connections by sending concurrent GETs to ``url``.
+
+        Returns:
+            The number of requests that succeeded.
+        """
+        results = await asyncio.gather(*(
+            self._exchange("GET", url, headers={"Accept": "application/json", **(headers or {})})
+            for _ in range(max(0, connections))
+        ))
+        return sum(1 for result in results if not _is_error(result))
+
+    def shared_entries(self) -> list[tuple[str, dict[str, str], CacheEntry]]:
+        """Snapshot of the shared cache tier as ``(url, params, entry)``."""
+        if self._cache is None:
+            return []
+        return [(key[1], dict(key[2]), entry) for key, entry in self._cache.entries(SHARED_TIER)]
+
+    def seed_shared(self, url: str, params: Optional[dict[str, Any]], entry: CacheEntry) -> None:
+        """Place a prepared entry in the shared tier; ignored if caching is disabled."""
+        if self._cache is not None:
+            self._cache.seed(SHARED_TIER, ResponseCache.make_key(url, params, None), entry)
+
+    def cache_stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and occupancy for each cache tier."""
+        if self._cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._cache.stats()}
+
+    def coalescing_stats(self) -> dict[str, Any]:
+        """Return how many GETs led an upstream request versus joined one in flight."""
+        if self._single_flight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._single_flight.stats()}
+
+    def hedging_stats(self) -> dict[str, Any]:
+        """Return hedge budget usage and the current per-route hedge delays."""
+        if self._hedger is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._hedger.stats()}
+
+    def transfer_stats(self) -> dict[str, Any]:
+        """Return per-route bytes on the wire, decoded bytes and JSON decode time."""
+        return self._transfer_stats.snapshot()
+
+    def _relative_path(self, url: str) -> str:
+        path = urlsplit(url).path
+        if self._base_path and path.startswith(self._base_path):
+            path = path[len(self._base_path):]
+        return path or "/"
+
+    def _resolve_cache_target(
+            self, url: str, headers: dict[str, str]
+    ) -> Optional[tuple[str, str, float, Optional[str]]]:
+        if self._cache is None:
+            return None
+        return self._cache.resolve(self._relative_path(url), headers.get("Authorization"))
+
+    async def _request(
+            self,
+            method: str,
+            url: str,
+            *,
+            headers: dict[str, str],
+            params: Optional[dict[str, Any]] = None,
+            json: Optional[dict[str, Any]] = None,
+            timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a request on the shared session and unwrap the ``data`` envelope."""
+        response = await self._exchange(method, url, headers=headers, params=params, json=json, timeout=timeout)
+        if _is_error(response):
+            return response
+        return self._decode(method, url, response)
+
+    async def _exchange(
+            self,
+            method: str,
+            url: str,
+            *,
+            headers: dict[str, str],
+            params: Optional[dict[str, Any]] = None,
+            json: Optional[dict[str, Any]] = None,
+            timeout: Optional[float] = None,
+    ) -> httpx.Response | dict[str, str]:
+        """Send one request and return the response, or an error dict on failure.
+
+        A ``304 Not Modified`` is returned as a response, not an error, so that
+        conditional GETs can refresh their cached entry.
+        """
         request_kwargs: dict[str, Any] = {
-            "headers": base_headers,
+            "headers": headers,
+            "params": params,
             "json": json,
-            "timeout": timeout,
         }
+        if timeout is not None:
+            request_kwargs["timeout"] = timeout
+
+        # Headers are never logged; they carry the caller's bearer token and the API key
+        logger.debug("HTTP %s Request: url=%s, params=%s, timeout=%s", method, url, params, timeout)
+        try:
+            session = await self._get_session()
+            response: httpx.Response = await session.request(method, url, **request_kwargs)
+            if logger.isEnabledFor(logging.DEBUG):
+                if self._configs.log_capture_payloads:
+                    logger.debug("HTTP %s Response: status_code=%s, content=%s",
+                                 method, response.status_code, payload_for_log(response.text, self._configs))
+                else:
+                    logger.debug("HTTP %s Response: status_code=%s, bytes=%d",
+                                 method, response.status_code, len(response.content))
+            self._transfer_stats.record_transfer(
+                route_template(self._relative_path(url)),
+                wire_bytes=response.num_bytes_downloaded,
+                decoded_bytes=len(response.content),
+                status_code=response.status_code,
+                http_version=response.http_version,
+                encoding=response.headers.get("Content-Encoding", "identity"),
+            )
+            if response.status_code == 304:
+                return response
+            response.raise_for_status()  # Raises HTTPStatusError for bad responses (4xx, 5xx)
+            return response
+        except httpx.HTTPError as e:
+            logger.error("HTTP %s request to %s failed. Caused by: %s", method, url, e)
+            return {"error": str(e)}
 
-        logger.debug(f"HTTP POST Request: url={url}, headers={base_headers}, json={json}, timeout={timeout}")
+    def _decode(self, method: str, url: str, response: httpx.Response) -> Any:
+        """Parse a JSON response body and unwrap the ``data`` envelope."""
+        started = time.perf_counter()
         try:
-            response: Response = requests.post(url, **request_kwargs)
-            logger.debug(f"HTTP POST Response: status_code={response.status_code}, content={response.text}")
-            response.raise_for_status()  # Raises HTTPError for bad responses (4xx, 5xx)
             result: dict[str, Any] = response.json()
-            data = result.get("data") or result.get("Data")
-            if data is not None:
-                return data
-            else:
-                logger.debug("No 'data' or 'Data' key found in response JSON.")
-                return result
-        except requests.RequestException as e:
-            logger.error(f"HTTP POST request to {url} failed. Caused by: {e}")
+            self._transfer_stats.record_decode(
+                route_template(self._relative_path(url)), time.perf_counter() - started
+            )
+        except ValueError as e:
+            logger.error("HTTP %s response from %s is not valid JSON. Caused by: %s", method, url, e)
             return {"error": str(e)}
+        data = result.get("data") or result.get("Data")
+        if data is not None:
+            return data
+        else:
+            logger.debug("No 'data' or 'Data' key found in response JSON.")
+            return result
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and "error" in result and len(result) == 1
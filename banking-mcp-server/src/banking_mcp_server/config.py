@@ -14,6 +14,8 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class ServerConfigs(BaseSettings):
@@ -29,3 +31,143 @@ class ServerConfigs(BaseSettings):
     mcp_host: str = "localhost"
     mcp_port: int = 8000
     mcp_server_url: str = ""
+
+    # Logging: "json" or "text" records, optional file sink, and opt-in response
+    # body capture at DEBUG level
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_file: str = ""
+    log_capture_payloads: bool = False
+    log_payload_max_bytes: int = 2048
+
+    # Runtime metrics at /metrics. Off by default, since they expose component
+    # internals; with a token set, requests must send "Authorization: Bearer <token>".
+    metrics_enabled: bool = False
+    metrics_token: str = ""
+
+    # Backend HTTP connection pool
+    http_timeout: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_coalesce_requests: bool = True
+    # HTTP/2 needs the optional 'h2' package; br/zstd decoding needs 'brotli'/'zstandard'.
+    # An empty accept-encoding advertises every coding the installed packages can decode.
+    http_http2: bool = False
+    http_accept_encoding: str = ""
+
+    # Hedged GETs: a backup request is sent once the primary exceeds the route's
+    # latency percentile; the budget caps hedges to a fraction of primary requests.
+    http_hedge_enabled: bool = False
+    http_hedge_routes: list[str] = ["/accounts", "/me", "/payees", "/products"]
+    http_hedge_percentile: float = 95.0
+    http_hedge_initial_delay: float = 1.0
+    http_hedge_min_delay: float = 0.05
+    http_hedge_max_delay: float = 2.0
+    http_hedge_budget_ratio: float = 0.05
+    http_hedge_budget_burst: float = 5.0
+
+    # Backend response cache. Route prefixes map to TTLs in seconds.
+    cache_enabled: bool = True
+    cache_shared_routes: dict[str, float] = {"/products": 300.0}
+    cache_private_routes: dict[str, float] = {"/me": 120.0, "/payees": 120.0, "/accounts": 30.0}
+    cache_shared_max_entries: int = 256
+    cache_private_max_entries: int = 4096
+
+    # Refresh-ahead warmup: open backend connections at startup, keep hot shared
+    # cache entries fresh and persist them for warm restarts. Intervals are in
+    # seconds; jitter is a fraction of the interval. An empty store path disables
+    # persistence. Off by default; set OB_WARMUP_ENABLED=true to opt in.
+    warmup_enabled: bool = False
+    warmup_routes: list[str] = ["/products"]
+    warmup_probe_path: str = "/health"
+    warmup_connections: int = 4
+    warmup_interval: float = 15.0
+    warmup_jitter: float = 0.2
+    warmup_refresh_ahead: float = 60.0
+    warmup_store_path: str = "/tmp/ai-banking-agent/warm-cache.sqlite3"
+    warmup_store_max_age: float = 86400.0
+
+    # get_user_accounts_batch fan-out limits
+    batch_max_items: int = 20
+    batch_max_concurrency: int = 5
+    batch_item_timeout: float = 8.0
+
+    # Byte budget for projected (non-"full") tool responses; larger lists are truncated
+    projection_max_bytes: int = 12000
+
+    # Columnar transaction store used by summarize_transactions
+    analytics_max_accounts: int = 1024
+
+    # compare_loans: evaluated term grid size limit and the largest share of
+    # monthly income a repayment may take
+    loan_max_terms: int = 600
+    loan_max_payment_ratio: float = 0.4
+
+    # find_payee: per-identity payee indexes kept in memory and the lowest match
+    # score returned
+    payee_index_max_identities: int = 1024
+    payee_min_score: float = 0.3
+
+    # Payment flow state: capacity bound, TTL in seconds per payment state and
+    # the background expiry sweep interval. The "memory" backend is private to
+    # one worker; "sqlite" shares state between all workers using the same path.
+    # Completed payments back their receipt downloads, so their TTL is how long
+    # a receipt can still be rendered on first download.
+    payment_store_backend: Literal["memory", "sqlite"] = "memory"
+    payment_store_path: str = "/tmp/ai-banking-agent/payments.sqlite3"
+    payment_store_capacity: int = 10000
+    payment_state_ttls: dict[str, float] = {
+        "initiated": 900.0, "authorized": 300.0, "declined": 300.0, "completed": 86400.0,
+    }
+    payment_sweep_interval: float = 30.0
+
+    # Write-behind outbox that records completed payments at the backend: SQLite
+    # path, flush workers, entries posted per batch, delivery attempts before an
+    # entry is parked as dead, retry backoff bounds and claim lease (seconds), how
+    # often idle workers look for retries that came due, and how long shutdown
+    # keeps flushing due entries. Entries are posted with the server API key and,
+    # if set, this service bearer token, never with the user's token.
+    outbox_path: str = "/tmp/ai-banking-agent/outbox.sqlite3"
+    outbox_workers: int = 2
+    outbox_batch_size: int = 16
+    outbox_max_attempts: int = 8
+    outbox_retry_base: float = 1.0
+    outbox_retry_max: float = 300.0
+    outbox_lease: float = 30.0
+    outbox_poll_interval: float = 1.0
+    outbox_drain_timeout: float = 10.0
+    outbox_service_token: str = ""
+
+    # Receipt rendering pool: "process" or "thread" workers, renders queued beyond
+    # the busy workers, and how long a render waits for a free slot. Receipts are
+    # rendered on their first download, not when the payment completes.
+    receipt_pool_kind: Literal["process", "thread"] = "process"
+    receipt_pool_workers: int = 2
+    receipt_pool_queue_size: int = 32
+    receipt_pool_submit_timeout: float = 5.0
+
+    # Receipt storage. "files" keeps one PDF per receipt, spread across
+    # hash-prefixed directory levels (256 subdirectories each). "segments" packs
+    # receipts into append-only segment files with an offset index; receipts older
+    # than the retention window (seconds) are dropped and sealed segments whose
+    # live share falls below the compact ratio are rewritten every compact interval.
+    # The files backend also deletes the snapshots of never-downloaded receipts
+    # after the retention window, checking every compact interval.
+    # Segments have a single writer: only one server process may open a segments
+    # root, so run several workers with the files backend.
+    receipt_store_backend: Literal["files", "segments"] = "files"
+    receipt_store_root: str = "/tmp/ai-banking-agent/transactions"
+    receipt_store_shard_depth: int = 2
+    receipt_segment_max_bytes: int = 64 * 1024 * 1024
+    receipt_retention: float = 90 * 86400.0
+    receipt_compact_interval: float = 3600.0
+    receipt_compact_ratio: float = 0.5
+    # Content ETags of recently served receipts, kept so repeat downloads skip hashing
+    receipt_etag_cache_size: int = 65536
+
+    # Incremental transaction sync: per-account local logs refreshed with delta
+    # requests, bounded by the total number of transactions held
+    sync_enabled: bool = True
+    sync_max_transactions: int = 50000
+    sync_refresh_interval: float = 30.0
@@ -14,12 +14,31 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import hmac
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
-from starlette.responses import JSONResponse, FileResponse
+from starlette.responses import JSONResponse, FileResponse, Response
 from starlette.exceptions import HTTPException
 
+from .metrics import collect_metrics
+from .receipts import Receipt, ReceiptService
+from .render_pool import PoolSaturated
+
+# Receipts are write-once and personal, so browsers may keep them for good but shared caches may not
+RECEIPT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class ReceiptSliceResponse(Response):
+    """A PDF response whose body is sent straight from a memory-mapped segment slice."""
+
+    media_type = "application/pdf"
+
+    def render(self, content: memoryview) -> memoryview:
+        # Older Starlette releases encode anything that is not bytes; hand the view on as is
+        return content
+
 
 async def health_endpoint(request):
     """Health check endpoint that returns server status and current timestamp."""
@@ -32,23 +51,120 @@ async def health_endpoint(request):
     )
 
 
+async def metrics_endpoint(request):
+    """Runtime metrics endpoint exposing cache and client counters, guarded by the metrics token if set."""
+    token: str = request.app.state.metrics_token
+    if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return JSONResponse(
+        {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "metrics": collect_metrics(),
+        }
+    )
+
+
 async def get_receipt_endpoint(request):
-    """Retrieve a transaction receipt PDF by transaction ID."""
+    """
+    Retrieve a transaction receipt PDF by transaction ID, rendering it on first download.
+
+    Receipts never change once written, so they are served as immutable
+    resources: a strong content ETag, long-lived cache headers, ``304 Not
+    Modified`` for matching ``If-None-Match``, single byte ranges and ``HEAD``.
+    Files go out through ``FileResponse`` (ranges, and ``pathsend`` zero-copy
+    transfer where the server supports it); packed receipts are sent as a view
+    of their memory-mapped slice without copying.
+    """
     transaction_id: str = request.path_params.get("transaction_id")
 
     if not transaction_id:
         raise HTTPException(status_code=400, detail="transaction_id is required")
 
-    # Construct file path
-    pdf_path: Path = (
-        Path("/tmp/ai-banking-agent/transactions") / f"{transaction_id}.pdf"
-    )
+    receipts: ReceiptService = request.app.state.receipts
+    try:
+        receipt: Optional[Receipt] = await receipts.receipt(transaction_id)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Receipt rendering is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
 
-    if not pdf_path.exists():
+    if receipt is None:
         raise HTTPException(
             status_code=404, detail=f"PDF for transaction {transaction_id} not found"
         )
 
-    return FileResponse(
-        pdf_path, filename=f"{transaction_id}.pdf", media_type="application/pdf"
+    headers: dict[str, str] = {"ETag": receipt.etag, "Cache-Control": RECEIPT_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), receipt.etag):
+        return Response(status_code=304, headers=headers)
+
+    if isinstance(receipt.body, Path):
+        return FileResponse(
+            receipt.body, filename=f"{transaction_id}.pdf", media_type="application/pdf", headers=headers
+        )
+
+    # Segment store: the body is a slice of the segment's read-only memory map
+    body: memoryview = receipt.body
+    size: int = body.nbytes
+    status_code: int = 200
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Disposition"] = f'attachment; filename="{transaction_id}.pdf"'
+
+    http_range: Optional[str] = request.headers.get("range")
+    if_range: Optional[str] = request.headers.get("if-range")
+    if http_range and (if_range is None or if_range == receipt.etag):
+        try:
+            span = _single_byte_range(http_range, size)
+        except ValueError:
+            # Malformed or multi-range requests get the whole receipt
+            span = (0, size)
+        if span is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        start, end = span
+        if (start, end) != (0, size):
+            body = body[start:end]
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(body.nbytes)
+        return Response(status_code=status_code, media_type="application/pdf", headers=headers)
+    return ReceiptSliceResponse(body, status_code=status_code, headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(",")
     )
+
+
+def _single_byte_range(http_range: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range into ``(start, end)`` with ``end`` exclusive.
+
+    Returns:
+        The span clipped to ``size``, or None if it is not satisfiable
+
+    Raises:
+        ValueError: If the header is malformed or asks for several ranges
+    """
+    unit, _, spec = http_range.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError(f"Unsupported range: {http_range}")
+    first, _, last = spec.strip().partition("-")
+    if not first:
+        suffix = int(last)
+        return (max(0, size - suffix), size) if suffix > 0 and size else None
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if last and end <= start:
+        raise ValueError(f"Invalid range: {http_range}")
+    if start >= size:
+        return None
+    return start, min(end, size)
@@ -0,0 +1,218 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import logging
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+FilterOp = Literal["eq", "ne", "contains", "startswith", "endswith", "gt", "gte", "lt", "lte"]
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+_DATE_ONLY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_ORDERING_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+class FilterCondition(BaseModel):
+    """A single filter condition applied to account or transaction records."""
+
+    field: str = Field(
+        description="Record field to test. Use dots for nested fields, e.g. 'Amount.Amount', "
+        "'CreditDebitIndicator', 'BookingDateTime', 'TransactionInformation', 'MerchantDetails.MerchantName'."
+    )
+    op: FilterOp = Field(description="Comparison operator.")
+    value: Any = Field(description="Value to compare against. Dates use YYYY-MM-DD.")
+
+
+def _resolve(record: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    current: Any = record
+    for key in path:
+        if not isinstance(current, dict):
+            return None
+        current = current.get(key)
+    return current
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _compile_condition(field: str, op: str, value: Any) -> Predicate:
+    path = tuple(field.split("."))
+
+    if op in ("contains", "startswith", "endswith"):
+        needle = str(value).lower()
+        if op == "contains":
+            return lambda record: needle in str(_resolve(record, path) or "").lower()
+        if op == "startswith":
+            return lambda record: str(_resolve(record, path) or "").lower().startswith(needle)
+        return lambda record: str(_resolve(record, path) or "").lower().endswith(needle)
+
+    number = _as_number(value)
+    is_date = isinstance(value, str) and bool(_DATE_ONLY.match(value))
+    text = str(value).lower()
+
+    def compare(actual: Any) -> Optional[Tuple[Any, Any]]:
+        """Coerce a field value and the condition value to comparable operands."""
+        if actual is None:
+            return None
+        if number is not None:
+            actual_number = _as_number(actual)
+            if actual_number is not None:
+                return actual_number, number
+        if is_date and isinstance(actual, str):
+            # Compare datetimes at day granularity, as the backend does
+            return actual[:10], value
+        return str(actual).lower(), text
+
+    if op in ("eq", "ne"):
+        negate = op == "ne"
+
+        def equality(record: Dict[str, Any]) -> bool:
+            operands = compare(_resolve(record, path))
+            matched = operands is not None and operands[0] == operands[1]
+            return matched != negate
+
+        return equality
+
+    ordering = _ORDERING_OPS[op]
+
+    def ordered(record: Dict[str, Any]) -> bool:
+        operands = compare(_resolve(record, path))
+        return operands is not None and ordering(operands[0], operands[1])
+
+    return ordered
+
+
+@lru_cache(maxsize=512)
+def _compile_key(key: Tuple[Tuple[str, str, str], ...]) -> Predicate:
+    predicates = [_compile_condition(field, op, value) for field, op, value in _decode_key(key)]
+    if not predicates:
+        return lambda record: True
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda record: all(predicate(record) for predicate in predicates)
+
+
+def _encode_key(conditions: Sequence[FilterCondition]) -> Tuple[Tuple[str, str, str], ...]:
+    # JSON keeps value types distinct (e.g. 5 vs "5") while staying hashable
+    return tuple((c.field, c.op, json.dumps(c.value, sort_keys=True, default=str)) for c in conditions)
+
+
+def _decode_key(key: Tuple[Tuple[str, str, str], ...]) -> List[Tuple[str, str, Any]]:
+    return [(field, op, json.loads(value)) for field, op, value in key]
+
+
+def compile_filters(conditions: Optional[Sequence[FilterCondition]]) -> Predicate:
+    """Compile conditions into a single predicate; identical filter sets reuse the compiled form."""
+    return _compile_key(_encode_key(conditions or []))
+
+
+def apply_filters(records: List[Dict[str, Any]], conditions: Optional[Sequence[FilterCondition]]) -> List[Dict[str, Any]]:
+    """Return the records matching every condition, without mutating the input."""
+    if not conditions:
+        return records
+    predicate = compile_filters(conditions)
+    return [record for record in records if isinstance(record, dict) and predicate(record)]
+
+
+def transaction_pushdown(conditions: Optional[Sequence[FilterCondition]]) -> Tuple[Dict[str, str], bool]:
+    """Translate transaction conditions into backend query parameters.
+
+    Pushed-down parameters only ever narrow the backend result to a superset of the
+    matching records, so callers still evaluate every condition locally.
+
+    Returns:
+        Tuple of (query params, exact) where ``exact`` is True when the params alone
+        select exactly the matching records, which makes ``limit``/``offset`` safe to
+        push down as well.
+    """
+    params: Dict[str, str] = {}
+    exact = True
+    for condition in conditions or []:
+        value = condition.value
+        if condition.field == "CreditDebitIndicator" and condition.op == "eq" and "type" not in params:
+            params["type"] = str(value)
+        elif condition.field == "BookingDateTime" and isinstance(value, str) and len(value) >= 10:
+            day = value[:10]
+            if condition.op in ("gte", "gt") and "startDate" not in params:
+                params["startDate"] = day
+                exact = exact and condition.op == "gte" and bool(_DATE_ONLY.match(value))
+            elif condition.op in ("lte", "lt") and "endDate" not in params:
+                params["endDate"] = day
+                exact = exact and condition.op == "lte" and bool(_DATE_ONLY.match(value))
+            else:
+                exact = False
+        elif condition.field in ("TransactionInformation", "MerchantDetails.MerchantName") \
+                and condition.op == "contains" and "category" not in params:
+            # The backend matches information OR merchant name, a superset of either
+            params["category"] = str(value)
+            exact = False
+        else:
+            exact = False
+    return params, exact
+
+
+def filter_payload(payload: Any, conditions: Optional[Sequence[FilterCondition]], limit: int = 0) -> Any:
+    """Apply conditions and a row limit to an accounts or transactions payload.
+
+    Lists (e.g. all accounts) are filtered directly. Single objects are filtered
+    on their ``transactions`` (transactions sub-resource) or ``Transactions``
+    (single account) array. The cached payload itself is never mutated.
+    """
+    if not conditions and limit <= 0:
+        return payload
+
+    def select(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        selected = apply_filters(records, conditions)
+        return selected[:limit] if limit > 0 else selected
+
+    if isinstance(payload, list):
+        return select(payload)
+
+    if isinstance(payload, dict):
+        if isinstance(payload.get("transactions"), list):
+            selected = select(payload["transactions"])
+            result = {**payload, "transactions": selected}
+            if isinstance(payload.get("pagination"), dict):
+                result["pagination"] = {**payload["pagination"], "count": len(selected)}
+            return result
+        if isinstance(payload.get("Transactions"), list):
+            return {**payload, "Transactions": select(payload["Transactions"])}
+
+    return payload
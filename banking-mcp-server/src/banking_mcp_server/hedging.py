@@ -0,0 +1,195 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for one route, with a cached percentile."""
+
+    def __init__(self, window: int, percentile: float, min_samples: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._percentile = percentile
+        self._min_samples = min_samples
+        self._cached: Optional[float] = None
+        self._since_refresh = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+        # Re-sorting the window on every sample is wasteful; refresh periodically
+        if self._cached is None or self._since_refresh >= 16:
+            self._refresh()
+
+    def value(self) -> Optional[float]:
+        """Return the tracked percentile, or None until enough samples exist."""
+        if len(self._samples) < self._min_samples:
+            return None
+        if self._cached is None:
+            self._refresh()
+        return self._cached
+
+    def _refresh(self) -> None:
+        self._since_refresh = 0
+        if len(self._samples) < self._min_samples:
+            self._cached = None
+            return
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(self._percentile / 100.0 * len(ordered)) - 1))
+        self._cached = ordered[index]
+
+
+class HedgeBudget:
+    """Token bucket limiting hedges to a fraction of primary requests.
+
+    Every primary request deposits ``ratio`` tokens (up to ``burst``); each hedge
+    spends one. Over time, hedges can therefore add at most ``ratio`` extra load.
+    """
+
+    def __init__(self, ratio: float, burst: float):
+        self._ratio = ratio
+        self._burst = burst
+        self._tokens = burst
+        self.requests = 0
+        self.hedges = 0
+        self.denied = 0
+
+    def on_request(self) -> None:
+        self.requests += 1
+        self._tokens = min(self._burst, self._tokens + self._ratio)
+
+    def try_acquire(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.hedges += 1
+            return True
+        self.denied += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "denied": self.denied,
+            "tokens": round(self._tokens, 3),
+        }
+
+
+class Hedger:
+    """Issue a backup attempt for slow idempotent reads; the first good result wins.
+
+    The hedge delay for a route is its observed latency percentile, clamped to
+    ``[min_delay, max_delay]``; ``initial_delay`` is used until enough samples exist.
+    Only callers of :meth:`run` are hedged, and ``HTTPClient`` calls it for GETs only.
+    """
+
+    def __init__(
+            self,
+            *,
+            percentile: float,
+            initial_delay: float,
+            min_delay: float,
+            max_delay: float,
+            budget_ratio: float,
+            budget_burst: float,
+            window: int = 256,
+            min_samples: int = 20,
+    ):
+        self._percentile = percentile
+        self._initial_delay = initial_delay
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._window = window
+        self._min_samples = min_samples
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self.budget = HedgeBudget(ratio=budget_ratio, burst=budget_burst)
+        self.hedge_wins = 0
+
+    def delay_for(self, route: str) -> float:
+        tracker = self._trackers.get(route)
+        observed = tracker.value() if tracker is not None else None
+        if observed is None:
+            return self._initial_delay
+        return min(self._max_delay, max(self._min_delay, observed))
+
+    def _record(self, route: str, seconds: float) -> None:
+        tracker = self._trackers.get(route)
+        if tracker is None:
+            tracker = self._trackers[route] = LatencyTracker(self._window, self._percentile, self._min_samples)
+        tracker.record(seconds)
+
+    async def _timed(self, route: str, attempt: Callable[[], Awaitable[Any]],
+                     is_error: Callable[[Any], bool]) -> Any:
+        started = time.monotonic()
+        result = await attempt()
+        if not is_error(result):
+            self._record(route, time.monotonic() - started)
+        return result
+
+    async def run(self, route: str, attempt: Callable[[], Awaitable[Any]],
+                  is_error: Callable[[Any], bool]) -> Any:
+        """Run ``attempt``, hedging with a second call if it is slower than the route's delay.
+
+        Args:
+            route: Route prefix used to track latency, e.g. ``/accounts``.
+            attempt: Zero-argument coroutine factory performing one idempotent request.
+            is_error: Predicate identifying a failed result, so a fast failure does
+                not beat a slower success.
+
+        Returns:
+            The first successful result, or the last result if every attempt failed.
+        """
+        self.budget.on_request()
+        primary = asyncio.ensure_future(self._timed(route, attempt, is_error))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.delay_for(route))
+            if done:
+                return primary.result()
+
+            if not self.budget.try_acquire():
+                return await primary
+
+            logger.debug("Hedging slow request on route %s", route)
+            hedge = asyncio.ensure_future(self._timed(route, attempt, is_error))
+            pending = {primary, hedge}
+            result: Any = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not is_error(result):
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return result
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.budget.stats(),
+            "hedge_wins": self.hedge_wins,
+            "delays": {route: round(self.delay_for(route), 4) for route in self._trackers},
+        }
@@ -0,0 +1,62 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedLock:
+    """Mutual exclusion per key instead of one lock for everything.
+
+    Callers holding different keys never wait on each other. A lock exists only
+    while some caller holds or waits for its key and is dropped with the last
+    one, so the table stays as small as the number of contended keys.
+    """
+
+    def __init__(self) -> None:
+        # key -> [lock, holders and waiters]
+        self._locks: Dict[Hashable, List] = {}
+        self.acquired: int = 0
+        self.contended: int = 0
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold the lock for ``key`` for the duration of the ``async with`` block."""
+        slot = self._locks.get(key)
+        if slot is None:
+            slot = self._locks[key] = [asyncio.Lock(), 0]
+        elif slot[0].locked():
+            self.contended += 1
+            logger.debug("Waiting for lock on key=%r", key)
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                self.acquired += 1
+                yield
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._locks[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"acquired": self.acquired, "contended": self.contended, "keys": len(self._locks)}
@@ -0,0 +1,252 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RankBy = Literal["total_cost", "monthly_payment", "apr"]
+
+# Fees that are charged conditionally rather than at drawdown, so they are not part of the cost of credit
+_CONDITIONAL_FEES = {"EarlyRepayment", "LatePayment", "Arrears"}
+_APR_ITERATIONS = 8
+
+
+def _number(value: Any, default: float = np.nan) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _upfront_fees(product: Dict[str, Any]) -> float:
+    return sum(
+        _number(fee.get("Amount"), 0.0)
+        for fee in product.get("Fees") or []
+        if isinstance(fee, dict) and fee.get("FeeType") not in _CONDITIONAL_FEES
+    )
+
+
+def _term_months(value: Any, unit: Any) -> float:
+    months = _number(value)
+    return months * 12 if str(unit).lower().startswith("year") else months
+
+
+class LoanCatalog:
+    """Columnar view of the loan products in the catalog.
+
+    Rates, amount and term bounds, upfront fees and eligibility thresholds are
+    NumPy arrays of shape ``(products,)`` so every product × term combination is
+    evaluated in one broadcast pass. Products without loan details are skipped.
+    """
+
+    __slots__ = ("product_ids", "names", "types", "rates", "min_amounts", "max_amounts",
+                 "min_terms", "max_terms", "fees", "min_incomes", "min_credit_scores",
+                 "min_ages", "max_ages", "employment")
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        loans = [p for p in products if isinstance(p, dict) and isinstance(p.get("LoanDetails"), dict)]
+        self.product_ids: List[str] = [p.get("ProductId", "") for p in loans]
+        self.names: List[str] = [p.get("ProductName", "") for p in loans]
+        self.types: List[str] = [p.get("ProductType", "") for p in loans]
+        # Employment statuses accepted per product; None when the product does not restrict it
+        self.employment: List[Optional[set]] = [
+            set((p.get("Eligibility") or {}).get("Employment") or []) or None for p in loans
+        ]
+
+        def column(extract) -> np.ndarray:
+            return np.fromiter((extract(p) for p in loans), dtype=np.float64, count=len(loans))
+
+        self.rates = column(lambda p: _number(
+            (p.get("LoanInterestRate") or {}).get("RepresentativeRate", (p.get("InterestRate") or {}).get("Rate"))
+        ))
+        self.min_amounts = column(lambda p: _number(p["LoanDetails"].get("MinAmount"), 0.0))
+        self.max_amounts = column(lambda p: _number(p["LoanDetails"].get("MaxAmount"), np.inf))
+        self.min_terms = column(lambda p: _term_months(p["LoanDetails"].get("MinTerm"), p["LoanDetails"].get("TermUnit")))
+        self.max_terms = column(lambda p: _term_months(p["LoanDetails"].get("MaxTerm"), p["LoanDetails"].get("TermUnit")))
+        self.fees = column(_upfront_fees)
+        self.min_incomes = column(lambda p: _number((p.get("Eligibility") or {}).get("MinIncome"), 0.0))
+        self.min_credit_scores = column(lambda p: _number((p.get("Eligibility") or {}).get("MinCreditScore"), 0.0))
+        self.min_ages = column(lambda p: _number((p.get("Eligibility") or {}).get("MinAge"), 0.0))
+        self.max_ages = column(lambda p: _number((p.get("Eligibility") or {}).get("MaxAge"), np.inf))
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def term_bounds(self) -> tuple[int, int]:
+        """Smallest minimum and largest maximum term across products, in months."""
+        terms = np.concatenate([self.min_terms, self.max_terms])
+        terms = terms[np.isfinite(terms)]
+        if terms.size == 0:
+            return 12, 60
+        return int(terms.min()), int(terms.max())
+
+    def compare(
+            self,
+            *,
+            amount: float,
+            terms: np.ndarray,
+            annual_income: float,
+            credit_score: Optional[float] = None,
+            age: Optional[float] = None,
+            employment_status: Optional[str] = None,
+            monthly_expenses: float = 0.0,
+            max_payment_ratio: float = 0.4,
+            product_type: str = "",
+            rank_by: RankBy = "total_cost",
+            top_n: int = 10,
+    ) -> Dict[str, Any]:
+        """Evaluate every product × term combination and rank the eligible ones.
+
+        Monthly payments use the standard annuity formula on the representative
+        rate. The APR additionally accounts for upfront fees: it is the annualised
+        rate at which the payments repay the net amount advanced, solved with a
+        vectorized Newton iteration.
+
+        Returns:
+            A compact table: ``columns`` names and ``rows`` of the best ``top_n``
+            eligible combinations, plus the reasons each ineligible product failed.
+        """
+        n = terms.astype(np.float64)[np.newaxis, :]
+        monthly_rate = (self.rates / 1200.0)[:, np.newaxis]
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            growth = np.power(1.0 + monthly_rate, -n)
+            payments = np.where(monthly_rate > 0, amount * monthly_rate / (1.0 - growth), amount / n)
+            total_interest = payments * n - amount
+            fees = self.fees[:, np.newaxis]
+            total_cost = total_interest + fees
+            apr = _solve_apr(payments, n, amount - fees, monthly_rate)
+
+        monthly_income = annual_income / 12.0
+        checks: Dict[str, np.ndarray] = {
+            "rate_unknown": np.isfinite(self.rates)[:, np.newaxis],
+            "amount_out_of_range": ((amount >= self.min_amounts) & (amount <= self.max_amounts))[:, np.newaxis],
+            "term_out_of_range": (n >= self.min_terms[:, np.newaxis]) & (n <= self.max_terms[:, np.newaxis]),
+            "income_below_minimum": (annual_income >= self.min_incomes)[:, np.newaxis],
+            "unaffordable": (payments <= max_payment_ratio * monthly_income)
+                            & (payments <= monthly_income - monthly_expenses),
+        }
+        if credit_score is not None:
+            checks["credit_score_below_minimum"] = (credit_score >= self.min_credit_scores)[:, np.newaxis]
+        if age is not None:
+            # The borrower must be old enough now and within the age limit when the term ends
+            checks["age_out_of_range"] = (age >= self.min_ages[:, np.newaxis]) & (
+                age + n / 12.0 <= self.max_ages[:, np.newaxis])
+        if employment_status:
+            checks["employment_not_accepted"] = np.array(
+                [accepted is None or employment_status in accepted for accepted in self.employment], dtype=bool
+            )[:, np.newaxis]
+        if product_type:
+            checks["product_type"] = np.array(
+                [t.lower() == product_type.lower() for t in self.types], dtype=bool)[:, np.newaxis]
+
+        eligible = np.ones(payments.shape, dtype=bool)
+        for passed in checks.values():
+            eligible &= passed
+
+        score = {"total_cost": total_cost, "monthly_payment": payments, "apr": apr}[rank_by]
+        candidates = np.flatnonzero(eligible.ravel())
+        limit = max(1, top_n)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(score.ravel()[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(score.ravel()[candidates], kind="stable")]
+        product_index, term_index = np.unravel_index(candidates, payments.shape)
+
+        rows = [
+            [
+                self.product_ids[p], self.names[p], int(terms[t]),
+                round(float(payments[p, t]), 2), round(float(total_interest[p, t]), 2),
+                round(float(self.fees[p]), 2), round(float(total_cost[p, t]), 2),
+                round(float(self.rates[p]), 2), round(float(apr[p, t]), 2),
+            ]
+            for p, t in zip(product_index.tolist(), term_index.tolist())
+        ]
+
+        # A product is reported ineligible only with the reasons that hold for every evaluated term
+        ineligible: Dict[str, List[str]] = {}
+        for p in np.flatnonzero(~eligible.any(axis=1)).tolist():
+            reasons = [name for name, passed in checks.items() if not np.broadcast_to(passed[p], (n.shape[1],)).any()]
+            if "product_type" in reasons:
+                continue
+            ineligible[self.product_ids[p]] = reasons or ["no_single_term_meets_all_criteria"]
+
+        return {
+            "amount": amount,
+            "annual_income": annual_income,
+            "rank_by": rank_by,
+            "evaluated": int(payments.size),
+            "eligible": int(eligible.sum()),
+            "columns": ["product_id", "product_name", "term_months", "monthly_payment", "total_interest",
+                        "fees", "total_cost", "rate", "apr"],
+            "rows": rows,
+            "ineligible_products": ineligible,
+        }
+
+
+def _solve_apr(payments: np.ndarray, n: np.ndarray, net_advance: np.ndarray, initial_rate: np.ndarray) -> np.ndarray:
+    """Annual percentage rate at which ``payments`` over ``n`` months repay ``net_advance``."""
+    rate = np.broadcast_to(np.maximum(initial_rate, 1e-6), payments.shape).copy()
+    for _ in range(_APR_ITERATIONS):
+        discount = np.power(1.0 + rate, -n)
+        present_value = payments * (1.0 - discount) / rate
+        derivative = payments * (n * discount / (1.0 + rate) / rate - (1.0 - discount) / rate ** 2)
+        rate = np.maximum(rate - (present_value - net_advance) / derivative, 1e-9)
+    return (np.power(1.0 + rate, 12) - 1.0) * 100.0
+
+
+def age_on(date_of_birth: str, today: Optional[date] = None) -> Optional[float]:
+    """Age in years from an ISO ``YYYY-MM-DD`` date of birth, or None if it cannot be parsed."""
+    try:
+        born = date.fromisoformat(str(date_of_birth)[:10])
+    except ValueError:
+        return None
+    return ((today or date.today()) - born).days / 365.25
+
+
+class CatalogCache:
+    """Holds the compiled loan catalog for the current products payload.
+
+    The catalog is rebuilt only when the backend response object changes, so
+    comparisons over a cached ``/products`` response skip the conversion.
+    """
+
+    def __init__(self):
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._catalog: Optional[LoanCatalog] = None
+        self.builds = 0
+        self.reuses = 0
+
+    def catalog(self, products: List[Dict[str, Any]]) -> LoanCatalog:
+        if self._catalog is not None and self._source is products:
+            self.reuses += 1
+            return self._catalog
+        self._catalog = LoanCatalog(products)
+        self._source = products
+        self.builds += 1
+        logger.debug("Compiled loan catalog with %d products", len(self._catalog))
+        return self._catalog
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "products": len(self._catalog) if self._catalog is not None else 0,
+            "builds": self.builds,
+            "reuses": self.reuses,
+        }
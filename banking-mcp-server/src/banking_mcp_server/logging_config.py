@@ -0,0 +1,155 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .config import ServerConfigs
+
+# Per-request context attached to every record emitted while handling a tool call
+_tool_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("tool", default=None)
+_transaction_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("transaction_id", default=None)
+
+# Matches credential-bearing header values in rendered messages, e.g. "'Authorization': 'Bearer abc'"
+_SECRET_PATTERN = re.compile(
+    r"(?P<key>(?:x-forwarded-)?authorization|api[-_]key)(?P<sep>['\"]?\s*[:=]\s*['\"]?)(?:Bearer\s+)?[^'\",\s}&]+",
+    re.IGNORECASE,
+)
+_REDACTED = "***"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def set_log_context(*, tool: Optional[str] = None, transaction_id: Optional[str] = None) -> None:
+    """Bind the tool name and/or transaction ID to records logged by the current task."""
+    if tool is not None:
+        _tool_var.set(tool)
+    if transaction_id is not None:
+        _transaction_id_var.set(transaction_id)
+
+
+def redact(message: str) -> str:
+    """Mask Authorization and api-key values in a rendered log message."""
+    return _SECRET_PATTERN.sub(lambda m: f"{m.group('key')}{m.group('sep')}{_REDACTED}", message)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the current tool and transaction ID on the emitting thread.
+
+    Context variables are not visible on the queue listener thread, so they must be
+    captured here, before the record is enqueued.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.tool = _tool_var.get()
+        record.transaction_id = _transaction_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Render records as single-line JSON with redacted messages."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        tool = getattr(record, "tool", None)
+        if tool:
+            payload["tool"] = tool
+        transaction_id = getattr(record, "transaction_id", None)
+        if transaction_id:
+            payload["transaction_id"] = transaction_id
+        if record.exc_info:
+            payload["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(payload, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Plain-text formatter that masks credentials in the rendered line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unrendered so message formatting also happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(configs: ServerConfigs) -> None:
+    """Route all logging through a queue so handler I/O runs off the event loop.
+
+    Records are formatted lazily: callers pass ``%s`` arguments and nothing is
+    rendered unless a handler accepts the record's level. File and stdout writes
+    happen on the ``QueueListener`` thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if configs.log_format == "json":
+        formatter: logging.Formatter = JSONFormatter()
+    else:
+        formatter = RedactingFormatter(
+            "%(asctime)s %(levelname)s %(name)s [tool=%(tool)s tid=%(transaction_id)s] %(message)s"
+        )
+
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if configs.log_file:
+        handlers.append(logging.FileHandler(configs.log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(configs.log_level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def payload_for_log(text: str, configs: ServerConfigs) -> str:
+    """Truncate a response body for debug logging; callers must gate on level first."""
+    limit = configs.log_payload_max_bytes
+    if len(text) > limit:
+        return f"{text[:limit]}...<{len(text) - limit} more chars>"
+    return text
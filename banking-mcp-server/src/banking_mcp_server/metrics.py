@@ -0,0 +1,102 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Named callables returning a JSON-serialisable snapshot of runtime metrics
+_metrics_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics_source(name: str, source: Callable[[], Dict[str, Any]]) -> None:
+    """Register a callable whose snapshot is reported under ``name`` by /metrics."""
+    _metrics_sources[name] = source
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Collect a snapshot from every registered metrics source."""
+    snapshot: Dict[str, Any] = {}
+    for name, source in _metrics_sources.items():
+        try:
+            snapshot[name] = source()
+        except Exception as e:
+            logger.error("Failed to collect metrics from source '%s'. Caused by: %s", name, e)
+            snapshot[name] = {"error": str(e)}
+    return snapshot
+
+
+def route_template(path: str) -> str:
+    """Collapse identifiers in a backend path, e.g. ``/accounts/123/transactions`` -> ``/accounts/{id}/transactions``.
+
+    Backend paths alternate collection and identifier segments, so every second
+    segment is treated as an identifier.
+    """
+    segments = [segment for segment in path.split("/") if segment]
+    return "/" + "/".join("{id}" if index % 2 else segment for index, segment in enumerate(segments))
+
+
+class RouteTransferStats:
+    """Per-route counters for bytes on the wire, decoded size and JSON decode time."""
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def _route(self, route: str) -> Dict[str, Any]:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "responses": 0,
+                "not_modified": 0,
+                "wire_bytes": 0,
+                "decoded_bytes": 0,
+                "decode_seconds": 0.0,
+                "http_versions": {},
+                "encodings": {},
+            }
+        return stats
+
+    def record_transfer(self, route: str, *, wire_bytes: int, decoded_bytes: int, status_code: int,
+                        http_version: str, encoding: str) -> None:
+        stats = self._route(route)
+        stats["responses"] += 1
+        if status_code == 304:
+            stats["not_modified"] += 1
+        stats["wire_bytes"] += wire_bytes
+        stats["decoded_bytes"] += decoded_bytes
+        stats["http_versions"][http_version] = stats["http_versions"].get(http_version, 0) + 1
+        stats["encodings"][encoding] = stats["encodings"].get(encoding, 0) + 1
+
+    def record_decode(self, route: str, seconds: float) -> None:
+        self._route(route)["decode_seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {}
+        for route, stats in self._routes.items():
+            responses = stats["responses"] or 1
+            snapshot[route] = {
+                **stats,
+                "http_versions": dict(stats["http_versions"]),
+                "encodings": dict(stats["encodings"]),
+                "decode_seconds": round(stats["decode_seconds"], 6),
+                "avg_wire_bytes": stats["wire_bytes"] // responses,
+                "avg_decode_ms": round(stats["decode_seconds"] * 1000 / responses, 3),
+                "compression_ratio": (
+                    round(stats["decoded_bytes"] / stats["wire_bytes"], 2) if stats["wire_bytes"] else None
+                ),
+            }
+        return snapshot
@@ -0,0 +1,542 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .client import HTTPClient
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DEAD = "dead"
+
+# Verdicts of a hold check on an entry that was never released
+DELIVER = "deliver"
+DEFER = "defer"
+DISCARD = "discard"
+
+# httpx status errors read "Client error '404 Not Found' for url ..."; these are not worth retrying,
+# except for timeouts and throttling, and a rejected service credential, which an operator can fix
+_CLIENT_ERROR = re.compile(r"Client error '(\d{3})")
+_RETRYABLE_CLIENT_ERRORS = {401, 403, 408, 425, 429}
+
+# Never stored with an entry; posts carry the outbox's service headers instead
+_CREDENTIAL_HEADERS = {"authorization", "proxy-authorization", "cookie", "api-key"}
+
+
+@dataclass
+class OutboxEntry:
+    """One queued backend write."""
+
+    id: int
+    idempotency_key: str
+    url: str
+    body: Dict[str, Any]
+    headers: Dict[str, str]
+    attempts: int
+    created_at: float
+    # Lease written by the claim; settling is conditional on it still being held
+    lease_until: float = 0.0
+    # Enqueued held and never released
+    held: bool = False
+
+
+def _is_permanent(error: str) -> bool:
+    match = _CLIENT_ERROR.search(error)
+    return match is not None and int(match.group(1)) not in _RETRYABLE_CLIENT_ERRORS
+
+
+class PaymentOutbox:
+    """Durable write-behind queue for recording completed payments at the backend.
+
+    ``enqueue`` commits the request to an SQLite (WAL) table and returns; the
+    caller never waits for the backend. Flush workers claim due entries in
+    batches under a lease, post each batch concurrently with an
+    ``Idempotency-Key`` header, and settle the outcomes in one transaction:
+    delivered entries are deleted, failed ones are retried with exponential
+    backoff and jitter, and entries that fail permanently (a 4xx other than
+    401/403/408/425/429) or run out of attempts are parked as dead for
+    inspection. Dead entries are logged and counted in :meth:`stats`.
+
+    Claims and settlements run in ``BEGIN IMMEDIATE`` transactions, so workers
+    sharing the database never claim the same entry while its lease holds. A
+    settlement only touches entries whose lease it still owns.
+
+    Entries are posted with the server's own ``service_headers``, never with the
+    end user's credentials: a user's token would be stored on disk and could
+    expire before a retry, turning a payment the user was told succeeded into
+    a dead entry. Pending entries survive restarts; those claimed by a
+    previous run are flushed once their lease runs out, since its worker may
+    still be alive.
+
+    An entry enqueued ``held`` whose :meth:`release` never came, e.g. because
+    the caller crashed halfway, is not posted blindly once its hold runs out:
+    the hold check set with :meth:`set_hold_check` decides whether to deliver
+    it, check again after another lease period, discard it, or park it as dead.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS outbox ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT NOT NULL UNIQUE, url TEXT NOT NULL, "
+        "body TEXT NOT NULL, headers TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL, "
+        "next_attempt_at REAL NOT NULL, lease_until REAL NOT NULL, created_at REAL NOT NULL, last_error TEXT, "
+        "held INTEGER NOT NULL DEFAULT 0)",
+        "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (state, next_attempt_at)",
+    )
+
+    def __init__(
+            self,
+            path: str,
+            http_client: HTTPClient,
+            *,
+            workers: int,
+            batch_size: int,
+            max_attempts: int,
+            retry_base: float,
+            retry_max: float,
+            lease: float,
+            poll_interval: float,
+            service_headers: Optional[Dict[str, str]] = None,
+    ):
+        self._path = Path(path)
+        self._http_client = http_client
+        self._service_headers = dict(service_headers or {})
+        self._workers = max(1, workers)
+        self._batch_size = max(1, batch_size)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self._lease = lease
+        self._poll_interval = poll_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._listeners: List[Callable[[OutboxEntry, Any], None]] = []
+        self._hold_check: Optional[Callable[[OutboxEntry], Awaitable[str]]] = None
+        # Entries this process has claimed and not settled yet: id -> lease_until
+        self._held: Dict[int, float] = {}
+        self._depth = 0
+        self._dead = 0
+        self._inflight = 0
+        self.enqueued = 0
+        self.delivered = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self.held_deferred = 0
+        self.held_discarded = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+        self.flush_seconds_max = 0.0
+        self.post_seconds = 0.0
+
+    def add_listener(self, callback: Callable[[OutboxEntry, Any], None]) -> None:
+        """Call ``callback(entry, result)`` on the event loop after each successful delivery."""
+        self._listeners.append(callback)
+
+    def set_hold_check(self, check: Callable[[OutboxEntry], Awaitable[str]]) -> None:
+        """Decide the fate of held entries that were never released.
+
+        ``check(entry)`` returns :data:`DELIVER`, :data:`DEFER` (ask again after
+        one lease period), :data:`DISCARD` or :data:`DEAD`; a check that raises
+        counts as :data:`DEFER`. Without a check such entries are delivered.
+        """
+        self._hold_check = check
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment-outbox")
+        await self._run(self._open)
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._flush_loop(), name=f"payment-outbox-{index}") for index in range(self._workers)
+        ]
+        logger.info("Payment outbox opened at %s: %d pending, %d dead", self._path, self._depth, self._dead)
+        if self._dead:
+            logger.error("Payment outbox holds %d dead entries that were never recorded at the backend", self._dead)
+
+    async def stop(self, drain_timeout: float = 0.0) -> None:
+        """Flush entries that are due, for up to ``drain_timeout`` seconds, then stop the workers.
+
+        Entries still pending, e.g. waiting out a retry backoff, stay in the
+        database and are flushed after the next start.
+        """
+        if self._executor is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=drain_timeout) if self._tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        if pending or self._depth:
+            logger.warning("Payment outbox stopped with %d entries pending", self._depth)
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def enqueue(self, idempotency_key: str, url: str, body: Dict[str, Any], headers: Dict[str, str],
+                      *, held: bool = False) -> bool:
+        """Durably queue a POST of ``body`` to ``url``.
+
+        Args:
+            headers: Extra request headers stored with the entry; credentials are
+                not accepted, posts authenticate with the service headers
+            held: Keep the entry back until :meth:`release`; if it is not released
+                within one lease period, e.g. because the caller died, the hold
+                check decides what happens to it. Until then it can be withdrawn
+
+        Returns:
+            False if an entry with this idempotency key is already queued or dead,
+            see :meth:`state`
+
+        Raises:
+            ValueError: If ``headers`` carries credentials
+        """
+        credentials = _CREDENTIAL_HEADERS.intersection(name.lower() for name in headers)
+        if credentials:
+            raise ValueError(f"Outbox entries must not store credentials: {', '.join(sorted(credentials))}")
+        due_at = time.time() + (self._lease if held else 0.0)
+        added = await self._run(
+            self._insert, idempotency_key, url, json.dumps(body), json.dumps(headers), due_at, held
+        )
+        if added:
+            self.enqueued += 1
+            self._depth += 1
+            if not held:
+                self._wake.set()
+        return added
+
+    async def state(self, idempotency_key: str) -> Optional[str]:
+        """Return ``"pending"`` or ``"dead"`` for a queued entry, or None if there is none."""
+        row = await self._run(self._fetch_state, idempotency_key)
+        return row[0] if row is not None else None
+
+    async def release(self, idempotency_key: str) -> None:
+        """Make a held entry due now."""
+        if await self._run(self._release, idempotency_key):
+            self._wake.set()
+
+    async def withdraw(self, idempotency_key: str) -> bool:
+        """Remove a queued entry that no worker has claimed yet.
+
+        Returns:
+            False if there is no such entry or it may already be in flight
+        """
+        withdrawn = await self._run(self._delete_unclaimed, idempotency_key)
+        if withdrawn:
+            self._depth -= 1
+        return withdrawn
+
+    async def _flush_loop(self) -> None:
+        while True:
+            # Cleared before claiming, so an enqueue racing an empty claim still wakes this worker
+            self._wake.clear()
+            try:
+                batch = await self._run(self._claim, self._batch_size)
+            except Exception as e:
+                # E.g. the database stayed locked by another worker past the busy timeout; an
+                # uncaught error would end this worker and leave the queue unflushed
+                if self._stopping:
+                    return
+                logger.warning("Payment outbox claim failed: %s", e)
+                await asyncio.sleep(self._poll_interval)
+                continue
+            if not batch:
+                if self._stopping:
+                    return
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # Claimed entries stay leased and are picked up again once the lease runs out
+                logger.warning("Payment outbox flush failed: %s", e)
+                await asyncio.sleep(self._poll_interval)
+
+    async def _flush(self, batch: List[OutboxEntry]) -> None:
+        unreleased = [entry for entry in batch if entry.held]
+        if unreleased and self._hold_check is not None:
+            verdicts = await asyncio.gather(*(self._check_hold(entry) for entry in unreleased))
+            stopped = [(entry, verdict) for entry, verdict in zip(unreleased, verdicts) if verdict != DELIVER]
+            if stopped:
+                deferred, discarded, dead = await self._run(self._resolve_held, stopped)
+                self.held_deferred += deferred
+                self.held_discarded += discarded
+                self.dead_lettered += dead
+                self._depth -= discarded + dead
+                self._dead += dead
+                stopped_ids = {entry.id for entry, _ in stopped}
+                batch = [entry for entry in batch if entry.id not in stopped_ids]
+            if not batch:
+                return
+
+        self.batches += 1
+        self._inflight += len(batch)
+        try:
+            results = await asyncio.gather(*(self._post(entry) for entry in batch))
+        finally:
+            self._inflight -= len(batch)
+
+        outcomes: List[Tuple[OutboxEntry, Optional[str]]] = []
+        for entry, (result, seconds) in zip(batch, results):
+            error = result["error"] if isinstance(result, dict) and set(result) == {"error"} else None
+            outcomes.append((entry, error))
+            self.post_seconds += seconds
+        delivered, retried, dead = await self._run(self._settle, outcomes)
+
+        now = time.time()
+        self.delivered += len(delivered)
+        self.retries += retried
+        self.dead_lettered += dead
+        self._depth -= len(delivered) + dead
+        self._dead += dead
+        for entry, (result, _) in zip(batch, results):
+            if entry.id not in delivered:
+                continue
+            latency = now - entry.created_at
+            self.flush_seconds += latency
+            self.flush_seconds_max = max(self.flush_seconds_max, latency)
+            for listener in self._listeners:
+                try:
+                    listener(entry, result)
+                except Exception as e:
+                    logger.warning("Payment outbox listener failed for %s: %s", entry.idempotency_key, e)
+
+    async def _check_hold(self, entry: OutboxEntry) -> str:
+        assert self._hold_check is not None
+        try:
+            verdict = await self._hold_check(entry)
+        except Exception as e:
+            logger.warning("Payment outbox hold check failed for %s: %s", entry.idempotency_key, e)
+            return DEFER
+        if verdict not in (DELIVER, DEFER, DISCARD, DEAD):
+            logger.warning("Payment outbox hold check returned %r for %s", verdict, entry.idempotency_key)
+            return DEFER
+        return verdict
+
+    async def _post(self, entry: OutboxEntry) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = await self._http_client.post(
+            url=entry.url,
+            json=entry.body,
+            headers={**entry.headers, **self._service_headers, "Idempotency-Key": entry.idempotency_key},
+        )
+        return result, time.perf_counter() - started
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            await self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # Entries hold payment details; keep the database private to the server's user
+        os.close(os.open(self._path, os.O_CREAT | os.O_RDWR, 0o600))
+        connection = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(outbox)")}
+        if "held" not in columns:
+            connection.execute("ALTER TABLE outbox ADD COLUMN held INTEGER NOT NULL DEFAULT 0")
+        # Earlier versions stored the user's request headers with each entry
+        connection.execute(
+            "UPDATE outbox SET headers = json_remove(headers, '$.Authorization', '$.\"api-key\"') "
+            "WHERE json_extract(headers, '$.Authorization') IS NOT NULL "
+            "OR json_extract(headers, '$.\"api-key\"') IS NOT NULL"
+        )
+        counts = dict(connection.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+        self._connection = connection
+        self._depth = counts.get(PENDING, 0)
+        self._dead = counts.get(DEAD, 0)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            # Hand back leases of posts cut short by the shutdown, so the next start retries them at once
+            if self._held:
+                with self._transaction() as connection:
+                    connection.executemany(
+                        "UPDATE outbox SET lease_until = 0 WHERE id = ? AND lease_until = ?", self._held.items()
+                    )
+                self._held.clear()
+            self._connection.close()
+            self._connection = None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a ``BEGIN IMMEDIATE`` transaction, holding the write lock from the start."""
+        connection = self._connection
+        assert connection is not None
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+    def _insert(self, idempotency_key: str, url: str, body: str, headers: str, due_at: float, held: bool) -> bool:
+        assert self._connection is not None
+        return self._connection.execute(
+            "INSERT OR IGNORE INTO outbox (idempotency_key, url, body, headers, state, attempts, "
+            "next_attempt_at, lease_until, created_at, held) VALUES (?, ?, ?, ?, ?, 0, ?, 0, ?, ?)",
+            (idempotency_key, url, body, headers, PENDING, due_at, time.time(), int(held)),
+        ).rowcount > 0
+
+    def _fetch_state(self, idempotency_key: str) -> Optional[Tuple[str]]:
+        assert self._connection is not None
+        return self._connection.execute(
+            "SELECT state FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+        ).fetchone()
+
+    def _release(self, idempotency_key: str) -> bool:
+        assert self._connection is not None
+        now = time.time()
+        return self._connection.execute(
+            "UPDATE outbox SET next_attempt_at = ?, held = 0 WHERE idempotency_key = ? AND state = ? AND held = 1",
+            (now, idempotency_key, PENDING),
+        ).rowcount > 0
+
+    def _delete_unclaimed(self, idempotency_key: str) -> bool:
+        assert self._connection is not None
+        return self._connection.execute(
+            "DELETE FROM outbox WHERE idempotency_key = ? AND state = ? AND lease_until <= ?",
+            (idempotency_key, PENDING, time.time()),
+        ).rowcount > 0
+
+    def _claim(self, limit: int) -> List[OutboxEntry]:
+        now = time.time()
+        lease_until = now + self._lease
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT id, idempotency_key, url, body, headers, attempts, created_at, held FROM outbox "
+                "WHERE state = ? AND next_attempt_at <= ? AND lease_until <= ? ORDER BY id LIMIT ?",
+                (PENDING, now, now, limit),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE outbox SET lease_until = ? WHERE id = ?", [(lease_until, row[0]) for row in rows]
+            )
+        self._held.update((row[0], lease_until) for row in rows)
+        return [
+            OutboxEntry(id=row[0], idempotency_key=row[1], url=row[2], body=json.loads(row[3]),
+                        headers=json.loads(row[4]), attempts=row[5], created_at=row[6], lease_until=lease_until,
+                        held=bool(row[7]))
+            for row in rows
+        ]
+
+    def _settle(self, outcomes: List[Tuple[OutboxEntry, Optional[str]]]) -> Tuple[set[int], int, int]:
+        """Record a batch's outcomes; returns ``(delivered ids, retried, dead)``.
+
+        A failure is only recorded while this worker's lease is intact; if the
+        lease ran out and the entry was claimed again, the new owner settles it.
+        """
+        now = time.time()
+        delivered: set[int] = set()
+        retried = dead = 0
+        with self._transaction() as connection:
+            for entry, error in outcomes:
+                self._held.pop(entry.id, None)
+                if error is None:
+                    if connection.execute("DELETE FROM outbox WHERE id = ?", (entry.id,)).rowcount:
+                        delivered.add(entry.id)
+                    continue
+                attempts = entry.attempts + 1
+                if attempts >= self._max_attempts or _is_permanent(error):
+                    if connection.execute(
+                            "UPDATE outbox SET state = ?, attempts = ?, lease_until = 0, last_error = ? "
+                            "WHERE id = ? AND lease_until = ?",
+                            (DEAD, attempts, error, entry.id, entry.lease_until),
+                    ).rowcount:
+                        logger.error("Payment %s could not be recorded after %d attempts: %s",
+                                     entry.idempotency_key, attempts, error)
+                        dead += 1
+                    continue
+                delay = min(self._retry_max, self._retry_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+                # A held entry that was posted passed its hold check; retries need not repeat it
+                retried += connection.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, lease_until = 0, last_error = ?, held = 0 "
+                    "WHERE id = ? AND lease_until = ?",
+                    (attempts, now + delay, error, entry.id, entry.lease_until),
+                ).rowcount
+        return delivered, retried, dead
+
+    def _resolve_held(self, verdicts: List[Tuple[OutboxEntry, str]]) -> Tuple[int, int, int]:
+        """Apply hold check verdicts other than delivery; returns ``(deferred, discarded, dead)``."""
+        now = time.time()
+        deferred = discarded = dead = 0
+        with self._transaction() as connection:
+            for entry, verdict in verdicts:
+                self._held.pop(entry.id, None)
+                if verdict == DEFER:
+                    deferred += connection.execute(
+                        "UPDATE outbox SET next_attempt_at = ?, lease_until = 0 WHERE id = ? AND lease_until = ?",
+                        (now + self._lease, entry.id, entry.lease_until),
+                    ).rowcount
+                elif verdict == DISCARD:
+                    if connection.execute(
+                            "DELETE FROM outbox WHERE id = ? AND lease_until = ?", (entry.id, entry.lease_until)
+                    ).rowcount:
+                        logger.warning("Payment %s was never released and is not posted", entry.idempotency_key)
+                        discarded += 1
+                elif connection.execute(
+                        "UPDATE outbox SET state = ?, lease_until = 0, last_error = ? WHERE id = ? AND lease_until = ?",
+                        (DEAD, "never released; rejected by the hold check", entry.id, entry.lease_until),
+                ).rowcount:
+                    logger.error("Payment %s was never released and is parked as dead", entry.idempotency_key)
+                    dead += 1
+        return deferred, discarded, dead
+
+    def stats(self) -> Dict[str, Any]:
+        delivered = self.delivered or 1
+        attempts = (self.delivered + self.retries + self.dead_lettered) or 1
+        return {
+            "depth": self._depth,
+            "inflight": self._inflight,
+            "dead": self._dead,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "held_deferred": self.held_deferred,
+            "held_discarded": self.held_discarded,
+            "batches": self.batches,
+            "flush_ms_avg": round(self.flush_seconds / delivered * 1000, 3),
+            "flush_ms_max": round(self.flush_seconds_max * 1000, 3),
+            "post_ms_avg": round(self.post_seconds / attempts * 1000, 3),
+        }
@@ -0,0 +1,250 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import heapq
+import logging
+import re
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Any, DefaultDict, Dict, FrozenSet, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Token prefixes longer than this are matched through trigrams instead
+_MAX_PREFIX = 10
+# Account number suffixes indexed for "ending in 4329" style lookups
+_SUFFIX_LENGTHS = range(3, 9)
+# Fuzzy matching: rarest trigrams always used as candidates, and the share of
+# payees above which a trigram is too common to generate candidates
+_FUZZY_MIN_GRAMS = 3
+_FUZZY_MIN_POSTINGS = 64
+_FUZZY_COMMON_FRACTION = 50
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D+")
+
+
+def normalize(text: Any) -> str:
+    """Lowercase, strip accents and collapse punctuation and whitespace to single spaces."""
+    text = str(text or "")
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _payee_key(payee: Dict[str, Any]) -> Tuple[str, str]:
+    return str(payee.get("AccountNumber") or ""), normalize(payee.get("Name"))
+
+
+class PayeeIndex:
+    """In-memory search index over one customer's payees.
+
+    Names are normalized and indexed exactly, by token prefix and by trigram;
+    account numbers are indexed by their trailing digits. Postings are sets of
+    slot numbers, so payees can be added and removed incrementally when the
+    payee list changes.
+    """
+
+    def __init__(self):
+        self._payees: List[Optional[Dict[str, Any]]] = []
+        self._names: List[str] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._free: List[int] = []
+        self._exact: DefaultDict[str, Set[int]] = defaultdict(set)
+        self._prefixes: DefaultDict[str, Set[int]] = defaultdict(set)
+        self._trigrams: DefaultDict[str, Set[int]] = defaultdict(set)
+        self._suffixes: DefaultDict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def update(self, payees: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Sync the index with a payee list. Returns the number of payees (added, removed)."""
+        current = {_payee_key(p): p for p in payees if isinstance(p, dict)}
+        removed = [key for key in self._slots if key not in current]
+        for key in removed:
+            self._remove(key)
+        added = 0
+        for key, payee in current.items():
+            slot = self._slots.get(key)
+            if slot is None:
+                self._add(key, payee)
+                added += 1
+            elif self._payees[slot] != payee:
+                # Same payee with changed details; re-index in case the email changed
+                self._remove(key)
+                self._add(key, payee)
+        return added, len(removed)
+
+    def _postings(self, slot: int, key: Tuple[str, str], payee: Dict[str, Any]):
+        account_number, name = key
+        yield self._exact, name
+        email = normalize(str(payee.get("Email") or "").split("@")[0])
+        for token in set(name.split() + email.split()):
+            for length in range(1, min(len(token), _MAX_PREFIX) + 1):
+                yield self._prefixes, token[:length]
+        for gram in self._grams[slot]:
+            yield self._trigrams, gram
+        digits = _NON_DIGIT.sub("", account_number)
+        for length in _SUFFIX_LENGTHS:
+            if len(digits) >= length:
+                yield self._suffixes, digits[-length:]
+
+    def _add(self, key: Tuple[str, str], payee: Dict[str, Any]) -> None:
+        grams = frozenset(trigrams(key[1]))
+        if self._free:
+            slot = self._free.pop()
+            self._payees[slot], self._names[slot], self._grams[slot] = payee, key[1], grams
+        else:
+            slot = len(self._payees)
+            self._payees.append(payee)
+            self._names.append(key[1])
+            self._grams.append(grams)
+        self._slots[key] = slot
+        for postings, term in self._postings(slot, key, payee):
+            postings[term].add(slot)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        slot = self._slots.pop(key)
+        for postings, term in self._postings(slot, key, self._payees[slot]):
+            bucket = postings.get(term)
+            if bucket is not None:
+                bucket.discard(slot)
+                if not bucket:
+                    del postings[term]
+        self._payees[slot] = None
+        self._grams[slot] = frozenset()
+        self._free.append(slot)
+
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Return up to ``top_k`` payees ranked by match score in [0, 1].
+
+        Scores: 1.0 for an exact name or full account number, 0.95 for an
+        account-number suffix, 0.8-0.9 when every query word prefixes a name word
+        (higher the more of the name the query covers), otherwise the trigram
+        Jaccard similarity of the names.
+        """
+        top_k = max(1, top_k)
+        scores: Dict[int, float] = {}
+
+        def offer(slot: int, score: float) -> None:
+            if score > scores.get(slot, 0.0):
+                scores[slot] = score
+
+        digits = _NON_DIGIT.sub("", query or "")
+        if len(digits) >= _SUFFIX_LENGTHS.start:
+            for slot in self._suffixes.get(digits[-_SUFFIX_LENGTHS.stop + 1:], ()):
+                account = _NON_DIGIT.sub("", str(self._payees[slot].get("AccountNumber") or ""))
+                if account.endswith(digits):
+                    offer(slot, 1.0 if account == digits else 0.95)
+
+        words = [w for w in normalize(query).split() if not w.isdigit()]
+        if words:
+            name_query = " ".join(words)
+            for slot in self._exact.get(name_query, ()):
+                offer(slot, 1.0)
+
+            # Intersect the prefix posting lists of every query word, smallest first
+            buckets = sorted((self._prefixes.get(w[:_MAX_PREFIX], _EMPTY) for w in words), key=len)
+            matched = buckets[0].intersection(*buckets[1:]) if len(buckets) > 1 else buckets[0]
+            if any(len(w) > _MAX_PREFIX for w in words):
+                matched = [
+                    slot for slot in matched
+                    if all(any(t.startswith(w) for t in self._names[slot].split()) for w in words)
+                ]
+            # The prefix score only grows as names get shorter, so just the shortest
+            # top_k names can make the final ranking
+            names = self._names
+            for slot in heapq.nsmallest(top_k, matched, key=lambda slot: (len(names[slot]), names[slot])):
+                offer(slot, 0.8 + 0.1 * min(1.0, len(name_query) / len(names[slot])))
+
+            # Fuzzy fallback when exact and prefix matches are not enough
+            if len(scores) < top_k:
+                self._fuzzy(name_query, offer)
+
+        ranked = heapq.nsmallest(
+            top_k,
+            ((score, slot) for slot, score in scores.items() if score >= min_score),
+            key=lambda item: (-item[0], self._names[item[1]]),
+        )
+        return [{"score": round(score, 3), **self._payees[slot]} for score, slot in ranked]
+
+    def _fuzzy(self, name_query: str, offer) -> None:
+        """Offer trigram Jaccard scores, generating candidates from the query's rarer trigrams."""
+        query_grams = trigrams(name_query)
+        postings = sorted((self._trigrams.get(gram, _EMPTY) for gram in query_grams), key=len)
+        # Trigrams shared by a large share of payees carry little signal; skip them
+        # once a few rare ones have been used
+        cap = max(_FUZZY_MIN_POSTINGS, len(self._slots) // _FUZZY_COMMON_FRACTION)
+        candidates: Set[int] = set()
+        for index, bucket in enumerate(postings):
+            if index >= _FUZZY_MIN_GRAMS and len(bucket) > cap:
+                break
+            candidates.update(bucket)
+        size = len(query_grams)
+        for slot in candidates:
+            grams = self._grams[slot]
+            shared = len(query_grams & grams)
+            offer(slot, shared / (size + len(grams) - shared))
+
+
+class PayeeDirectory:
+    """Per-identity payee indexes with LRU eviction.
+
+    An index is re-synced only when the ``/payees`` payload object changes, so
+    lookups against a cached backend response go straight to the index.
+    """
+
+    def __init__(self, max_identities: int):
+        self._max_identities = max_identities
+        # The source list is held by reference to detect a changed payload by identity
+        self._entries: "OrderedDict[str, Tuple[List[Dict[str, Any]], PayeeIndex]]" = OrderedDict()
+        self.syncs = 0
+        self.reuses = 0
+
+    def index(self, identity: str, payees: List[Dict[str, Any]]) -> PayeeIndex:
+        entry = self._entries.get(identity)
+        if entry is not None and entry[0] is payees:
+            self._entries.move_to_end(identity)
+            self.reuses += 1
+            return entry[1]
+
+        index = entry[1] if entry is not None else PayeeIndex()
+        added, removed = index.update(payees)
+        self.syncs += 1
+        logger.debug("Payee index synced: %d added, %d removed, %d total", added, removed, len(index))
+        self._entries[identity] = (payees, index)
+        self._entries.move_to_end(identity)
+        while len(self._entries) > self._max_identities:
+            self._entries.popitem(last=False)
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "identities": len(self._entries),
+            "payees": sum(len(index) for _, index in self._entries.values()),
+            "syncs": self.syncs,
+            "reuses": self.reuses,
+        }
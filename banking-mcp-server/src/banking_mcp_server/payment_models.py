@@ -0,0 +1,44 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class Party(BaseModel):
+    """Represents sender or beneficiary details."""
+
+    account_id: str = Field(default="", description="Account ID of the party")
+    name: str = Field(default="", description="Name of the party")
+    bank_name: str = Field(default="", description="Name of the bank where the party holds the account")
+
+
+class PaymentRequest(BaseModel):
+    """Represents initial payment request details."""
+
+    currency: str = Field(description="Currency of the payment amount (e.g., USD, EUR)")
+    amount: float = Field(description="Payment amount")
+    sender: Party = Field(description="Sender party details")
+    beneficiary: Party = Field(description="Beneficiary party details")
+    remarks: str = Field(description="Payment remarks or reference")
+
+
+class PaymentContext(PaymentRequest):
+    """Represents the payment context stored in cache."""
+
+    transaction_id: Optional[str] = None
+    otp: Optional[str] = None
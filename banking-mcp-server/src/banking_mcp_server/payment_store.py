@@ -0,0 +1,516 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import heapq
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from .config import ServerConfigs
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+INITIATED = "initiated"
+AUTHORIZED = "authorized"
+DECLINED = "declined"
+COMPLETED = "completed"
+STATES = (INITIATED, AUTHORIZED, DECLINED, COMPLETED)
+
+# The payment flow as a state machine. Re-authorizing replaces the OTP;
+# DECLINED and COMPLETED are terminal.
+TRANSITIONS: Dict[str, frozenset] = {
+    INITIATED: frozenset({AUTHORIZED, DECLINED}),
+    AUTHORIZED: frozenset({AUTHORIZED, DECLINED, COMPLETED}),
+    DECLINED: frozenset(),
+    COMPLETED: frozenset(),
+}
+
+
+def check_transition(expected: Iterable[str], state: str) -> Tuple[str, ...]:
+    """Validate a requested move against :data:`TRANSITIONS` and return ``expected`` as a tuple.
+
+    Raises:
+        ValueError: If ``state`` cannot be reached from one of the ``expected`` states
+    """
+    expected = tuple(expected)
+    for source in expected:
+        if state not in TRANSITIONS.get(source, ()):
+            raise ValueError(f"Invalid payment state transition: {source} -> {state}")
+    return expected
+
+
+class PaymentRecord:
+    """Compact state of one payment in the initiate → authorize → verify flow."""
+
+    __slots__ = ("transaction_id", "state", "currency", "amount", "sender_account_id", "sender_name",
+                 "sender_bank_name", "beneficiary_account_id", "beneficiary_name", "beneficiary_bank_name",
+                 "remarks", "otp", "completed_at", "result", "expires_at")
+
+    def __init__(
+            self,
+            transaction_id: str,
+            *,
+            currency: str,
+            amount: float,
+            sender_account_id: str = "",
+            sender_name: str = "",
+            sender_bank_name: str = "",
+            beneficiary_account_id: str = "",
+            beneficiary_name: str = "",
+            beneficiary_bank_name: str = "",
+            remarks: str = "",
+            otp: Optional[str] = None,
+            completed_at: Optional[float] = None,
+            result: Optional[str] = None,
+            state: str = INITIATED,
+    ):
+        self.transaction_id = transaction_id
+        self.state = state
+        self.currency = currency
+        self.amount = amount
+        self.sender_account_id = sender_account_id
+        self.sender_name = sender_name
+        self.sender_bank_name = sender_bank_name
+        self.beneficiary_account_id = beneficiary_account_id
+        self.beneficiary_name = beneficiary_name
+        self.beneficiary_bank_name = beneficiary_bank_name
+        self.remarks = remarks
+        self.otp = otp
+        # Wall-clock completion time; the receipt shows it whenever it is rendered
+        self.completed_at = completed_at
+        # Tool response of the completing call, returned again to repeated calls
+        self.result = result
+        self.expires_at = 0.0
+
+    @classmethod
+    def from_dict(cls, payment: Dict[str, Any], *, state: str = INITIATED) -> "PaymentRecord":
+        """Build a record from a payment payload shaped like ``PaymentContext.model_dump()``."""
+        sender = payment.get("sender") or {}
+        beneficiary = payment.get("beneficiary") or {}
+        return cls(
+            payment["transaction_id"],
+            currency=payment.get("currency", ""),
+            amount=payment.get("amount", 0.0),
+            sender_account_id=sender.get("account_id", ""),
+            sender_name=sender.get("name", ""),
+            sender_bank_name=sender.get("bank_name", ""),
+            beneficiary_account_id=beneficiary.get("account_id", ""),
+            beneficiary_name=beneficiary.get("name", ""),
+            beneficiary_bank_name=beneficiary.get("bank_name", ""),
+            remarks=payment.get("remarks", ""),
+            otp=payment.get("otp"),
+            completed_at=payment.get("completed_at"),
+            result=payment.get("result"),
+            state=state,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Payment payload shaped like ``PaymentContext.model_dump()``."""
+        return {
+            "currency": self.currency,
+            "amount": self.amount,
+            "sender": {"account_id": self.sender_account_id, "name": self.sender_name,
+                       "bank_name": self.sender_bank_name},
+            "beneficiary": {"account_id": self.beneficiary_account_id, "name": self.beneficiary_name,
+                            "bank_name": self.beneficiary_bank_name},
+            "remarks": self.remarks,
+            "transaction_id": self.transaction_id,
+            "otp": self.otp,
+            "completed_at": self.completed_at,
+            "result": self.result,
+        }
+
+
+class PaymentStore(ABC):
+    """Payment state backend used by the payment tools.
+
+    Implementations keep one record per transaction ID with a state-specific
+    TTL. ``transition`` is an atomic compare-and-set on the state, so when
+    several workers share a backend only one of them can move a payment on.
+    """
+
+    async def start(self) -> None:
+        """Open resources and start background expiry."""
+
+    async def stop(self) -> None:
+        """Stop background expiry and release resources."""
+
+    @abstractmethod
+    async def get(self, transaction_id: str) -> Optional[PaymentRecord]:
+        """Return the live record for a transaction, or None if unknown or expired."""
+
+    @abstractmethod
+    async def put(self, record: PaymentRecord) -> None:
+        """Insert or replace a record, starting the TTL of its current state."""
+
+    @abstractmethod
+    async def transition(
+            self, transaction_id: str, expected: Iterable[str], state: str, **changes: Any
+    ) -> Optional[PaymentRecord]:
+        """Atomically move a record from one of the ``expected`` states to ``state``.
+
+        Field ``changes`` are applied in the same step and the TTL restarts for
+        the new state. Moves outside :data:`TRANSITIONS` raise ``ValueError``.
+
+        Returns:
+            The updated record, or None if the record is missing, expired or not
+            in an expected state.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for the metrics endpoint."""
+
+
+class MemoryPaymentStore(PaymentStore):
+    """Bounded in-process payment state store.
+
+    Expired records are dropped lazily on read and by a background sweep driven
+    from an expiry heap; once ``capacity`` is reached the least recently used
+    record is evicted. State is private to the worker process.
+    """
+
+    def __init__(self, *, capacity: int, ttls: Dict[str, float], sweep_interval: float):
+        self._capacity = capacity
+        self._ttls = ttls
+        self._sweep_interval = sweep_interval
+        self._records: "OrderedDict[str, PaymentRecord]" = OrderedDict()
+        # (expires_at, transaction_id); superseded items are skipped when popped
+        self._expiry: List[Tuple[float, str]] = []
+        self._states: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def start(self) -> None:
+        if self._task is None and self._sweep_interval > 0:
+            self._task = asyncio.create_task(self._sweep_loop(), name="payment-store-sweep")
+
+    async def stop(self) -> None:
+        await _cancel(self._task)
+        self._task = None
+
+    async def get(self, transaction_id: str) -> Optional[PaymentRecord]:
+        return self._get(transaction_id)
+
+    async def put(self, record: PaymentRecord) -> None:
+        self._drop(record.transaction_id)
+        self._records[record.transaction_id] = record
+        self._states[record.state] += 1
+        self._touch(record)
+        while len(self._records) > self._capacity:
+            _, evicted = self._records.popitem(last=False)
+            self._states[evicted.state] -= 1
+            self.evictions += 1
+            logger.debug("Evicted payment state for %s at capacity", evicted.transaction_id)
+
+    async def transition(
+            self, transaction_id: str, expected: Iterable[str], state: str, **changes: Any
+    ) -> Optional[PaymentRecord]:
+        expected = check_transition(expected, state)
+        # Runs without awaiting, so it is atomic with respect to other tasks
+        record = self._get(transaction_id)
+        if record is None or record.state not in expected:
+            return None
+        for name, value in changes.items():
+            setattr(record, name, value)
+        self._states[record.state] -= 1
+        record.state = state
+        self._states[state] += 1
+        self._touch(record)
+        return record
+
+    def sweep(self) -> int:
+        """Drop every expired record. Returns the number removed."""
+        now = time.monotonic()
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, transaction_id = heapq.heappop(self._expiry)
+            record = self._records.get(transaction_id)
+            # Skip heap items superseded by a later write
+            if record is not None and record.expires_at == expires_at:
+                self._drop(transaction_id)
+                removed += 1
+        self.expirations += removed
+        # Superseded items for live records can pile up if records are rewritten
+        # faster than they expire; rebuild the heap from the live records then
+        if len(self._expiry) > 4 * len(self._records) + 1024:
+            self._expiry = [(r.expires_at, r.transaction_id) for r in self._records.values()]
+            heapq.heapify(self._expiry)
+        return removed
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.debug("Expired %d payment states", removed)
+
+    def _get(self, transaction_id: str) -> Optional[PaymentRecord]:
+        record = self._records.get(transaction_id)
+        if record is None:
+            return None
+        if record.expires_at <= time.monotonic():
+            self._drop(transaction_id)
+            self.expirations += 1
+            return None
+        self._records.move_to_end(transaction_id)
+        return record
+
+    def _touch(self, record: PaymentRecord) -> None:
+        record.expires_at = time.monotonic() + self._ttls.get(record.state, 0.0)
+        heapq.heappush(self._expiry, (record.expires_at, record.transaction_id))
+
+    def _drop(self, transaction_id: str) -> bool:
+        record = self._records.pop(transaction_id, None)
+        if record is None:
+            return False
+        self._states[record.state] -= 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._records),
+            "capacity": self._capacity,
+            "states": {state: self._states[state] for state in STATES},
+            "expiry_queue": len(self._expiry),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLitePaymentStore(PaymentStore):
+    """Payment state store in a local SQLite database in WAL mode.
+
+    Every worker process opens the same file, so the payment flow works no
+    matter which worker serves each step. Transitions run in ``BEGIN IMMEDIATE``
+    transactions, which makes the compare-and-set atomic across processes. All
+    statements run on one dedicated thread per process, keeping the event loop
+    free while SQLite waits on a lock. Expiry times are wall-clock so they are
+    comparable between processes.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS payments ("
+        "transaction_id TEXT PRIMARY KEY, state TEXT NOT NULL, data TEXT NOT NULL, "
+        "expires_at REAL NOT NULL, updated_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS payments_expires_at ON payments (expires_at)",
+    )
+
+    def __init__(self, path: str, *, capacity: int, ttls: Dict[str, float], sweep_interval: float,
+                 busy_timeout: float = 5.0):
+        self._path = Path(path)
+        self._capacity = capacity
+        self._ttls = ttls
+        self._sweep_interval = sweep_interval
+        self._busy_timeout = busy_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._states: Dict[str, int] = {}
+        self._size = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.conflicts = 0
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment-store")
+        await self._run(self._open)
+        await self._run(self.sweep)
+        if self._sweep_interval > 0:
+            self._task = asyncio.create_task(self._sweep_loop(), name="payment-store-sweep")
+        logger.info("SQLite payment store opened at %s", self._path)
+
+    async def stop(self) -> None:
+        await _cancel(self._task)
+        self._task = None
+        if self._executor is not None:
+            await self._run(self._close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def get(self, transaction_id: str) -> Optional[PaymentRecord]:
+        return await self._run(self._select, transaction_id)
+
+    async def put(self, record: PaymentRecord) -> None:
+        await self._run(self._upsert, record)
+
+    async def transition(
+            self, transaction_id: str, expected: Iterable[str], state: str, **changes: Any
+    ) -> Optional[PaymentRecord]:
+        return await self._run(self._compare_and_set, transaction_id, check_transition(expected, state), state,
+                               changes)
+
+    def sweep(self) -> int:
+        """Delete expired records and trim to capacity. Runs on the store thread."""
+        connection = self._require_connection()
+        now = time.time()
+        with connection:
+            expired = connection.execute("DELETE FROM payments WHERE expires_at <= ?", (now,)).rowcount
+            size = connection.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+            evicted = 0
+            if size > self._capacity:
+                evicted = connection.execute(
+                    "DELETE FROM payments WHERE transaction_id IN "
+                    "(SELECT transaction_id FROM payments ORDER BY updated_at LIMIT ?)",
+                    (size - self._capacity,),
+                ).rowcount
+            self._states = dict(connection.execute("SELECT state, COUNT(*) FROM payments GROUP BY state").fetchall())
+        self._size = size - evicted
+        self.expirations += expired
+        self.evictions += evicted
+        return expired + evicted
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                removed = await self._run(self.sweep)
+            except sqlite3.Error as e:
+                logger.warning("Payment store sweep failed: %s", e)
+                continue
+            if removed:
+                logger.debug("Expired or evicted %d payment states", removed)
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            await self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly where needed
+        connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+        self._connection = connection
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _require_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._open()
+        assert self._connection is not None
+        return self._connection
+
+    def _select(self, transaction_id: str) -> Optional[PaymentRecord]:
+        row = self._require_connection().execute(
+            "SELECT state, data, expires_at FROM payments WHERE transaction_id = ? AND expires_at > ?",
+            (transaction_id, time.time()),
+        ).fetchone()
+        return _record_from_row(row) if row is not None else None
+
+    def _upsert(self, record: PaymentRecord) -> None:
+        now = time.time()
+        record.expires_at = now + self._ttls.get(record.state, 0.0)
+        self._require_connection().execute(
+            "INSERT OR REPLACE INTO payments VALUES (?, ?, ?, ?, ?)",
+            (record.transaction_id, record.state, json.dumps(record.as_dict()), record.expires_at, now),
+        )
+
+    def _compare_and_set(
+            self, transaction_id: str, expected: Tuple[str, ...], state: str, changes: Dict[str, Any]
+    ) -> Optional[PaymentRecord]:
+        connection = self._require_connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT state, data, expires_at FROM payments WHERE transaction_id = ? AND expires_at > ?",
+                (transaction_id, now),
+            ).fetchone()
+            if row is None or row[0] not in expected:
+                connection.execute("ROLLBACK")
+                if row is not None:
+                    self.conflicts += 1
+                return None
+            record = _record_from_row(row)
+            for name, value in changes.items():
+                setattr(record, name, value)
+            record.state = state
+            record.expires_at = now + self._ttls.get(state, 0.0)
+            connection.execute(
+                "UPDATE payments SET state = ?, data = ?, expires_at = ?, updated_at = ? WHERE transaction_id = ?",
+                (state, json.dumps(record.as_dict()), record.expires_at, now, transaction_id),
+            )
+            connection.execute("COMMIT")
+            return record
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        # Sizes are refreshed by the sweep so reading metrics never touches the database
+        return {
+            "backend": "sqlite",
+            "size": self._size,
+            "capacity": self._capacity,
+            "states": {state: self._states.get(state, 0) for state in STATES},
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "conflicts": self.conflicts,
+        }
+
+
+def _record_from_row(row: Tuple[str, str, float]) -> PaymentRecord:
+    state, data, expires_at = row
+    record = PaymentRecord.from_dict(json.loads(data), state=state)
+    record.expires_at = expires_at
+    return record
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def create_payment_store(configs: ServerConfigs) -> PaymentStore:
+    """Build the payment state backend selected by ``payment_store_backend``."""
+    options = dict(
+        capacity=configs.payment_store_capacity,
+        ttls=configs.payment_state_ttls,
+        sweep_interval=configs.payment_sweep_interval,
+    )
+    if configs.payment_store_backend == "sqlite":
+        return SQLitePaymentStore(configs.payment_store_path, **options)
+    return MemoryPaymentStore(**options)
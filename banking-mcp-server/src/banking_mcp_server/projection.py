@@ -0,0 +1,306 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import copy
+import heapq
+import json
+import logging
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+AccountView = Literal["compact", "balances", "transactions", "full"]
+ProfileView = Literal["compact", "full"]
+ProductView = Literal["compact", "full"]
+
+TRUNCATION_KEY = "_truncated"
+
+
+def _size(data: Any) -> int:
+    return len(json.dumps(data, separators=(",", ":"), default=str))
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _money(amount: Any) -> Optional[float]:
+    """Flatten an Open Banking ``{"Amount": "1.00", "Currency": "USD"}`` object to a number."""
+    if isinstance(amount, dict):
+        return _number(amount.get("Amount"))
+    return _number(amount)
+
+
+def _prune(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if value not in (None, "", [], {})}
+
+
+def project_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a transaction to id, date, signed amount and description."""
+    amount = _money(transaction.get("Amount"))
+    if amount is not None and transaction.get("CreditDebitIndicator") == "Debit":
+        amount = -amount
+    merchant = (transaction.get("MerchantDetails") or {}).get("MerchantName")
+    return _prune({
+        "id": transaction.get("TransactionId"),
+        "date": str(transaction.get("BookingDateTime") or "")[:10],
+        "amount": amount,
+        "desc": merchant or transaction.get("TransactionInformation"),
+    })
+
+
+def _latest(transactions: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    rows = [t for t in transactions if isinstance(t, dict)]
+    if count <= 0:
+        return []
+    return heapq.nlargest(count, rows, key=lambda t: str(t.get("BookingDateTime") or ""))
+
+
+def _balances(account: Dict[str, Any]) -> Dict[str, float]:
+    # The per-balance AccountId and Currency repeat the parent account's and are dropped
+    return {
+        str(balance.get("Type")): _money(balance.get("Amount"))
+        for balance in account.get("Balance") or []
+        if isinstance(balance, dict)
+    }
+
+
+def project_account(account: Dict[str, Any], view: AccountView, last_n: int) -> Dict[str, Any]:
+    """Project one account according to ``view``; ``last_n`` bounds nested transactions."""
+    projected: Dict[str, Any] = {
+        "id": account.get("AccountId"),
+        "name": account.get("Nickname"),
+        "currency": account.get("Currency"),
+    }
+    balances = _balances(account)
+    if view == "balances":
+        projected["balances"] = balances
+        return _prune(projected)
+
+    transactions = account.get("Transactions") or []
+    if view == "transactions":
+        projected["transactions"] = [project_transaction(t) for t in _latest(transactions, last_n)]
+        projected["transaction_count"] = len(transactions)
+        return _prune(projected)
+
+    projected["type"] = account.get("AccountSubType")
+    projected["status"] = account.get("Status")
+    projected["balance"] = balances.get("InterimAvailable", next(iter(balances.values()), None))
+    projected["recent"] = [project_transaction(t) for t in _latest(transactions, last_n)]
+    projected["transaction_count"] = len(transactions)
+    return _prune(projected)
+
+
+def project_accounts_payload(payload: Any, view: AccountView, last_n: int) -> Any:
+    """Project an ``/accounts``, ``/accounts/{id}`` or ``/accounts/{id}/transactions`` payload."""
+    if view == "full":
+        return payload
+    if isinstance(payload, list):
+        return [project_account(a, view, last_n) if isinstance(a, dict) else a for a in payload]
+    if isinstance(payload, dict):
+        if isinstance(payload.get("transactions"), list):
+            pagination = payload.get("pagination") or {}
+            return _prune({
+                "id": payload.get("accountId"),
+                "name": payload.get("accountName"),
+                "transactions": [project_transaction(t) for t in payload["transactions"] if isinstance(t, dict)],
+                "total": pagination.get("total"),
+            })
+        if "AccountId" in payload:
+            return project_account(payload, view, last_n)
+    return payload
+
+
+def project_profile(payload: Any, view: ProfileView) -> Any:
+    """Project the ``/me`` profile to identity, contact and financial essentials."""
+    if view == "full" or not isinstance(payload, dict):
+        return payload
+    personal = payload.get("personalInfo") or {}
+    contact = payload.get("contactInfo") or {}
+    employment = payload.get("employment") or {}
+    financial = payload.get("financialProfile") or {}
+    summary = payload.get("summary") or {}
+    relationship = payload.get("bankingRelationship") or {}
+    name = " ".join(filter(None, [personal.get("firstName"), personal.get("lastName")]))
+    return _prune({
+        "customer_id": personal.get("customerId"),
+        "name": name,
+        "preferred_name": personal.get("preferredName"),
+        "date_of_birth": personal.get("dateOfBirth"),
+        "email": contact.get("primaryEmail"),
+        "phone": contact.get("primaryPhone"),
+        "employment": _prune({
+            "status": employment.get("status"),
+            "employer": employment.get("employer"),
+            "annual_income": employment.get("annualIncome"),
+        }),
+        "credit_score": financial.get("creditScore"),
+        "monthly_expenses": financial.get("monthlyExpenses"),
+        "segment": relationship.get("customerSegment"),
+        "finances": _prune({
+            "liquid_funds": summary.get("liquidFunds"),
+            "investments": summary.get("totalInvestments"),
+            "liabilities": summary.get("totalLiabilities"),
+            "net_position": summary.get("netPosition"),
+        }),
+    })
+
+
+def _project_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    rate = product.get("InterestRate") or {}
+    rate_range = product.get("LoanInterestRate") or {}
+    loan = product.get("LoanDetails") or {}
+    eligibility = product.get("Eligibility") or {}
+    fees = {
+        str(fee.get("FeeType")): _number(fee.get("Amount"))
+        for fee in product.get("Fees") or []
+        if isinstance(fee, dict) and _number(fee.get("Amount"))
+    }
+    return _prune({
+        "id": product.get("ProductId"),
+        "name": product.get("ProductName"),
+        "type": product.get("ProductType"),
+        "rate": _number(rate.get("Rate")),
+        "rate_type": rate.get("RateType"),
+        "rate_range": [_number(rate_range.get("MinRate")), _number(rate_range.get("MaxRate"))] if rate_range else None,
+        "amount_range": [loan.get("MinAmount"), loan.get("MaxAmount")] if loan else None,
+        "term_months": [loan.get("MinTerm"), loan.get("MaxTerm")] if loan else None,
+        "min_income": eligibility.get("MinIncome"),
+        "min_credit_score": eligibility.get("MinCreditScore"),
+        "fees": fees,
+    })
+
+
+def project_products(payload: Any, view: ProductView) -> Any:
+    """Project the product catalog to rates, limits, terms and eligibility."""
+    if view == "full":
+        return payload
+    if isinstance(payload, list):
+        return [_project_product(p) if isinstance(p, dict) else p for p in payload]
+    if isinstance(payload, dict) and "ProductId" in payload:
+        return _project_product(payload)
+    return payload
+
+
+def _largest_list(data: Any) -> Optional[List[Any]]:
+    """Find the longest list in a projected payload (by serialized size)."""
+    best: Optional[List[Any]] = None
+    best_size = 0
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            trimmable = [item for item in node if not (isinstance(item, dict) and TRUNCATION_KEY in item)]
+            if len(trimmable) > 1:
+                size = _size(node)
+                if size > best_size:
+                    best, best_size = node, size
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+    return best
+
+
+def enforce_budget(data: Any, max_bytes: int) -> tuple[Any, int]:
+    """Trim the largest lists until the serialized payload fits ``max_bytes``.
+
+    Trimmed lists end with an explicit ``{"_truncated": <omitted count>}`` marker so
+    the model knows the result is partial. ``data`` is never modified: projections
+    share lists with the (possibly cached) backend payload, so an oversized payload
+    is copied once and the copy is trimmed.
+
+    Returns:
+        Tuple of (payload, number of items omitted).
+    """
+    omitted_total = 0
+    if max_bytes <= 0 or _size(data) <= max_bytes:
+        return data, 0
+    data = copy.deepcopy(data)
+    while _size(data) > max_bytes:
+        target = _largest_list(data)
+        if target is None:
+            break
+        items = [item for item in target if not (isinstance(item, dict) and TRUNCATION_KEY in item)]
+        previously_omitted = sum(item[TRUNCATION_KEY] for item in target
+                                 if isinstance(item, dict) and TRUNCATION_KEY in item)
+        overflow = _size(data) - max_bytes
+        # Drop roughly enough items to cover the overflow, at least one, keeping one
+        per_item = max(1, _size(items) // len(items))
+        drop = min(len(items) - 1, max(1, -(-overflow // per_item)))
+        target[:] = items[:len(items) - drop] + [{TRUNCATION_KEY: previously_omitted + drop}]
+        omitted_total += drop
+    return data, omitted_total
+
+
+class ProjectionStats:
+    """Per-tool counters of raw versus projected response bytes."""
+
+    def __init__(self) -> None:
+        self._tools: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tool: str, raw_bytes: int, projected_bytes: int, omitted: int) -> None:
+        stats = self._tools.setdefault(
+            tool, {"calls": 0, "raw_bytes": 0, "projected_bytes": 0, "bytes_saved": 0, "items_truncated": 0}
+        )
+        stats["calls"] += 1
+        stats["raw_bytes"] += raw_bytes
+        stats["projected_bytes"] += projected_bytes
+        stats["bytes_saved"] += max(0, raw_bytes - projected_bytes)
+        stats["items_truncated"] += omitted
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {tool: dict(stats) for tool, stats in self._tools.items()}
+
+
+projection_stats: ProjectionStats = ProjectionStats()
+
+
+def shape_response(
+        tool: str,
+        payload: Any,
+        project: Callable[[Any], Any],
+        *,
+        view: str,
+        max_bytes: int,
+) -> Any:
+    """Project a tool payload, enforce the byte budget and report the bytes saved.
+
+    Error payloads and the ``full`` view are returned unchanged. Otherwise the
+    result is ``{"data": <projected>, "meta": {...}}`` where ``meta`` carries the
+    view, raw and projected sizes, bytes saved and any truncation count.
+    """
+    if view == "full" or (isinstance(payload, dict) and "error" in payload):
+        return payload
+
+    raw_bytes = _size(payload)
+    projected = project(payload)
+    projected, omitted = enforce_budget(projected, max_bytes)
+    projected_bytes = _size(projected)
+    projection_stats.record(tool, raw_bytes, projected_bytes, omitted)
+    logger.debug("Projected %s response (%s): %d -> %d bytes", tool, view, raw_bytes, projected_bytes)
+
+    meta: Dict[str, Any] = {
+        "view": view,
+        "raw_bytes": raw_bytes,
+        "bytes": projected_bytes,
+        "bytes_saved": max(0, raw_bytes - projected_bytes),
+    }
+    if omitted:
+        meta["truncated_items"] = omitted
+    return {"data": projected, "meta": meta}
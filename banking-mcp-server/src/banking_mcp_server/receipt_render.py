@@ -0,0 +1,338 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import logging
+import re
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from typing import Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from .payment_models import PaymentContext
+
+logger = logging.getLogger(__name__)
+
+
+# Values written into the receipt, in table order
+RECEIPT_FIELDS: tuple[str, ...] = (
+    "transaction_id",
+    "issued_at",
+    "sender_name",
+    "sender_bank",
+    "sender_account",
+    "beneficiary_name",
+    "beneficiary_bank",
+    "beneficiary_account",
+    "amount",
+    "remarks",
+)
+
+# Literal string escapes for PDF content; bytes outside printable ASCII become octal escapes
+_PDF_ESCAPES: dict[int, str] = {
+    **{code: "\\%03o" % code for code in (*range(32), *range(127, 256))},
+    ord("\\"): "\\\\",
+    ord("("): "\\(",
+    ord(")"): "\\)",
+}
+
+
+def _receipt_fields(payment_context: PaymentContext, issued_at: datetime) -> dict[str, str]:
+    """Map a payment onto the variable receipt fields."""
+    return {
+        "transaction_id": payment_context.transaction_id or "",
+        "issued_at": issued_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "sender_name": payment_context.sender.name,
+        "sender_bank": payment_context.sender.bank_name,
+        "sender_account": payment_context.sender.account_id,
+        "beneficiary_name": payment_context.beneficiary.name,
+        "beneficiary_bank": payment_context.beneficiary.bank_name,
+        "beneficiary_account": payment_context.beneficiary.account_id,
+        "amount": f"{payment_context.amount} {payment_context.currency}",
+        "remarks": payment_context.remarks,
+    }
+
+
+def _layout_receipt(buffer: BytesIO, fields: dict[str, str], **doc_options) -> None:
+    """
+    Lay out a transaction receipt with ReportLab platypus and write it to ``buffer``.
+
+    This is the single definition of the receipt layout: :class:`ReceiptEngine`
+    compiles its template from it, and it renders receipts the engine cannot.
+
+    Args:
+        buffer: Destination for the PDF data
+        fields: Receipt values keyed by :data:`RECEIPT_FIELDS`
+        **doc_options: Extra ``SimpleDocTemplate`` options, e.g. ``pageCompression``
+    """
+    doc: SimpleDocTemplate = SimpleDocTemplate(
+        buffer, 
+        pagesize=letter, 
+        topMargin=0.5 * inch, 
+        bottomMargin=0.5 * inch,
+        title=f"Transaction Receipt - {fields['transaction_id']}",
+        author="Banking MCP Server",
+        subject=f"Transaction Receipt for {fields['transaction_id']}",
+        creator="AI Banking Assistant",
+        producer="ReportLab",
+        **doc_options,
+    )
+
+    # Styles
+    styles: getSampleStyleSheet = getSampleStyleSheet()
+    title_style: ParagraphStyle = ParagraphStyle(
+        "CustomTitle",
+        parent=styles["Heading1"],
+        fontSize=18,
+        textColor=colors.HexColor("#1f4788"),
+        spaceAfter=12,
+        alignment=1,  # Center
+    )
+
+    footer_style: ParagraphStyle = ParagraphStyle(
+        "CustomFooter",
+        parent=styles["Normal"],
+        fontSize=9,
+        textColor=colors.HexColor("#cccccc"),  # Light grey
+        alignment=1,  # Center
+    )
+
+    # Content
+    elements: list = [
+        Paragraph("TRANSACTION RECEIPT", title_style),
+        Spacer(1, 0.2 * inch),
+    ]
+
+    # Transaction details table
+    data: list = [
+        ["Transaction ID:", fields["transaction_id"]],
+        ["Date & Time:", fields["issued_at"]],
+        ["Status:", "Completed"],
+        ["", ""],
+        ["From:", fields["sender_name"]],
+        ["From Bank:", fields["sender_bank"]],
+        ["From Account:", fields["sender_account"]],
+        ["", ""],
+        ["To:", fields["beneficiary_name"]],
+        ["To Bank:", fields["beneficiary_bank"]],
+        ["To Account:", fields["beneficiary_account"]],
+        ["", ""],
+        ["Amount:", fields["amount"]],
+        ["Remarks:", fields["remarks"]],
+    ]
+
+    table: Table = Table(data, colWidths=[2 * inch, 4 * inch])
+    table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
+                ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("GRID", (0, 0), (-1, -1), 1, colors.grey),
+            ]
+        )
+    )
+
+    elements.append(table)
+    elements.append(Spacer(1, 0.5 * inch))
+    elements.append(
+        Paragraph("This is an electronically generated receipt.", footer_style)
+    )
+
+    # Build PDF
+    doc.build(elements)
+
+
+def _pdf_text(value: str) -> bytes:
+    """
+    Encode a value as the body of a PDF literal string in WinAnsi encoding.
+
+    Raises:
+        UnicodeEncodeError: If the value has characters the standard fonts cannot show
+    """
+    return value.encode("cp1252").decode("latin-1").translate(_PDF_ESCAPES).encode("ascii")
+
+
+def _pdf_date(moment: datetime) -> str:
+    """Format a timezone-aware datetime as a PDF date string."""
+    offset = moment.strftime("%z") or "+0000"
+    return f"D:{moment:%Y%m%d%H%M%S}{offset[:3]}'{offset[3:]}'"
+
+
+class ReceiptEngine:
+    """
+    Renders receipts from a layout compiled once per process.
+
+    The receipt has a fixed one-page layout: cell text is left aligned and never
+    wraps, so only the variable strings change between transactions. At start-up
+    the platypus layout is built once with placeholder values and uncompressed
+    streams, and split into static byte chunks and field slots. Rendering a
+    receipt then escapes the field values, joins the chunks and writes a fresh
+    cross-reference table, without touching ReportLab.
+
+    Values that would change the layout (line breaks) or that the standard
+    fonts cannot encode fall back to the platypus renderer.
+    """
+
+    _SLOT = re.compile(rb"@@(\w+)@@")
+    _OBJECT = re.compile(rb"(\d+) 0 obj\n(.*?)endobj\n", re.S)
+    _STREAM = re.compile(rb"/Length \d+(.*?)stream\n(.*)endstream\n$", re.S)
+    _PDF_DATE = re.compile(rb"\(D:\d{14}[^)]*\)")
+
+    def __init__(self):
+        buffer = BytesIO()
+        _layout_receipt(
+            buffer,
+            {name: f"@@{name}@@" for name in RECEIPT_FIELDS},
+            invariant=1,
+            pageCompression=0,
+        )
+        template: bytes = buffer.getvalue()
+
+        first_object = template.index(b"1 0 obj\n")
+        trailer = template[template.rindex(b"\ntrailer\n"):]
+        self._header: bytes = template[:first_object]
+        self._root: bytes = re.search(rb"/Root (\d+ 0 R)", trailer).group(1)
+        self._info: bytes = re.search(rb"/Info (\d+ 0 R)", trailer).group(1)
+
+        # Each object is (head parts, stream parts or None); parts alternate
+        # static bytes and field names, starting and ending with bytes
+        self._objects: list[tuple[list, Optional[list]]] = []
+        for number, (label, body) in enumerate(self._OBJECT.findall(template), start=1):
+            if int(label) != number:
+                raise ValueError(f"Unexpected object numbering in receipt template: {label}")
+            body = self._PDF_DATE.sub(b"(@@pdf_date@@)", body)
+            stream = self._STREAM.search(body)
+            if stream is None:
+                self._objects.append((self._compile(body), None))
+                continue
+            head = body[:stream.start()] + b"/Length @@length@@" + stream.group(1) + b"stream\n"
+            self._objects.append((self._compile(head), self._compile(stream.group(2))))
+
+        slots = {
+            name.decode() for head, stream in self._objects for parts in (head, stream or [b""]) for name in parts[1::2]
+        }
+        if not set(RECEIPT_FIELDS) <= slots:
+            raise ValueError(f"Receipt template is missing fields: {sorted(set(RECEIPT_FIELDS) - slots)}")
+        logger.debug("Receipt template compiled: %d objects, %d bytes", len(self._objects), len(template))
+
+    @classmethod
+    def _compile(cls, chunk: bytes) -> list:
+        """Split a chunk into alternating static bytes and field names."""
+        return cls._SLOT.split(chunk)
+
+    @staticmethod
+    def _fill(parts: list, values: dict[bytes, bytes]) -> bytes:
+        if len(parts) == 1:
+            return parts[0]
+        filled = parts[:]
+        for index in range(1, len(filled), 2):
+            filled[index] = values[filled[index]]
+        return b"".join(filled)
+
+    def render(self, payment_context: PaymentContext, issued_at: Optional[datetime] = None) -> BytesIO:
+        """
+        Render a receipt PDF in memory.
+
+        Args:
+            payment_context: Payment context with transaction details
+            issued_at: Receipt timestamp; defaults to the current local time
+
+        Returns:
+            BytesIO buffer containing the PDF data
+        """
+        issued_at = issued_at or datetime.now().astimezone()
+        fields = _receipt_fields(payment_context, issued_at)
+        try:
+            if any("\n" in value or "\r" in value for value in fields.values()):
+                raise ValueError("multi-line value")
+            values: dict[bytes, bytes] = {name.encode(): _pdf_text(value) for name, value in fields.items()}
+        except (UnicodeEncodeError, ValueError) as e:
+            logger.debug("[TID: %s] Receipt needs the full layout (%s).", payment_context.transaction_id, e)
+            buffer = BytesIO()
+            _layout_receipt(buffer, fields)
+            buffer.seek(0)
+            return buffer
+        values[b"pdf_date"] = _pdf_date(issued_at).encode()
+
+        chunks: list[bytes] = [self._header]
+        offsets: list[int] = []
+        position = len(self._header)
+        for number, (head, stream) in enumerate(self._objects, start=1):
+            if stream is not None:
+                content = self._fill(stream, values)
+                values[b"length"] = str(len(content)).encode()
+                body = self._fill(head, values) + content + b"endstream\n"
+            else:
+                body = self._fill(head, values)
+            chunk = b"%d 0 obj\n%sendobj\n" % (number, body)
+            offsets.append(position)
+            position += len(chunk)
+            chunks.append(chunk)
+
+        document_id = hashlib.md5(values[b"transaction_id"] + values[b"pdf_date"]).hexdigest().encode()
+        chunks.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        chunks.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+        chunks.append(
+            b"trailer\n<<\n/ID \n[<%s><%s>]\n/Info %s\n/Root %s\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n"
+            % (document_id, document_id, self._info, self._root, len(offsets) + 1, position)
+        )
+        return BytesIO(b"".join(chunks))
+
+
+@lru_cache(maxsize=1)
+def get_receipt_engine() -> ReceiptEngine:
+    """Return this process's receipt engine, compiling the layout on first use."""
+    return ReceiptEngine()
+
+
+def _render_receipt_flowables(payment_context: PaymentContext) -> BytesIO:
+    """
+    Render a receipt with the full platypus layout on every call.
+
+    Kept as the reference renderer for benchmarks and layout checks.
+    """
+    buffer: BytesIO = BytesIO()
+    _layout_receipt(buffer, _receipt_fields(payment_context, datetime.now()))
+    buffer.seek(0)
+    return buffer
+
+
+def generate_receipt_pdf(payment_context: PaymentContext, issued_at: Optional[datetime] = None) -> BytesIO:
+    """
+    Generate a transaction receipt PDF in memory.
+
+    CPU-bound; runs on the receipt render pool, possibly in a worker process.
+
+    Args:
+        payment_context: Payment context with transaction details
+        issued_at: Time shown on the receipt; defaults to now
+
+    Returns:
+        BytesIO buffer containing the PDF data
+    """
+    return get_receipt_engine().render(payment_context, issued_at)
@@ -0,0 +1,613 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from .config import ServerConfigs
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# A stored receipt: a file to send, or a read-only view of the PDF bytes
+ReceiptData = Union[Path, memoryview]
+
+# Transaction IDs become file names and index keys, so only plain identifiers are accepted
+_TRANSACTION_ID = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+
+def _check_transaction_id(transaction_id: str) -> None:
+    if not _TRANSACTION_ID.fullmatch(transaction_id):
+        raise ValueError(f"Invalid transaction ID: {transaction_id!r}")
+
+
+class ReceiptStore(ABC):
+    """Storage backend for rendered receipt PDFs, keyed by transaction ID.
+
+    A store also keeps receipt snapshots: the details a receipt is rendered
+    from, written when the payment completes and kept until the receipt is
+    saved, so a receipt can be rendered after the payment record is gone.
+    """
+
+    async def start(self) -> None:
+        """Open resources and start background maintenance."""
+
+    async def stop(self) -> None:
+        """Stop background maintenance and release resources."""
+
+    @abstractmethod
+    async def lookup(self, transaction_id: str) -> Optional[ReceiptData]:
+        """Return the stored receipt for a transaction, or None if there is none."""
+
+    @abstractmethod
+    async def save(self, transaction_id: str, buffer: BytesIO) -> ReceiptData:
+        """Store a receipt and return it as :meth:`lookup` would."""
+
+    @abstractmethod
+    async def save_snapshot(self, transaction_id: str, snapshot: bytes) -> None:
+        """Durably store the snapshot a receipt is rendered from, replacing any earlier one."""
+
+    @abstractmethod
+    async def load_snapshot(self, transaction_id: str) -> Optional[bytes]:
+        """Return the receipt snapshot for a transaction, or None if there is none."""
+
+    @abstractmethod
+    async def drop_snapshot(self, transaction_id: str) -> None:
+        """Delete the receipt snapshot for a transaction, if any."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for the metrics endpoint."""
+
+
+class FileReceiptStore(ReceiptStore):
+    """One PDF file per receipt, sharded into hash-prefixed subdirectories.
+
+    A receipt for ``transaction_id`` lives at ``root/ab/cd/<transaction_id>.pdf``,
+    where ``ab`` and ``cd`` are the leading bytes of the SHA-256 of the ID, one
+    directory level per ``shard_depth``. This keeps every directory small at
+    millions of receipts. Writes go to a temporary file in the target directory
+    and are renamed into place, so readers see either no file or a complete one.
+    File system calls run in a worker thread, off the event loop.
+
+    Snapshots live in a parallel tree, ``root/.snapshots/ab/cd/<transaction_id>.json``,
+    until their receipt is saved. Receipts that are never downloaded would keep
+    theirs forever, so every ``sweep_interval`` seconds snapshots older than
+    ``snapshot_retention`` are deleted; only the snapshot tree is walked.
+    """
+
+    def __init__(self, root: str, *, shard_depth: int = 2, snapshot_retention: float = 0.0,
+                 sweep_interval: float = 0.0):
+        self._root = Path(root)
+        self._snapshot_root = self._root / ".snapshots"
+        self._shard_depth = max(0, min(shard_depth, 16))
+        self._snapshot_retention = snapshot_retention
+        self._sweep_interval = sweep_interval
+        self._task: Optional[asyncio.Task] = None
+        # Shard directories known to exist, so saves skip the mkdir
+        self._directories: set[Path] = set()
+        self.writes = 0
+        self.bytes_written = 0
+        self.snapshots_expired = 0
+
+    async def start(self) -> None:
+        if self._task is None and self._snapshot_retention > 0 and self._sweep_interval > 0:
+            self._task = asyncio.create_task(self._sweep_loop(), name="receipt-snapshot-sweep")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def path_for(self, transaction_id: str) -> Path:
+        """Return where the receipt for a transaction is stored.
+
+        Raises:
+            ValueError: If the transaction ID is not a plain identifier
+        """
+        return self._sharded(self._root, transaction_id, ".pdf")
+
+    def _sharded(self, base: Path, transaction_id: str, suffix: str) -> Path:
+        _check_transaction_id(transaction_id)
+        digest = hashlib.sha256(transaction_id.encode("utf-8")).hexdigest()
+        shards = [digest[level * 2:level * 2 + 2] for level in range(self._shard_depth)]
+        return base.joinpath(*shards, f"{transaction_id}{suffix}")
+
+    async def lookup(self, transaction_id: str) -> Optional[Path]:
+        try:
+            path = self.path_for(transaction_id)
+        except ValueError:
+            return None
+        return path if await asyncio.to_thread(path.is_file) else None
+
+    async def save(self, transaction_id: str, buffer: BytesIO) -> Path:
+        """Atomically store a receipt and return its path.
+
+        The buffer is written through a view of its memory, without copying it.
+        """
+        path = self.path_for(transaction_id)
+        with buffer.getbuffer() as data:
+            await asyncio.to_thread(self._write, path, data)
+            self.writes += 1
+            self.bytes_written += data.nbytes
+        return path
+
+    async def save_snapshot(self, transaction_id: str, snapshot: bytes) -> None:
+        path = self._sharded(self._snapshot_root, transaction_id, ".json")
+        await asyncio.to_thread(self._write, path, memoryview(snapshot))
+
+    async def load_snapshot(self, transaction_id: str) -> Optional[bytes]:
+        try:
+            path = self._sharded(self._snapshot_root, transaction_id, ".json")
+            return await asyncio.to_thread(path.read_bytes)
+        except (ValueError, FileNotFoundError):
+            return None
+
+    async def drop_snapshot(self, transaction_id: str) -> None:
+        path = self._sharded(self._snapshot_root, transaction_id, ".json")
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+
+    async def sweep_snapshots(self) -> int:
+        """Delete snapshots older than the retention window; returns the number deleted."""
+        if self._snapshot_retention <= 0:
+            return 0
+        expired = await asyncio.to_thread(self._sweep, time.time() - self._snapshot_retention)
+        self.snapshots_expired += expired
+        return expired
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                expired = await self.sweep_snapshots()
+            except OSError as e:
+                logger.warning("Receipt snapshot sweep failed: %s", e)
+                continue
+            if expired:
+                logger.info("Expired %d receipt snapshots that were never rendered", expired)
+
+    def _sweep(self, cutoff: float) -> int:
+        # Shard directories are kept, as saves assume the ones they created still exist
+        expired = 0
+        for directory, _, files in os.walk(self._snapshot_root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.unlink(path)
+                        expired += 1
+                except FileNotFoundError:
+                    # Rendered or swept by another worker meanwhile
+                    continue
+        return expired
+
+    def _write(self, path: Path, data: memoryview) -> None:
+        directory = path.parent
+        if directory not in self._directories:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._directories.add(directory)
+
+        temporary = directory / f".{path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            temporary.unlink(missing_ok=True)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "files",
+            "root": str(self._root),
+            "shard_depth": self._shard_depth,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "snapshots_expired": self.snapshots_expired,
+        }
+
+
+class SegmentReceiptStore(ReceiptStore):
+    """Receipts packed into append-only segment files with an SQLite offset index.
+
+    Each receipt is appended to the active segment as a small header, its
+    transaction ID and the PDF bytes; the index maps the transaction ID to its
+    segment, offset and length. The on-disk index is mirrored in a dict, so a
+    lookup is one hash probe plus a slice of a read-only ``mmap`` of the segment,
+    served on the event loop without a thread hop. The active segment rolls over
+    once it reaches ``segment_max_bytes``.
+
+    Receipt snapshots are kept in a table of the index database.
+
+    A background compactor drops index entries and snapshots older than ``retention`` seconds,
+    deletes sealed segments with no live receipts left and rewrites those whose
+    live share fell below ``compact_ratio`` into the active segment.
+
+    Writes, expiry and compaction run on one store thread; the in-memory index
+    and segment maps are shared with lookups on the event loop under a lock, so
+    a lookup never resolves a segment that compaction has already removed.
+    Segments are written by one process only: the store holds an exclusive lock
+    on ``root/LOCK`` while open and refuses to start if another process has it.
+    """
+
+    _HEADER = struct.Struct(">4sHI")  # magic, transaction ID length, PDF length
+    _MAGIC = b"RCPT"
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS receipts ("
+        "transaction_id TEXT PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL, "
+        "length INTEGER NOT NULL, created_at REAL NOT NULL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS receipts_created_at ON receipts (created_at)",
+        "CREATE INDEX IF NOT EXISTS receipts_segment ON receipts (segment)",
+        "CREATE TABLE IF NOT EXISTS snapshots ("
+        "transaction_id TEXT PRIMARY KEY, data BLOB NOT NULL, created_at REAL NOT NULL) WITHOUT ROWID",
+    )
+
+    def __init__(self, root: str, *, segment_max_bytes: int, retention: float, compact_interval: float,
+                 compact_ratio: float):
+        self._root = Path(root)
+        self._segment_max_bytes = max(1, segment_max_bytes)
+        self._retention = retention
+        self._compact_interval = compact_interval
+        self._compact_ratio = compact_ratio
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._active: Optional[BinaryIO] = None
+        self._lock_file: Optional[BinaryIO] = None
+        # Guards _index and _maps, which lookups use on the event loop
+        self._lock = threading.Lock()
+        self._active_segment = 0
+        self._active_size = 0
+        # transaction_id -> (segment, offset, length), mirroring the on-disk index
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        # Read-only maps per segment, remapped when a read falls past the mapped size.
+        # Replaced maps are not closed: a reader on another thread may still hold
+        # them, and they are released with their last slice.
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._segment_count = 0
+        self._bytes_on_disk = 0
+        self.writes = 0
+        self.expired = 0
+        self.compactions = 0
+        self.reclaimed_bytes = 0
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="receipt-segments")
+        try:
+            await self._run(self._open)
+        except BaseException:
+            await self._run(self._close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            raise
+        if self._compact_interval > 0:
+            self._task = asyncio.create_task(self._compact_loop(), name="receipt-compactor")
+        logger.info("Segment receipt store opened at %s: %d receipts in %d segments",
+                    self._root, len(self._index), self._segment_count)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            await self._run(self._close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def lookup(self, transaction_id: str) -> Optional[memoryview]:
+        if self._executor is None:
+            await self.start()
+        with self._lock:
+            location = self._index.get(transaction_id)
+            return self._slice(*location) if location is not None else None
+
+    async def save(self, transaction_id: str, buffer: BytesIO) -> memoryview:
+        _check_transaction_id(transaction_id)
+        with buffer.getbuffer() as data:
+            location = await self._run(self._append, transaction_id, data, time.time())
+        with self._lock:
+            return self._slice(*location)
+
+    async def save_snapshot(self, transaction_id: str, snapshot: bytes) -> None:
+        _check_transaction_id(transaction_id)
+        await self._run(self._execute, "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                        (transaction_id, snapshot, time.time()))
+
+    async def load_snapshot(self, transaction_id: str) -> Optional[bytes]:
+        row = await self._run(self._fetch_one, "SELECT data FROM snapshots WHERE transaction_id = ?",
+                              (transaction_id,))
+        return bytes(row[0]) if row is not None else None
+
+    async def drop_snapshot(self, transaction_id: str) -> None:
+        await self._run(self._execute, "DELETE FROM snapshots WHERE transaction_id = ?", (transaction_id,))
+
+    async def compact(self) -> int:
+        """Apply the retention window and reclaim segment space; returns bytes reclaimed."""
+        await self._run(self._expire)
+        reclaimed = 0
+        for segment in await self._run(self._sealed_segments):
+            # One segment per store-thread call, so lookups interleave with compaction
+            reclaimed += await self._run(self._compact_segment, segment)
+        return reclaimed
+
+    async def _compact_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._compact_interval)
+            try:
+                reclaimed = await self.compact()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Receipt compaction failed: %s", e)
+                continue
+            if reclaimed:
+                logger.info("Receipt compaction reclaimed %d bytes", reclaimed)
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            await self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._root / f"segment-{segment:08d}.dat"
+
+    def _segments(self) -> List[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self._root.glob("segment-*.dat"))
+
+    def _open(self) -> None:
+        self._root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self._root / "LOCK", "ab")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Receipt segments at {self._root} are in use by another process; the segments backend "
+                f"supports one server process, use the files backend to run several"
+            ) from None
+        self._lock_file = lock_file
+        connection = sqlite3.connect(self._root / "index.sqlite3", isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+        self._connection = connection
+
+        segments = self._segments()
+        self._active_segment = segments[-1] if segments else 1
+        # Drop a tail appended after the last indexed receipt, e.g. by a crash between
+        # the segment write and the index insert
+        indexed_end = connection.execute(
+            "SELECT COALESCE(MAX(offset + length), 0) FROM receipts WHERE segment = ?", (self._active_segment,)
+        ).fetchone()[0]
+        path = self._segment_path(self._active_segment)
+        self._active = open(path, "ab")
+        if self._active.tell() > indexed_end:
+            logger.warning("Truncating %d unindexed bytes from %s", self._active.tell() - indexed_end, path.name)
+            self._active.truncate(indexed_end)
+            self._active.seek(indexed_end)
+        self._active_size = indexed_end
+        self._index = {
+            transaction_id: (segment, offset, length)
+            for transaction_id, segment, offset, length in connection.execute(
+                "SELECT transaction_id, segment, offset, length FROM receipts"
+            )
+        }
+        sizes = [self._segment_path(segment).stat().st_size for segment in self._segments()]
+        self._segment_count = len(sizes)
+        self._bytes_on_disk = sum(sizes)
+
+    def _close(self) -> None:
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                # A response still holds a slice; the map closes once it is released
+                pass
+        self._maps.clear()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._lock_file is not None:
+            # Closing the file releases the lock
+            self._lock_file.close()
+            self._lock_file = None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a ``BEGIN IMMEDIATE`` transaction on the index database."""
+        connection = self._connection
+        assert connection is not None
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+    def _execute(self, statement: str, parameters: Tuple[Any, ...]) -> None:
+        assert self._connection is not None
+        self._connection.execute(statement, parameters)
+
+    def _fetch_one(self, statement: str, parameters: Tuple[Any, ...]) -> Optional[Tuple[Any, ...]]:
+        assert self._connection is not None
+        return self._connection.execute(statement, parameters).fetchone()
+
+    def _slice(self, segment: int, offset: int, length: int) -> memoryview:
+        """Return a view of stored bytes; the caller holds ``_lock``."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < offset + length:
+            with open(self._segment_path(segment), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return memoryview(mapped)[offset:offset + length]
+
+    def _write_record(self, transaction_id: str, data: memoryview) -> Tuple[int, int]:
+        """Append one record to the active segment and return ``(segment, offset)`` of its PDF bytes."""
+        assert self._active is not None
+        key = transaction_id.encode("utf-8")
+        record_size = self._HEADER.size + len(key) + data.nbytes
+        if self._active_size and self._active_size + record_size > self._segment_max_bytes:
+            self._active.close()
+            self._active_segment += 1
+            self._active = open(self._segment_path(self._active_segment), "ab")
+            self._active_size = 0
+            self._segment_count += 1
+
+        self._active.write(self._HEADER.pack(self._MAGIC, len(key), data.nbytes))
+        self._active.write(key)
+        self._active.write(data)
+        # Flush to the OS so maps of this segment see the new bytes
+        self._active.flush()
+        offset = self._active_size + self._HEADER.size + len(key)
+        self._active_size += record_size
+        self._bytes_on_disk += record_size
+        return self._active_segment, offset
+
+    def _append(self, transaction_id: str, data: memoryview, created_at: float) -> Tuple[int, int, int]:
+        assert self._connection is not None
+        segment, offset = self._write_record(transaction_id, data)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO receipts VALUES (?, ?, ?, ?, ?)",
+            (transaction_id, segment, offset, data.nbytes, created_at),
+        )
+        location = (segment, offset, data.nbytes)
+        with self._lock:
+            self._index[transaction_id] = location
+        self.writes += 1
+        return location
+
+    def _expire(self) -> int:
+        assert self._connection is not None
+        if self._retention <= 0:
+            return 0
+        cutoff = time.time() - self._retention
+        with self._transaction() as connection:
+            expired = [row[0] for row in connection.execute(
+                "SELECT transaction_id FROM receipts WHERE created_at < ?", (cutoff,)
+            )]
+            connection.execute("DELETE FROM receipts WHERE created_at < ?", (cutoff,))
+            connection.execute("DELETE FROM snapshots WHERE created_at < ?", (cutoff,))
+        with self._lock:
+            for transaction_id in expired:
+                self._index.pop(transaction_id, None)
+        self.expired += len(expired)
+        return len(expired)
+
+    def _sealed_segments(self) -> List[int]:
+        return [segment for segment in self._segments() if segment != self._active_segment]
+
+    def _compact_segment(self, segment: int) -> int:
+        """Delete or rewrite one sealed segment if enough of it is dead; returns bytes reclaimed."""
+        assert self._connection is not None
+        path = self._segment_path(segment)
+        size = path.stat().st_size
+        live = self._connection.execute(
+            "SELECT transaction_id, offset, length, created_at FROM receipts WHERE segment = ? ORDER BY offset",
+            (segment,),
+        ).fetchall()
+        live_bytes = sum(self._HEADER.size + len(row[0].encode("utf-8")) + row[2] for row in live)
+        if live and live_bytes >= size * self._compact_ratio:
+            return 0
+
+        # Copy the live receipts forward, then repoint the index in one transaction
+        moved = []
+        for transaction_id, offset, length, created_at in live:
+            with self._lock:
+                data = self._slice(segment, offset, length)
+            with data:
+                target, target_offset = self._write_record(transaction_id, data)
+            moved.append((target, target_offset, transaction_id))
+        with self._transaction() as connection:
+            connection.executemany(
+                "UPDATE receipts SET segment = ?, offset = ? WHERE transaction_id = ?", moved
+            )
+
+        # Lookups resolve either the old location before this block or the new one after
+        # it. Slices already handed out keep the old map, and the unlinked file, alive
+        # until released.
+        with self._lock:
+            for (transaction_id, offset, length, created_at), (target, target_offset, _) in zip(live, moved):
+                self._index[transaction_id] = (target, target_offset, length)
+            self._maps.pop(segment, None)
+            path.unlink()
+        reclaimed = size - live_bytes
+        self._segment_count -= 1
+        self._bytes_on_disk -= size
+        self.compactions += 1
+        self.reclaimed_bytes += reclaimed
+        return reclaimed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "segments",
+            "root": str(self._root),
+            "receipts": len(self._index),
+            "segments": self._segment_count,
+            "bytes_on_disk": self._bytes_on_disk,
+            "writes": self.writes,
+            "expired": self.expired,
+            "compactions": self.compactions,
+            "reclaimed_bytes": self.reclaimed_bytes,
+        }
+
+
+def create_receipt_store(configs: ServerConfigs) -> ReceiptStore:
+    """Build the receipt storage backend selected by ``receipt_store_backend``."""
+    if configs.receipt_store_backend == "segments":
+        return SegmentReceiptStore(
+            configs.receipt_store_root,
+            segment_max_bytes=configs.receipt_segment_max_bytes,
+            retention=configs.receipt_retention,
+            compact_interval=configs.receipt_compact_interval,
+            compact_ratio=configs.receipt_compact_ratio,
+        )
+    return FileReceiptStore(
+        configs.receipt_store_root,
+        shard_depth=configs.receipt_store_shard_depth,
+        snapshot_retention=configs.receipt_retention,
+        sweep_interval=configs.receipt_compact_interval,
+    )
@@ -0,0 +1,164 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .payment_models import PaymentContext
+from .payment_store import COMPLETED, PaymentRecord, PaymentStore
+from .receipt_render import generate_receipt_pdf, get_receipt_engine
+from .receipt_store import ReceiptData, ReceiptStore
+from .render_pool import RenderPool
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def content_etag(data: Union[bytes, memoryview]) -> str:
+    """Strong ETag for a receipt, derived from its bytes."""
+    return f'"{hashlib.sha256(data).hexdigest()}"'
+
+
+@dataclass(frozen=True)
+class Receipt:
+    """A stored receipt ready to send: a file or the PDF bytes, with its ETag."""
+
+    body: ReceiptData
+    etag: str
+
+
+class ReceiptService:
+    """Renders transaction receipts on their first download.
+
+    Completing a payment only stores a small snapshot of its receipt details in
+    the receipt store (:meth:`record`); the PDF is rendered from it the first
+    time it is requested, written to the receipt store and served from there
+    afterwards. The snapshot outlives the payment record, which is evicted or
+    expires, so a completed payment always has its receipt. Concurrent first
+    downloads of the same receipt share one render.
+
+    Receipts never change once written, so their content ETags are computed
+    once (from the render buffer, or by reading the stored receipt) and kept in
+    a bounded LRU map.
+    """
+
+    def __init__(self, payment_store: PaymentStore, render_pool: RenderPool, receipt_store: ReceiptStore,
+                 *, etag_cache_size: int = 65536):
+        self._payment_store = payment_store
+        self._render_pool = render_pool
+        self._receipt_store = receipt_store
+        self._renders = SingleFlight()
+        self._etags: "OrderedDict[str, str]" = OrderedDict()
+        self._etag_cache_size = etag_cache_size
+        self.served = 0
+        self.rendered = 0
+        self.missing = 0
+        # Compile the layout up front for in-process rendering; process workers compile their own
+        get_receipt_engine()
+
+    async def record(self, payment_context: PaymentContext, completed_at: float) -> None:
+        """Durably store the receipt snapshot of a payment that is being completed."""
+        snapshot = {"payment": payment_context.model_dump(exclude={"otp"}), "completed_at": completed_at}
+        await self._receipt_store.save_snapshot(payment_context.transaction_id, json.dumps(snapshot).encode("utf-8"))
+
+    async def discard(self, transaction_id: str) -> None:
+        """Drop the receipt snapshot of a payment that did not complete after all."""
+        await self._receipt_store.drop_snapshot(transaction_id)
+
+    async def receipt(self, transaction_id: str) -> Optional[Receipt]:
+        """
+        Return the stored receipt for a transaction, rendering it if needed.
+
+        Returns:
+            The receipt with its ETag, or None if the transaction is unknown or not completed
+
+        Raises:
+            PoolSaturated: If the receipt has to be rendered and the pool is full
+        """
+        # Lookups join any in-flight render instead of racing it
+        body: Optional[ReceiptData] = await self._renders.do(transaction_id, lambda: self._render(transaction_id))
+        if body is None:
+            return None
+
+        etag = self._etags.get(transaction_id)
+        if etag is None:
+            data = await asyncio.to_thread(body.read_bytes) if isinstance(body, Path) else body
+            etag = content_etag(data)
+            self._remember_etag(transaction_id, etag)
+        else:
+            self._etags.move_to_end(transaction_id)
+        return Receipt(body, etag)
+
+    async def _render(self, transaction_id: str) -> Optional[ReceiptData]:
+        receipt = await self._receipt_store.lookup(transaction_id)
+        if receipt is not None:
+            self.served += 1
+            return receipt
+
+        # While the payment record exists it decides; a snapshot may belong to a
+        # completion that is still in progress or lost a race with a decline
+        payment_record: Optional[PaymentRecord] = await self._payment_store.get(transaction_id)
+        if payment_record is not None and payment_record.state != COMPLETED:
+            self.missing += 1
+            return None
+
+        snapshot = await self._receipt_store.load_snapshot(transaction_id)
+        if snapshot is not None:
+            details = json.loads(snapshot)
+            payment_context = PaymentContext.model_validate(details["payment"])
+            completed_at = details["completed_at"]
+        elif payment_record is not None:
+            payment_context = PaymentContext.model_validate(payment_record.as_dict())
+            completed_at = payment_record.completed_at
+        else:
+            self.missing += 1
+            return None
+
+        issued_at = datetime.fromtimestamp(completed_at).astimezone() if completed_at else None
+        logger.info("[TID: %s] Receipt PDF generation started.", transaction_id)
+        pdf_buffer: BytesIO = await self._render_pool.run(generate_receipt_pdf, payment_context, issued_at)
+        receipt = await self._receipt_store.save(transaction_id, pdf_buffer)
+        with pdf_buffer.getbuffer() as data:
+            self._remember_etag(transaction_id, content_etag(data))
+            logger.info("[TID: %s] Receipt PDF persisted (%d bytes).", transaction_id, data.nbytes)
+        await self._receipt_store.drop_snapshot(transaction_id)
+        self.rendered += 1
+        return receipt
+
+    def _remember_etag(self, transaction_id: str, etag: str) -> None:
+        self._etags[transaction_id] = etag
+        self._etags.move_to_end(transaction_id)
+        while len(self._etags) > self._etag_cache_size:
+            self._etags.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "served": self.served,
+            "rendered": self.rendered,
+            "missing": self.missing,
+            "coalesced": self._renders.followers,
+            "inflight": len(self._renders),
+            "etags": len(self._etags),
+            "store": self._receipt_store.stats(),
+        }
@@ -0,0 +1,170 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Literal, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+PoolKind = Literal["process", "thread"]
+
+
+class PoolSaturated(Exception):
+    """Raised when no render slot frees up within the submit timeout."""
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    """Run ``fn`` in the worker and return its result with the time it took."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _preload(targets: Sequence[str]) -> None:
+    """Warm a fresh worker so the first real job does not pay for it.
+
+    Each target is a module to import, or ``module:function`` to import and then
+    call, e.g. to compile a template once per worker.
+    """
+    for target in targets:
+        module_name, _, function_name = target.partition(":")
+        module = importlib.import_module(module_name)
+        if function_name:
+            getattr(module, function_name)()
+
+
+class RenderPool:
+    """Bounded executor for CPU-bound rendering off the event loop.
+
+    At most ``workers + queue_size`` jobs are admitted at once; further callers
+    wait up to ``submit_timeout`` seconds for a slot and then get
+    :class:`PoolSaturated`. Process pools use the ``spawn`` start method, so
+    workers never inherit the server's threads or open sockets.
+    """
+
+    def __init__(
+            self,
+            *,
+            kind: PoolKind,
+            workers: int,
+            queue_size: int,
+            submit_timeout: float,
+            preload: Sequence[str] = (),
+    ):
+        self._kind = kind
+        self._workers = max(1, workers)
+        self._submit_timeout = submit_timeout
+        self._preload = tuple(preload)
+        self._slots = asyncio.Semaphore(self._workers + max(0, queue_size))
+        self._capacity = self._workers + max(0, queue_size)
+        self._executor: Optional[Executor] = None
+        self._waiting = 0
+        self._admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.render_seconds = 0.0
+        self.render_seconds_max = 0.0
+        self.queue_seconds = 0.0
+        self.queue_seconds_max = 0.0
+
+    async def start(self) -> None:
+        """Create the executor and, for process pools, start and warm every worker."""
+        if self._executor is not None:
+            return
+        if self._kind == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            if self._preload:
+                loop = asyncio.get_running_loop()
+                await asyncio.gather(*(
+                    loop.run_in_executor(self._executor, _preload, self._preload) for _ in range(self._workers)
+                ))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="render")
+        logger.info("Render pool started: kind=%s, workers=%d, capacity=%d",
+                    self._kind, self._workers, self._capacity)
+
+    async def stop(self) -> None:
+        """Wait for admitted jobs and shut the executor down."""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+        logger.info("Render pool stopped.")
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool and return its result.
+
+        ``fn`` and its arguments must be picklable when the pool uses processes.
+
+        Raises:
+            PoolSaturated: If no slot frees up within ``submit_timeout`` seconds.
+        """
+        if self._executor is None:
+            await self.start()
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self._submit_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PoolSaturated(f"Render pool saturated; no slot within {self._submit_timeout} seconds")
+        finally:
+            self._waiting -= 1
+
+        self._admitted += 1
+        submitted = time.perf_counter()
+        try:
+            result, seconds = await asyncio.get_running_loop().run_in_executor(self._executor, _timed, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._admitted -= 1
+            self._slots.release()
+
+        queued = max(0.0, time.perf_counter() - submitted - seconds)
+        self.completed += 1
+        self.render_seconds += seconds
+        self.render_seconds_max = max(self.render_seconds_max, seconds)
+        self.queue_seconds += queued
+        self.queue_seconds_max = max(self.queue_seconds_max, queued)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed or 1
+        return {
+            "kind": self._kind,
+            "workers": self._workers,
+            "capacity": self._capacity,
+            "running": min(self._admitted, self._workers),
+            "queue_depth": max(0, self._admitted - self._workers) + self._waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "render_ms_avg": round(self.render_seconds / completed * 1000, 3),
+            "render_ms_max": round(self.render_seconds_max * 1000, 3),
+            "queue_ms_avg": round(self.queue_seconds / completed * 1000, 3),
+            "queue_ms_max": round(self.queue_seconds_max * 1000, 3),
+        }
@@ -22,8 +22,19 @@ from starlette.applications import Starlette
 from starlette.routing import Mount, Route
 from mcp.server.fastmcp import FastMCP
 
+from .client import HTTPClient
 from .config import ServerConfigs
-from .endpoints import health_endpoint, get_receipt_endpoint
+from .endpoints import health_endpoint, get_receipt_endpoint, metrics_endpoint
+from .logging_config import configure_logging
+from .outbox import PaymentOutbox
+from .metrics import register_metrics_source
+from .payment_store import PaymentStore, create_payment_store
+from .projection import projection_stats
+from .receipt_store import ReceiptStore, create_receipt_store
+from .receipts import ReceiptService
+from .render_pool import RenderPool
+from .sync import TransactionSync
+from .warmup import WarmupScheduler
 from .tools import (
     register_account_tools,
     register_bank_tools,
@@ -35,6 +46,72 @@ logger = logging.getLogger(__name__)
 
 configs: ServerConfigs = ServerConfigs()
 
+# Install the queued logging pipeline before FastMCP, which only configures
+# logging when the root logger has no handlers yet
+configure_logging(configs)
+
+# Shared backend client; its connection pool is opened in the lifespan below
+http_client: HTTPClient = HTTPClient(configs=configs)
+register_metrics_source("http_cache", http_client.cache_stats)
+register_metrics_source("http_coalescing", http_client.coalescing_stats)
+register_metrics_source("http_hedging", http_client.hedging_stats)
+register_metrics_source("http_transfer", http_client.transfer_stats)
+register_metrics_source("projection", projection_stats.snapshot)
+
+# Refresh-ahead scheduler for the shared cache tier, started in the lifespan below
+warmup_scheduler: WarmupScheduler = WarmupScheduler(configs, http_client)
+register_metrics_source("warmup", warmup_scheduler.stats)
+
+# Local transaction logs shared by the account tools (reads) and payment tools (appends)
+transaction_sync: TransactionSync = TransactionSync(
+    max_transactions=configs.sync_max_transactions,
+    refresh_interval=configs.sync_refresh_interval,
+)
+register_metrics_source("transaction_sync", transaction_sync.stats)
+
+# Payment flow state shared by the payment tools; expired states are swept in the lifespan
+payment_store: PaymentStore = create_payment_store(configs)
+register_metrics_source("payment_store", payment_store.stats)
+
+# Durable queue of completed payments to record at the backend; flushed in the
+# background and drained on shutdown. Posts authenticate as the server itself.
+outbox_service_headers: dict[str, str] = {}
+if configs.server_api_key:
+    outbox_service_headers["api-key"] = configs.server_api_key
+if configs.outbox_service_token:
+    outbox_service_headers["Authorization"] = f"Bearer {configs.outbox_service_token}"
+payment_outbox: PaymentOutbox = PaymentOutbox(
+    configs.outbox_path,
+    http_client,
+    workers=configs.outbox_workers,
+    batch_size=configs.outbox_batch_size,
+    max_attempts=configs.outbox_max_attempts,
+    retry_base=configs.outbox_retry_base,
+    retry_max=configs.outbox_retry_max,
+    lease=configs.outbox_lease,
+    poll_interval=configs.outbox_poll_interval,
+    service_headers=outbox_service_headers,
+)
+register_metrics_source("payment_outbox", payment_outbox.stats)
+
+# Off-loop receipt rendering; workers are started in the lifespan
+receipt_pool: RenderPool = RenderPool(
+    kind=configs.receipt_pool_kind,
+    workers=configs.receipt_pool_workers,
+    queue_size=configs.receipt_pool_queue_size,
+    submit_timeout=configs.receipt_pool_submit_timeout,
+    preload=["banking_mcp_server.receipt_render:get_receipt_engine"],
+)
+register_metrics_source("receipt_pool", receipt_pool.stats)
+
+# Receipts are rendered from the snapshot stored at completion on their first download;
+# the store's compactor (segments backend) runs in the lifespan
+receipt_store: ReceiptStore = create_receipt_store(configs)
+receipt_service: ReceiptService = ReceiptService(
+    payment_store, receipt_pool, receipt_store, etag_cache_size=configs.receipt_etag_cache_size
+)
+register_metrics_source("receipts", receipt_service.stats)
+
 # Create an MCP server
 mcp = FastMCP(
     name="Banking MCP Server",
@@ -43,27 +120,43 @@ mcp = FastMCP(
     json_response=True,
     stateless_http=True,
 )
-register_account_tools(mcp)
-register_bank_tools(mcp)
-register_payment_tools(mcp)
-register_user_tools(mcp)
+register_account_tools(mcp, http_client, transaction_sync)
+register_bank_tools(mcp, http_client)
+register_payment_tools(mcp, transaction_sync, payment_store, payment_outbox, receipt_service)
+register_user_tools(mcp, http_client)
 
 
 # Create lifespan context manager for Starlette
 @contextlib.asynccontextmanager
 async def lifespan(app: Starlette):
-    async with mcp.session_manager.run():
-        yield
+    async with http_client, mcp.session_manager.run():
+        await warmup_scheduler.start()
+        await payment_store.start()
+        await payment_outbox.start()
+        await receipt_pool.start()
+        await receipt_store.start()
+        try:
+            yield
+        finally:
+            await receipt_store.stop()
+            await receipt_pool.stop()
+            # Drained while the HTTP client is still open
+            await payment_outbox.stop(drain_timeout=configs.outbox_drain_timeout)
+            await payment_store.stop()
+            await warmup_scheduler.stop()
 
 
-# Create Starlette app with custom routes
+# Create Starlette app with custom routes; /metrics is only served when enabled
 app = Starlette(
     routes=[
         Route("/health", health_endpoint, methods=["GET"]),
+        *([Route("/metrics", metrics_endpoint, methods=["GET"])] if configs.metrics_enabled else []),
         Route(
-            "/transactions/{transaction_id}/receipt", get_receipt_endpoint, methods=["GET"]
+            "/transactions/{transaction_id}/receipt", get_receipt_endpoint, methods=["GET", "HEAD"]
         ),
         Mount("", app=mcp.streamable_http_app()),
     ],
     lifespan=lifespan,
 )
+app.state.receipts = receipt_service
+app.state.metrics_token = configs.metrics_token
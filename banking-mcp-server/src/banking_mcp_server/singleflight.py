@@ -0,0 +1,62 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work as an independent task; callers
+    arriving while it is running await the same task and receive the same result
+    or exception. Each waiter is shielded, so cancelling one waiter never cancels
+    the shared work for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders: int = 0
+        self.followers: int = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once per key for all concurrent callers and return its result."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.followers += 1
+            logger.debug("Coalesced request joined in-flight call for key=%r", key)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an abandoned task does not log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "followers": self.followers, "inflight": len(self._inflight)}
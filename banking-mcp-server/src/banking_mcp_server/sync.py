@@ -0,0 +1,237 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+# Fetches an account's transactions payload with the given query params (None for full history)
+Fetch = Callable[[Optional[Dict[str, str]]], Awaitable[Any]]
+
+
+def _transaction_key(transaction: Dict[str, Any]) -> str:
+    transaction_id = transaction.get("TransactionId")
+    if transaction_id:
+        return str(transaction_id)
+    # Fall back to content identity for records without an ID
+    return json.dumps(transaction, sort_keys=True, default=str)
+
+
+def _booked_at(transaction: Dict[str, Any]) -> Optional[datetime]:
+    """Parsed ``BookingDateTime`` of a transaction, in UTC if it has no offset; None if unreadable."""
+    try:
+        booked = datetime.fromisoformat(str(transaction.get("BookingDateTime") or ""))
+    except ValueError:
+        return None
+    return booked if booked.tzinfo is not None else booked.replace(tzinfo=timezone.utc)
+
+
+def _booking_order(transaction: Dict[str, Any]) -> datetime:
+    # Unreadable booking times sort first, keeping their relative order
+    return _booked_at(transaction) or _EPOCH
+
+
+class TransactionLog:
+    """Local copy of one account's transactions, in booking order, with a high-water mark."""
+
+    __slots__ = ("account_id", "account_name", "transactions", "keys", "high_water", "high_water_at", "synced_at")
+
+    def __init__(self, account_id: str, account_name: Optional[str] = None):
+        self.account_id = account_id
+        self.account_name = account_name
+        self.transactions: List[Dict[str, Any]] = []
+        # key -> position in ``transactions``
+        self.keys: Dict[str, int] = {}
+        # Latest backend booking time seen, as sent by the backend and parsed
+        self.high_water: str = ""
+        self.high_water_at: Optional[datetime] = None
+        self.synced_at: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def merge(self, transactions: List[Dict[str, Any]], *, authoritative: bool = True) -> int:
+        """Add unseen transactions, keeping the log sorted by booking time. Returns the number added.
+
+        Args:
+            authoritative: The rows come from the backend: they replace held rows
+                with the same key, e.g. a payment appended when it completed, and
+                advance the high-water mark. Local rows only fill gaps.
+        """
+        rows = list(self.transactions)
+        added = replaced = 0
+        for transaction in transactions:
+            if not isinstance(transaction, dict):
+                continue
+            key = _transaction_key(transaction)
+            position = self.keys.get(key)
+            if position is None:
+                self.keys[key] = len(rows)
+                rows.append(transaction)
+                added += 1
+            elif authoritative and rows[position] != transaction:
+                rows[position] = transaction
+                replaced += 1
+            else:
+                continue
+            booked_at = _booked_at(transaction) if authoritative else None
+            if booked_at is not None and (self.high_water_at is None or booked_at > self.high_water_at):
+                self.high_water_at = booked_at
+                self.high_water = str(transaction["BookingDateTime"])
+        if added or replaced:
+            if added:
+                # Delta rows arrive after everything held; a stable sort keeps same-time rows in arrival order
+                rows.sort(key=_booking_order)
+                self.keys = {_transaction_key(row): position for position, row in enumerate(rows)}
+            # Replace rather than mutate, so holders of the previous list (e.g. the
+            # columnar store) can detect the change by identity
+            self.transactions = rows
+        return added
+
+    def payload(self) -> Dict[str, Any]:
+        """Render the log in the backend's ``/accounts/{id}/transactions`` shape."""
+        return {
+            "accountId": self.account_id,
+            "accountName": self.account_name,
+            "transactions": self.transactions,
+            "pagination": {"total": len(self.transactions), "count": len(self.transactions), "offset": 0, "limit": None},
+        }
+
+
+class TransactionSync:
+    """Per-identity, per-account transaction logs synced incrementally from the backend.
+
+    The first read of an account downloads its full history. Later reads request
+    only transactions booked on or after the high-water mark's day (``startDate``)
+    and merge them, de-duplicated by ``TransactionId``. Logs are evicted
+    least-recently-used once the total number of held transactions exceeds
+    ``max_transactions``.
+
+    Payments completed through this server are shown at once: :meth:`add_pending`
+    puts them into the payer's log, and into logs synced before the backend has
+    recorded them, until :meth:`reconcile` swaps in the backend's record.
+    """
+
+    def __init__(self, *, max_transactions: int, refresh_interval: float):
+        self._max_transactions = max_transactions
+        self._refresh_interval = refresh_interval
+        self._logs: "OrderedDict[Tuple[str, str], TransactionLog]" = OrderedDict()
+        # (identity, account_id, transaction key) -> locally completed transaction awaiting its backend record
+        self._pending: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._rows = 0
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.local_reads = 0
+        self.delta_rows = 0
+
+    def has_log(self, identity: str, account_id: str) -> bool:
+        return (identity, account_id) in self._logs
+
+    async def transactions(self, identity: str, account_id: str, fetch: Fetch) -> Any:
+        """Return the account's full transaction history, transferring only the delta when possible.
+
+        Returns:
+            The backend-shaped transactions payload, or the backend's error dict.
+        """
+        key = (identity, account_id)
+        log = self._logs.get(key)
+
+        if log is not None and time.monotonic() - log.synced_at < self._refresh_interval:
+            self._logs.move_to_end(key)
+            self.local_reads += 1
+            return log.payload()
+
+        params = {"startDate": log.high_water[:10]} if log is not None and log.high_water else None
+        result = await fetch(params)
+        if isinstance(result, dict) and "error" in result:
+            return result
+        if not isinstance(result, dict) or not isinstance(result.get("transactions"), list):
+            return result
+
+        if log is None or key not in self._logs:
+            log = TransactionLog(account_id, result.get("accountName"))
+            self._logs[key] = log
+            self.full_syncs += 1
+        else:
+            self.delta_syncs += 1
+            self.delta_rows += len(result["transactions"])
+
+        self._rows += log.merge(result["transactions"])
+        self._merge_pending(identity, log)
+        log.synced_at = time.monotonic()
+        self._logs.move_to_end(key)
+        self._evict()
+        logger.debug("Synced transactions for account %s: %d held, high-water %s",
+                     account_id, len(log), log.high_water)
+        return log.payload()
+
+    def add_pending(self, identity: str, account_id: str, transaction: Dict[str, Any]) -> None:
+        """Show a payment that just completed in the payer's log until the backend records it."""
+        key = (identity, account_id, _transaction_key(transaction))
+        self._pending[key] = transaction
+        self._pending.move_to_end(key)
+        while len(self._pending) > self._max_transactions:
+            self._pending.popitem(last=False)
+        log = self._logs.get((identity, account_id))
+        if log is not None:
+            self._rows += log.merge([transaction], authoritative=False)
+            self._evict()
+
+    def reconcile(self, account_id: str, transaction: Dict[str, Any]) -> int:
+        """Replace a pending payment with the record the backend returned. Returns the logs updated."""
+        key = _transaction_key(transaction)
+        for pending in [pending for pending in self._pending if pending[1] == account_id and pending[2] == key]:
+            del self._pending[pending]
+        updated = 0
+        for (_, log_account_id), log in self._logs.items():
+            if log_account_id == account_id:
+                self._rows += log.merge([transaction])
+                updated += 1
+        self._evict()
+        return updated
+
+    def _merge_pending(self, identity: str, log: TransactionLog) -> None:
+        pending = [
+            transaction for (pending_identity, account_id, _), transaction in self._pending.items()
+            if pending_identity == identity and account_id == log.account_id
+        ]
+        if pending:
+            self._rows += log.merge(pending, authoritative=False)
+
+    def _evict(self) -> None:
+        while self._rows > self._max_transactions and len(self._logs) > 1:
+            _, evicted = self._logs.popitem(last=False)
+            self._rows -= len(evicted)
+            logger.debug("Evicted transaction log for account %s (%d rows)", evicted.account_id, len(evicted))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self._logs),
+            "transactions": self._rows,
+            "max_transactions": self._max_transactions,
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+            "delta_rows": self.delta_rows,
+            "local_reads": self.local_reads,
+            "pending": len(self._pending),
+        }
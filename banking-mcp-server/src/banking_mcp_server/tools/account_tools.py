@@ -14,27 +14,87 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import asyncio
 import logging
-from typing import Dict, List
+from typing import Any, Dict, List, Literal, Optional
 
 from mcp.server import FastMCP
 from mcp.server.fastmcp import Context
 from pydantic import Field
 from typing_extensions import Annotated
 
+from ..analytics import Direction, GroupBy, TransactionStore
+from ..cache import identity_hash
 from ..client import HTTPClient
 from ..config import ServerConfigs
+from ..filters import FilterCondition, filter_payload, transaction_pushdown
+from ..logging_config import set_log_context
+from ..metrics import register_metrics_source
+from ..projection import AccountView, project_accounts_payload, shape_response
+from ..sync import TransactionSync
 from ..utils import build_request_headers
 
 logger = logging.getLogger(__name__)
 
 
-def register_account_tools(mcp: FastMCP) -> None:
+def register_account_tools(mcp: FastMCP, http_client: HTTPClient, transaction_sync: TransactionSync) -> None:
     """Register account-related tools to the MCP server."""
     logger.info("Registering accounts tools...")
 
     configs: ServerConfigs = ServerConfigs()
-    http_client: HTTPClient = HTTPClient(configs=configs)
+    transaction_store: TransactionStore = TransactionStore(max_accounts=configs.analytics_max_accounts)
+    register_metrics_source("transaction_store", transaction_store.stats)
+
+    async def sync_transactions(headers: Dict[str, str], identity: str, account_id: str) -> Any:
+        """Return an account's full transaction history through its incrementally synced log."""
+        transactions_url: str = f"{configs.server_url.rstrip('/')}/accounts/{account_id}/transactions"
+
+        async def fetch(params: Optional[Dict[str, str]]) -> Any:
+            logger.info("Syncing transactions from URL: %s with params: %s", transactions_url, params)
+            return await http_client.get(url=transactions_url, headers=headers, params=params)
+
+        return await transaction_sync.transactions(identity, account_id, fetch)
+
+    async def fetch_accounts(
+            headers: Dict[str, str],
+            account_id: str,
+            sub_resource: str,
+            filters: Optional[List[FilterCondition]],
+            limit: int,
+    ) -> Any:
+        """Fetch an accounts resource and apply filters, pushing supported ones to the backend."""
+        accounts_url: str = configs.server_url.rstrip("/") + "/accounts"
+        if account_id:
+            accounts_url += f"/{account_id}"
+
+        if sub_resource:
+            accounts_url += f"/{sub_resource}"
+
+        # Serve full transaction histories from the account's local log, fetching only
+        # the delta since its high-water mark. Filtered first reads still use pushdown
+        # rather than downloading the whole history.
+        if sub_resource == "transactions" and account_id and configs.sync_enabled:
+            identity = identity_hash(headers.get("Authorization")) or "anonymous"
+            if not filters or transaction_sync.has_log(identity, account_id):
+                result = await sync_transactions(headers, identity, account_id)
+                if isinstance(result, dict) and "error" in result:
+                    return result
+                return filter_payload(result, filters, limit)
+
+        # Push supported transaction conditions down to the backend as query params;
+        # every condition is still evaluated locally, so pushdown only has to narrow
+        params: Dict[str, str] = {}
+        if sub_resource == "transactions" and filters:
+            params, exact = transaction_pushdown(filters)
+            if exact and limit > 0:
+                params["limit"] = str(limit)
+
+        logger.info("Fetching accounts from URL: %s with params: %s", accounts_url, params)
+        result = await http_client.get(url=accounts_url, headers=headers, params=params or None)
+        if isinstance(result, dict) and "error" in result:
+            return result
+
+        return filter_payload(result, filters, limit)
 
     @mcp.tool(
         description=(
@@ -61,6 +121,35 @@ def register_account_tools(mcp: FastMCP) -> None:
                     description="Specifies the type of account sub-resource to retrieve for the given account. Currently supports 'transactions'."
                 ),
             ] = "",
+            filters: Annotated[
+                Optional[List[FilterCondition]],
+                Field(
+                    description=(
+                        "Optional filter conditions; a record is returned only if it matches all of them. "
+                        "Applies to the accounts when no 'account_id' is given, otherwise to the account's transactions. "
+                        "Example: [{'field': 'CreditDebitIndicator', 'op': 'eq', 'value': 'Debit'}, "
+                        "{'field': 'BookingDateTime', 'op': 'gte', 'value': '2025-01-01'}]."
+                    )
+                ),
+            ] = None,
+            limit: Annotated[
+                int,
+                Field(description="Maximum number of records to return after filtering. 0 returns all matches."),
+            ] = 0,
+            view: Annotated[
+                AccountView,
+                Field(
+                    description=(
+                        "Response shape. 'full' (default): the raw Open Banking payload; 'compact': key fields, "
+                        "available balance and the latest transactions; 'balances': balances only; 'transactions': "
+                        "latest transactions with id, date, signed amount and description."
+                    )
+                ),
+            ] = "full",
+            last_n: Annotated[
+                int,
+                Field(description="Number of latest transactions to include per account in 'compact' and 'transactions' views."),
+            ] = 5,
     ) -> Annotated[
         Dict | List,
         Field(
@@ -68,21 +157,208 @@ def register_account_tools(mcp: FastMCP) -> None:
                     "A dictionary containing account information as returned by the Open Banking API. "
                     "Includes account balances, account numbers, and other metadata. "
                     "If 'account_id' is provided, returns details for that account; otherwise, returns all accounts. "
-                    "Results are filtered by the provided filter conditions if any."
+                    "Results are filtered by the provided filter conditions if any. "
+                    "Unless 'view' is 'full', the result is {'data': ..., 'meta': {...}} with a projected payload."
             )
         ),
     ]:
         """Fetch accounts from the Open Banking API."""
-        accounts_url: str = configs.server_url.rstrip("/") + "/accounts"
-        if account_id:
-            accounts_url += f"/{account_id}"
+        set_log_context(tool="get_user_accounts")
+        headers = build_request_headers(ctx, configs)
 
-        if sub_resource:
-            accounts_url += f"/{sub_resource}"
+        result = await fetch_accounts(headers, account_id, sub_resource, filters, limit)
+        return shape_response(
+            "get_user_accounts",
+            result,
+            lambda payload: project_accounts_payload(payload, view, last_n),
+            view=view,
+            max_bytes=configs.projection_max_bytes,
+        )
+
+    @mcp.tool(
+        description=(
+                "Retrieves several accounts and/or their transactions in a single call, fetched concurrently. "
+                "Use this tool instead of repeated get_user_accounts calls when comparing or reviewing more than one account. "
+                "Each item in the result carries either 'data' or an 'error', so one failing or slow account does not "
+                "prevent the others from being returned."
+        )
+    )
+    async def get_user_accounts_batch(
+            ctx: Context,
+            account_ids: Annotated[
+                List[str],
+                Field(description="Logical IDs of the accounts to fetch."),
+            ],
+            sub_resources: Annotated[
+                List[Literal["account", "transactions"]],
+                Field(
+                    description=(
+                        "What to fetch for every account: 'account' for account details and balances, "
+                        "'transactions' for its transactions. Each combination is fetched concurrently."
+                    )
+                ),
+            ] = ["account"],
+            filters: Annotated[
+                Optional[List[FilterCondition]],
+                Field(description="Optional filter conditions applied to every account's transactions, as in get_user_accounts."),
+            ] = None,
+            limit: Annotated[
+                int,
+                Field(description="Maximum number of transactions per item after filtering. 0 returns all matches."),
+            ] = 0,
+            view: Annotated[
+                AccountView,
+                Field(description="Response shape per item, as in get_user_accounts."),
+            ] = "compact",
+            last_n: Annotated[
+                int,
+                Field(description="Number of latest transactions to include per account in 'compact' and 'transactions' views."),
+            ] = 5,
+    ) -> Annotated[
+        Dict,
+        Field(
+            description=(
+                    "Per-item results as a list of {'account_id', 'sub_resource', 'data' | 'error'} together with "
+                    "succeeded and failed counts. Unless 'view' is 'full', wrapped as {'data': ..., 'meta': {...}}."
+            )
+        ),
+    ]:
+        """Fetch several accounts and sub-resources concurrently with bounded parallelism."""
+        set_log_context(tool="get_user_accounts_batch")
+        headers = build_request_headers(ctx, configs)
+
+        items = [
+            (account_id, sub_resource)
+            for account_id in dict.fromkeys(account_ids)
+            for sub_resource in dict.fromkeys(sub_resources)
+        ]
+        if len(items) > configs.batch_max_items:
+            return {
+                "error": f"Too many items requested ({len(items)}); the maximum per batch is {configs.batch_max_items}."
+            }
+
+        semaphore = asyncio.Semaphore(configs.batch_max_concurrency)
+
+        async def fetch_item(account_id: str, sub_resource: str) -> Dict[str, Any]:
+            item: Dict[str, Any] = {"account_id": account_id, "sub_resource": sub_resource}
+            path = "transactions" if sub_resource == "transactions" else ""
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        fetch_accounts(headers, account_id, path, filters, limit),
+                        timeout=configs.batch_item_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    logger.info("Batch item %s/%s timed out", account_id, sub_resource)
+                    item["error"] = f"Timed out after {configs.batch_item_timeout} seconds."
+                    return item
+            if isinstance(result, dict) and "error" in result:
+                item["error"] = result["error"]
+            else:
+                item["data"] = result
+            return item
+
+        results = await asyncio.gather(*(fetch_item(account_id, sub) for account_id, sub in items))
+        failed = sum(1 for item in results if "error" in item)
+        logger.info("Batch fetched %d items, %d failed", len(results), failed)
 
+        def project(batch: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                **batch,
+                "results": [
+                    {**item, "data": project_accounts_payload(item["data"], view, last_n)} if "data" in item else dict(item)
+                    for item in batch["results"]
+                ],
+            }
+
+        return shape_response(
+            "get_user_accounts_batch",
+            {"results": list(results), "succeeded": len(results) - failed, "failed": failed},
+            project,
+            view=view,
+            max_bytes=configs.projection_max_bytes,
+        )
+
+    @mcp.tool(
+        description=(
+                "Summarizes an account's transactions with server-side aggregation instead of returning raw transactions. "
+                "Use this tool for spending and income questions such as 'how much did I spend on groceries last month', "
+                "'top merchants this year' or 'monthly spending trend'. "
+                "Groups by 'category', 'merchant', 'day', 'week', 'month' or 'none', and returns total, count and average per group."
+        )
+    )
+    async def summarize_transactions(
+            ctx: Context,
+            account_id: Annotated[
+                str,
+                Field(description="The logical ID of the account whose transactions to summarize."),
+            ],
+            group_by: Annotated[
+                GroupBy,
+                Field(description="Dimension to group by: 'category', 'merchant', 'day', 'week', 'month' or 'none'."),
+            ] = "category",
+            direction: Annotated[
+                Direction,
+                Field(description="'debit' for spending, 'credit' for income, or 'all'."),
+            ] = "debit",
+            start_date: Annotated[
+                str,
+                Field(description="Inclusive start date (YYYY-MM-DD). Leave blank for no lower bound."),
+            ] = "",
+            end_date: Annotated[
+                str,
+                Field(description="Inclusive end date (YYYY-MM-DD). Leave blank for no upper bound."),
+            ] = "",
+            top_n: Annotated[
+                int,
+                Field(description="Maximum number of groups to return (largest totals, or latest date buckets)."),
+            ] = 10,
+            currency: Annotated[
+                str,
+                Field(description="Currency to summarize (e.g. USD). Required only if the account has "
+                                  "transactions in several currencies."),
+            ] = "",
+    ) -> Annotated[
+        Dict,
+        Field(
+            description=(
+                    "Compact aggregate table with 'columns' and 'rows' (group, total, count, average), "
+                    "plus the overall total and number of matching transactions."
+            )
+        ),
+    ]:
+        """Aggregate an account's transactions over a per-identity columnar store."""
+        set_log_context(tool="summarize_transactions")
+        transactions_url: str = f"{configs.server_url.rstrip('/')}/accounts/{account_id}/transactions"
         headers = build_request_headers(ctx, configs)
+        identity = identity_hash(headers.get("Authorization")) or "anonymous"
 
-        logger.info(f"Fetching accounts from URL: {accounts_url} with headers: {headers}")
-        return http_client.get(url=accounts_url, headers=headers)
+        logger.info("Summarizing transactions from URL: %s by %s", transactions_url, group_by)
+        if configs.sync_enabled:
+            result = await sync_transactions(headers, identity, account_id)
+        else:
+            result = await http_client.get(url=transactions_url, headers=headers)
+        if isinstance(result, dict) and "error" in result:
+            return result
 
-    logger.info("Account tools registered successfully. ")
+        transactions = result.get("transactions") if isinstance(result, dict) else result
+        if not isinstance(transactions, list):
+            return {"error": f"Unexpected transactions payload for account {account_id}"}
+
+        try:
+            columns = transaction_store.columns(identity, account_id, transactions)
+            summary = columns.summarize(
+                group_by=group_by,
+                direction=direction,
+                start_date=start_date,
+                end_date=end_date,
+                top_n=top_n,
+                currency=currency,
+            )
+        except ValueError as e:
+            return {"error": f"Invalid summary request: {e}"}
+        return {"account_id": account_id, **summary}
+
+    logger.info(
+        "Account tools registered successfully: get_user_accounts, get_user_accounts_batch, summarize_transactions. "
+    )
@@ -14,9 +14,12 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import asyncio
 import logging
 from typing import Dict, List
 
+import numpy as np
+
 from mcp.server import FastMCP
 from mcp.server.fastmcp import Context
 from pydantic import Field
@@ -24,17 +27,22 @@ from typing_extensions import Annotated
 
 from ..client import HTTPClient
 from ..config import ServerConfigs
+from ..loans import CatalogCache, RankBy, age_on
+from ..logging_config import set_log_context
+from ..metrics import register_metrics_source
+from ..projection import ProductView, project_products, shape_response
 from ..utils import build_request_headers
 
 logger = logging.getLogger(__name__)
 
 
-def register_bank_tools(mcp: FastMCP) -> None:
+def register_bank_tools(mcp: FastMCP, http_client: HTTPClient) -> None:
     """Register bank tools to the MCP server."""
     logger.info("Registering bank tools...")
 
     configs: ServerConfigs = ServerConfigs()
-    http_client: HTTPClient = HTTPClient(configs=configs)
+    catalog_cache: CatalogCache = CatalogCache()
+    register_metrics_source("loan_catalog", catalog_cache.stats)
 
     @mcp.tool(
         description=(
@@ -44,7 +52,7 @@ def register_bank_tools(mcp: FastMCP) -> None:
                 "Pass 'product_id' to get specific product details, or leave blank to retrieve all available products for comparison."
         )
     )
-    def get_bank_products(
+    async def get_bank_products(
             ctx: Context,
             product_id: Annotated[
                 str,
@@ -56,6 +64,15 @@ def register_bank_tools(mcp: FastMCP) -> None:
                     )
                 ),
             ] = "",
+            view: Annotated[
+                ProductView,
+                Field(
+                    description=(
+                        "Response shape. 'full' (default): the raw product payload including features and URLs; "
+                        "'compact': rate, rate range, amount range, terms, eligibility and non-zero fees per product."
+                    )
+                ),
+            ] = "full",
     ) -> Annotated[
         Dict | List,
         Field(
@@ -64,19 +81,131 @@ def register_bank_tools(mcp: FastMCP) -> None:
                     "- Product details (name, type, description) "
                     "- Interest rates (fixed/variable, min/max rates, representative APR) "
                     "- Loan terms (min/max amounts, repayment periods) "
+                    "Unless 'view' is 'full', wrapped as {'data': ..., 'meta': {...}}."
             )
         ),
     ]:
         """Fetch banking products and loan information from the Open Banking API."""
+        set_log_context(tool="get_bank_products")
         products_url: str = configs.server_url.rstrip("/") + "/products"
         if product_id:
             products_url += f"/{product_id}"
 
         headers = build_request_headers(ctx, configs)
 
-        logger.info(
-            f"Fetching products from URL: {products_url} with headers: {headers}"
+        logger.info("Fetching products from URL: %s", products_url)
+        result = await http_client.get(url=products_url, headers=headers)
+        return shape_response(
+            "get_bank_products",
+            result,
+            lambda payload: project_products(payload, view),
+            view=view,
+            max_bytes=configs.projection_max_bytes,
+        )
+
+    @mcp.tool(
+        description=(
+                "Compares every loan product in the catalog for a requested amount across a range of repayment terms "
+                "and returns a ranked shortlist of the options the user is eligible for. "
+                "Use this tool for loan affordability and comparison questions such as 'which loan is cheapest for 20,000 "
+                "over 3 to 5 years' or 'what would my monthly payment be'. "
+                "Computes monthly payment, total interest, upfront fees, total cost and fee-inclusive APR per option, "
+                "and checks amount and term limits, income, credit score, age, employment and affordability "
+                "against the user's profile."
+        )
+    )
+    async def compare_loans(
+            ctx: Context,
+            amount: Annotated[
+                float,
+                Field(description="Loan amount to borrow.", gt=0),
+            ],
+            min_term_months: Annotated[
+                int,
+                Field(description="Shortest repayment term to consider, in months. 0 uses the catalog's shortest term."),
+            ] = 0,
+            max_term_months: Annotated[
+                int,
+                Field(description="Longest repayment term to consider, in months. 0 uses the catalog's longest term."),
+            ] = 0,
+            term_step_months: Annotated[
+                int,
+                Field(description="Step between evaluated terms, in months (e.g. 12 for whole years).", ge=1),
+            ] = 1,
+            annual_income: Annotated[
+                float,
+                Field(description="Annual income to assess affordability with. 0 uses the income in the user's profile."),
+            ] = 0,
+            product_type: Annotated[
+                str,
+                Field(description="Restrict to one product type, e.g. 'PersonalLoan', 'CarLoan' or 'Mortgage'. Blank for all."),
+            ] = "",
+            rank_by: Annotated[
+                RankBy,
+                Field(description="Ranking: 'total_cost' (interest plus fees), 'monthly_payment' or 'apr'."),
+            ] = "total_cost",
+            top_n: Annotated[
+                int,
+                Field(description="Maximum number of options to return."),
+            ] = 10,
+    ) -> Annotated[
+        Dict,
+        Field(
+            description=(
+                    "Ranked shortlist as 'columns' and 'rows' (product, term, monthly payment, total interest, fees, "
+                    "total cost, rate and APR), the number of combinations evaluated and eligible, and the reasons "
+                    "each ineligible product was excluded."
+            )
+        ),
+    ]:
+        """Rank loan options for an amount over a term range against the user's profile."""
+        set_log_context(tool="compare_loans")
+        headers = build_request_headers(ctx, configs)
+        base_url: str = configs.server_url.rstrip("/")
+
+        logger.info("Comparing loans for amount %s over terms %s-%s", amount, min_term_months, max_term_months)
+        products, profile = await asyncio.gather(
+            http_client.get(url=base_url + "/products", headers=headers),
+            http_client.get(url=base_url + "/me", headers=headers),
+        )
+        if isinstance(products, dict) and "error" in products:
+            return products
+        if not isinstance(products, list):
+            return {"error": "Unexpected products payload"}
+        if isinstance(profile, dict) and "error" in profile:
+            logger.info("User profile unavailable for loan comparison: %s", profile["error"])
+            profile = {}
+
+        employment = profile.get("employment") or {}
+        financial = profile.get("financialProfile") or {}
+        income = annual_income or float(employment.get("annualIncome") or 0)
+        if income <= 0:
+            return {"error": "Annual income is unknown; ask the user for it and pass 'annual_income'."}
+
+        catalog = catalog_cache.catalog(products)
+        lowest, highest = catalog.term_bounds()
+        terms = np.arange(min_term_months or lowest, (max_term_months or highest) + 1, term_step_months)
+        if terms.size == 0:
+            return {"error": "Invalid term range: 'min_term_months' must not exceed 'max_term_months'."}
+        if terms.size > configs.loan_max_terms:
+            return {
+                "error": f"Too many terms requested ({terms.size}); the maximum is {configs.loan_max_terms}. "
+                         f"Narrow the range or increase 'term_step_months'."
+            }
+
+        credit_score = financial.get("creditScore")
+        return catalog.compare(
+            amount=amount,
+            terms=terms,
+            annual_income=income,
+            credit_score=float(credit_score) if credit_score is not None else None,
+            age=age_on((profile.get("personalInfo") or {}).get("dateOfBirth", "")),
+            employment_status=employment.get("status"),
+            monthly_expenses=float(financial.get("monthlyExpenses") or 0),
+            max_payment_ratio=configs.loan_max_payment_ratio,
+            product_type=product_type,
+            rank_by=rank_by,
+            top_n=top_n,
         )
-        return http_client.get(url=products_url, headers=headers)
 
-    logger.info("Bank tools registered successfully: get_bank_products. ")
+    logger.info("Bank tools registered successfully: get_bank_products, compare_loans. ")
@@ -15,46 +15,31 @@
 # under the License.
 
 import logging
+import time
 import uuid
-from datetime import datetime
-from io import BytesIO
-from typing import Optional, Dict
+from datetime import datetime, timezone
+from typing import Any, Optional
 
 from mcp.server import FastMCP
 from mcp.server.fastmcp import Context
 from pydantic import BaseModel, Field
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from typing_extensions import Annotated
 
-from ..client import HTTPClient
+from ..cache import identity_hash
 from ..config import ServerConfigs
-from ..utils import save, build_request_headers
+from ..keyed_lock import KeyedLock
+from ..logging_config import set_log_context
+from ..metrics import register_metrics_source
+from ..outbox import DEAD, DEFER, DELIVER, DISCARD, PENDING, OutboxEntry, PaymentOutbox
+from ..payment_models import PaymentContext, PaymentRequest
+from ..payment_store import AUTHORIZED, COMPLETED, DECLINED, INITIATED, PaymentRecord, PaymentStore
+from ..receipts import ReceiptService
+from ..sync import TransactionSync
+from ..utils import build_request_headers
 
 logger = logging.getLogger(__name__)
 
 
-class Party(BaseModel):
-    """Represents sender or beneficiary details."""
-
-    account_id: str = Field(default="", description="Account ID of the party")
-    name: str = Field(default="", description="Name of the party")
-    bank_name: str = Field(default="", description="Name of the bank where the party holds the account")
-
-
-class PaymentRequest(BaseModel):
-    """Represents initial payment request details."""
-
-    currency: str = Field(description="Currency of the payment amount (e.g., USD, EUR)")
-    amount: float = Field(description="Payment amount")
-    sender: Party = Field(description="Sender party details")
-    beneficiary: Party = Field(description="Beneficiary party details")
-    remarks: str = Field(description="Payment remarks or reference")
-
-
 class ConsentRequest(BaseModel):
     """Represents user's consent for a payment."""
 
@@ -75,23 +60,50 @@ class OTPRequest(BaseModel):
     otp: str = Field(description="OTP provided by user")
 
 
-class PaymentContext(PaymentRequest):
-    """Represents the payment context stored in cache."""
+def register_payment_tools(
+        mcp: FastMCP,
+        transaction_sync: TransactionSync,
+        payment_store: PaymentStore,
+        payment_outbox: PaymentOutbox,
+        receipt_service: ReceiptService,
+) -> None:
+    """Register payment-related tools to the MCP server."""
+    logger.info("Registering payment tools...")
 
-    transaction_id: Optional[str] = None
-    otp: Optional[str] = None
+    configs: ServerConfigs = ServerConfigs()
 
+    def record_delivered(entry: OutboxEntry, result: Any) -> None:
+        """Swap the backend's record of a delivered payment into the synced logs of its account."""
+        if isinstance(result, dict) and "error" not in result and result.get("TransactionId"):
+            transaction_sync.reconcile(entry.body["sender"]["account_id"], result)
 
-# Payment cache storage
-payment_cache: Dict[str, PaymentContext] = {}
+    payment_outbox.add_listener(record_delivered)
 
+    async def check_unreleased(entry: OutboxEntry) -> str:
+        """Post a record whose verify never released it only if the payment did complete."""
+        payment_record: Optional[PaymentRecord] = await payment_store.get(entry.idempotency_key)
+        if payment_record is None:
+            # Completed and expired, or never completed: the local state cannot tell
+            return DEAD
+        if payment_record.state == COMPLETED:
+            return DELIVER
+        if payment_record.state == AUTHORIZED:
+            # A verify may still be completing it, or the user may retry one
+            return DEFER
+        # Declined meanwhile, or the verify that queued it crashed before completing it
+        await receipt_service.discard(entry.idempotency_key)
+        return DISCARD
 
-def register_payment_tools(mcp: FastMCP) -> None:
-    """Register payment-related tools to the MCP server."""
-    logger.info("Registering payment tools...")
+    payment_outbox.set_hold_check(check_unreleased)
 
-    configs: ServerConfigs = ServerConfigs()
-    http_client: HTTPClient = HTTPClient(configs=configs)
+    # Steps on one payment run one at a time; steps on different payments never wait on each other
+    payment_locks: KeyedLock = KeyedLock()
+    replays: int = 0
+
+    def verify_stats() -> dict[str, int]:
+        return {**payment_locks.stats(), "replays": replays}
+
+    register_metrics_source("payment_verify", verify_stats)
 
     @mcp.tool(
         description=(
@@ -117,16 +129,15 @@ def register_payment_tools(mcp: FastMCP) -> None:
         """Initiate a payment transaction and return transaction ID for authorization."""
 
         transaction_id: str = str(uuid.uuid4())
-        logger.info(f"[TID: {transaction_id}] Payment initiated with details.")
+        set_log_context(tool="payment_initiate", transaction_id=transaction_id)
+        logger.info("[TID: %s] Payment initiated with details.", transaction_id)
 
-        # Store payment context in cache with transaction ID as key for payment_authorize tool
+        # Store payment state with transaction ID as key for payment_authorize tool
         request.sender.bank_name = "Finthesis Bank"
-        payment_cache[transaction_id] = PaymentContext(
-            **request.model_dump(), transaction_id=transaction_id
-        )
-        logger.info(
-            f"[TID: {transaction_id}] Payment context stored. Ready for authorization."
+        await payment_store.put(
+            PaymentRecord.from_dict({**request.model_dump(), "transaction_id": transaction_id})
         )
+        logger.info("[TID: %s] Payment context stored. Ready for authorization.", transaction_id)
 
         return (
             f"Payment initiated successfully. Transaction ID: {transaction_id}\n"
@@ -160,50 +171,55 @@ def register_payment_tools(mcp: FastMCP) -> None:
         Field(description="Message confirming the payment authorization outcome. "),
     ]:
         """Authorize payment and generate OTP if consented."""
+        set_log_context(tool="payment_authorize", transaction_id=request.transaction_id)
         logger.info(
-            f"[TID: {request.transaction_id}] Authorization request received. Consent: {request.consent}"
+            "[TID: %s] Authorization request received. Consent: %s", request.transaction_id, request.consent
         )
 
+        # Serialized with verifies, so a decline cannot slip in while a payment is being completed
+        async with payment_locks.hold(request.transaction_id):
+            return await authorize_payment(request)
+
+    async def authorize_payment(request: ConsentRequest) -> str:
+        """Record the user's consent decision for an initiated or authorized payment."""
         # Validate transaction
-        error_message, payment_context = _validate_transaction_id(
-            request.transaction_id
+        error_message, payment_record = await _validate_transaction_id(
+            payment_store, request.transaction_id
         )
         if error_message:
             return error_message
 
-        # At this point, payment_context is guaranteed to be non-None
-        assert payment_context is not None
+        # At this point, payment_record is guaranteed to be non-None
+        assert payment_record is not None
 
         if request.consent is None:
-            logger.info(
-                f"[TID: {request.transaction_id}] User has not yet provided authorization."
-            )
+            logger.info("[TID: %s] User has not yet provided authorization.", request.transaction_id)
             response: str = (
                 f"Payment authorization pending. Transaction ID {request.transaction_id} is waiting for user consent. "
                 f"Please ask the user to confirm or decline the payment."
             )
         elif request.consent is False:
-            logger.info(
-                f"[TID: {request.transaction_id}] User has declined the payment authorization."
-            )
+            logger.info("[TID: %s] User has declined the payment authorization.", request.transaction_id)
+            if await payment_store.transition(request.transaction_id, (INITIATED, AUTHORIZED), DECLINED) is None:
+                return _state_conflict_message(request.transaction_id)
             response: str = (
                 f"Payment declined by user. Transaction ID {request.transaction_id} has been cancelled. "
                 f"No funds have been transferred."
             )
         else:
             logger.info(
-                f"[TID: {request.transaction_id}] User has authorized the payment. Processing transaction."
+                "[TID: %s] User has authorized the payment. Processing transaction.", request.transaction_id
             )
             # Generate OTP using current month and date (DDMM format)
             otp: str = datetime.now().strftime("%d%m")
 
-            logger.info(
-                f"[TID: {request.transaction_id}] OTP generated for payment verification: {otp}"
-            )
+            logger.info("[TID: %s] OTP generated for payment verification.", request.transaction_id)
 
-            # Store OTP in payment context
-            payment_context.otp = otp
-            payment_cache[request.transaction_id] = payment_context
+            # Store OTP with the authorized payment state
+            if await payment_store.transition(
+                    request.transaction_id, (INITIATED, AUTHORIZED), AUTHORIZED, otp=otp
+            ) is None:
+                return _state_conflict_message(request.transaction_id)
 
             response: str = (
                 f"Payment authorized! An OTP sent to the user's email and phone for two-factor verification.\n"
@@ -211,7 +227,7 @@ def register_payment_tools(mcp: FastMCP) -> None:
                 f"To complete the payment, ask the user for the OTP and use the payment_otp_verify tool next. "
             )
 
-        logger.info(f"[TID: {request.transaction_id}] Authorization request processed.")
+        logger.info("[TID: %s] Authorization request processed.", request.transaction_id)
         return response
 
     @mcp.tool(
@@ -235,182 +251,154 @@ def register_payment_tools(mcp: FastMCP) -> None:
         Field(description="Transaction receipt with PDF or error message"),
     ]:
         """Confirm payment by verifying OTP and complete the transaction."""
-        logger.info(
-            f"[TID: {request.transaction_id}] OTP verification request received. OTP: {request.otp}"
-        )
+        set_log_context(tool="payment_otp_verify", transaction_id=request.transaction_id)
+        logger.info("[TID: %s] OTP verification request received.", request.transaction_id)
+
+        # Verifies of one payment run one at a time, so a repeated or concurrent call
+        # sees the first one's outcome; verifies of other payments are not held up.
+        async with payment_locks.hold(request.transaction_id):
+            return await verify_otp(ctx, request)
+
+    async def verify_otp(ctx: Context, request: OTPRequest) -> str:
+        """Complete an authorized payment once and replay its result afterwards."""
+        nonlocal replays
 
         # Validate transaction
-        error_message, payment_context = _validate_transaction_id(
-            request.transaction_id
+        error_message, payment_record = await _validate_transaction_id(
+            payment_store, request.transaction_id
         )
         if error_message:
             return error_message
 
-        # At this point, payment_context is guaranteed to be non-None
-        assert payment_context is not None
+        # At this point, payment_record is guaranteed to be non-None
+        assert payment_record is not None
 
         # Verify OTP
-        if request.otp != payment_context.otp:
-            logger.info(
-                f"[TID: {request.transaction_id}] OTP verification failed. "
-                f"Expected: {payment_context.otp}, Got: {request.otp}"
-            )
+        if payment_record.otp is None or request.otp != payment_record.otp:
+            logger.info("[TID: %s] OTP verification failed.", request.transaction_id)
             return (
                 f"OTP verification failed. The OTP you entered is incorrect. "
                 f"Please ask the user for the correct OTP and try again."
             )
-        else:
-            logger.info(
-                f"[TID: {request.transaction_id}] OTP verified successfully. Payment completed."
-            )
 
-            transactions_url: str = (
-                f"{configs.server_url.rstrip('/')}/accounts/{payment_context.sender.account_id}/transactions"
-            )
-
-            headers: dict = build_request_headers(ctx, configs)
-
-            logger.info(
-                f"[TID: {request.transaction_id}] Recording transaction at URL: {transactions_url} with headers: {headers}"
-            )
-            http_client.post(
-                url=transactions_url, json=payment_context.model_dump(), headers=headers
-            )
+        # Already completed: return the first completion's result with no further
+        # backend write or receipt work
+        if payment_record.state == COMPLETED and payment_record.result:
+            replays += 1
+            logger.info("[TID: %s] Payment already completed; replaying result.", request.transaction_id)
+            return payment_record.result
+        if payment_record.state != AUTHORIZED:
+            return _state_conflict_message(request.transaction_id)
+
+        payment_context = PaymentContext.model_validate(payment_record.as_dict())
+        result: str = (
+            f"Payment completed successfully!\n"
+            f"From: {payment_context.sender.name} ({payment_context.sender.account_id})\n"
+            f"To: {payment_context.beneficiary.name} ({payment_context.beneficiary.account_id}) - {payment_context.beneficiary.bank_name}\n"
+            f"Amount: {payment_context.amount} {payment_context.currency}\n\n"
+            f"Transaction receipt is ready to download. Ask the user to click and download it as an attachment:\n"
+            f"{configs.mcp_server_url.rstrip('/')}/transactions/{payment_context.transaction_id}/receipt"
+        )
 
-            # Generate PDF receipt and persist to disk
-            try:
-                logger.info(
-                    f"[TID: {request.transaction_id}] Receipt PDF generation started."
-                )
-                pdf_buffer: BytesIO = await _generate_receipt_pdf(payment_context)
-                receipt_file_path: str = await save(payment_context.transaction_id, pdf_buffer)
-                logger.info(
-                    f"[TID: {request.transaction_id}] Receipt PDF persisted to: {receipt_file_path}"
-                )
-            except Exception as e:
-                logger.error(
-                    f"[TID: {request.transaction_id}] Failed to generate/persist PDF: {str(e)}"
-                )
+        transactions_url: str = (
+            f"{configs.server_url.rstrip('/')}/accounts/{payment_context.sender.account_id}/transactions"
+        )
 
+        # Keys the payer's synced transaction log
+        identity: str = identity_hash(build_request_headers(ctx, configs).get("Authorization")) or "anonymous"
+
+        # Queue the backend write durably before the payment is marked completed, so a
+        # reported success always has its record queued. The outbox posts it in the
+        # background with the server's credentials and retries failures; queueing is
+        # keyed on the transaction ID, so a verify retried after a failure here reuses
+        # the entry it queued. The entry is held until the payment is completed, so it
+        # can be withdrawn if that fails. Neither the OTP nor the user's token is stored.
+        logger.info("[TID: %s] Queueing transaction record for URL: %s", request.transaction_id, transactions_url)
+        try:
+            queued: bool = await payment_outbox.enqueue(
+                payment_context.transaction_id,
+                transactions_url,
+                payment_context.model_dump(exclude={"otp"}),
+                {},
+                held=True,
+            ) or await payment_outbox.state(payment_context.transaction_id) == PENDING
+        except Exception as e:
+            logger.error("[TID: %s] Failed to queue transaction record: %s", request.transaction_id, e)
+            return _completion_failed_message(request.transaction_id)
+        if not queued:
+            # A record under this ID was parked as dead; never confirm a payment that will not be recorded
+            logger.error("[TID: %s] Transaction record is dead-lettered; not completing.", request.transaction_id)
             return (
-                f"Payment completed successfully!\n"
-                f"From: {payment_context.sender.name} ({payment_context.sender.account_id})\n"
-                f"To: {payment_context.beneficiary.name} ({payment_context.beneficiary.account_id}) - {payment_context.beneficiary.bank_name}\n"
-                f"Amount: {payment_context.amount} {payment_context.currency}\n\n"
-                f"Transaction receipt is ready to download. Ask the user to click and download it as an attachment:\n"
-                f"{configs.mcp_server_url.rstrip('/')}/transactions/{payment_context.transaction_id}/receipt"
+                f"Error: Payment {request.transaction_id} could not be recorded by the bank. "
+                f"No funds have been transferred. Please start a new payment."
             )
 
-    logger.info(
-        "Payment tools registered successfully: payment_initiate, payment_authorize, payment_otp_verify."
-    )
-
-
-async def _generate_receipt_pdf(payment_context: PaymentContext) -> BytesIO:
-    """
-    Generate a transaction receipt PDF in memory.
-
-    Args:
-        payment_context: Payment context with transaction details
-
-    Returns:
-        BytesIO buffer containing the PDF data
-    """
-    buffer: BytesIO = BytesIO()
-    doc: SimpleDocTemplate = SimpleDocTemplate(
-        buffer, 
-        pagesize=letter, 
-        topMargin=0.5 * inch, 
-        bottomMargin=0.5 * inch,
-        title=f"Transaction Receipt - {payment_context.transaction_id}",
-        author="Banking MCP Server",
-        subject=f"Transaction Receipt for {payment_context.transaction_id}",
-        creator="AI Banking Assistant",
-        producer="ReportLab"
-    )
-
-    # Styles
-    styles: getSampleStyleSheet = getSampleStyleSheet()
-    title_style: ParagraphStyle = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=18,
-        textColor=colors.HexColor("#1f4788"),
-        spaceAfter=12,
-        alignment=1,  # Center
-    )
-
-    footer_style: ParagraphStyle = ParagraphStyle(
-        "CustomFooter",
-        parent=styles["Normal"],
-        fontSize=9,
-        textColor=colors.HexColor("#cccccc"),  # Light grey
-        alignment=1,  # Center
-    )
-
-    # Content
-    elements: list = [
-        Paragraph("TRANSACTION RECEIPT", title_style),
-        Spacer(1, 0.2 * inch),
-    ]
-
-    # Transaction details table
-    data: list = [
-        ["Transaction ID:", payment_context.transaction_id],
-        ["Date & Time:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-        ["Status:", "Completed"],
-        ["", ""],
-        ["From:", payment_context.sender.name],
-        ["From Bank:", payment_context.sender.bank_name],
-        ["From Account:", payment_context.sender.account_id],
-        ["", ""],
-        ["To:", payment_context.beneficiary.name],
-        ["To Bank:", payment_context.beneficiary.bank_name],
-        ["To Account:", payment_context.beneficiary.account_id],
-        ["", ""],
-        ["Amount:", f"{payment_context.amount} {payment_context.currency}"],
-        ["Remarks:", payment_context.remarks],
-    ]
-
-    table: Table = Table(data, colWidths=[2 * inch, 4 * inch])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
-                ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("GRID", (0, 0), (-1, -1), 1, colors.grey),
-            ]
+        # Keep the receipt details beyond the payment record's lifetime; the receipt
+        # itself is rendered on its first download
+        completed_at: float = time.time()
+        try:
+            await receipt_service.record(payment_context, completed_at)
+        except Exception as e:
+            logger.error("[TID: %s] Failed to store receipt details: %s", request.transaction_id, e)
+            if await _withdraw(request.transaction_id):
+                return _completion_failed_message(request.transaction_id)
+            # Already being posted; complete it, the receipt falls back to the payment record
+
+        # Claim the payment, so a concurrent verify on another worker cannot complete it
+        # twice. The completion time is kept for the receipt and the result for replays.
+        if await payment_store.transition(
+                request.transaction_id, (AUTHORIZED,), COMPLETED, completed_at=completed_at, result=result
+        ) is None:
+            # Lost the claim to another worker; replay its result if it completed
+            winner: Optional[PaymentRecord] = await payment_store.get(request.transaction_id)
+            if winner is not None and winner.state == COMPLETED and winner.result:
+                replays += 1
+                return winner.result
+            # Declined or expired meanwhile: take the queued record back
+            if await _withdraw(request.transaction_id):
+                await receipt_service.discard(request.transaction_id)
+            else:
+                logger.error("[TID: %s] Record of a payment that did not complete may be posted.",
+                             request.transaction_id)
+            return _state_conflict_message(request.transaction_id)
+
+        logger.info("[TID: %s] OTP verified successfully. Payment completed.", request.transaction_id)
+        # Listed in the payer's transactions right away; the backend's record replaces it once delivered
+        transaction_sync.add_pending(
+            identity,
+            payment_context.sender.account_id,
+            _pending_transaction(payment_context, completed_at),
         )
-    )
+        try:
+            await payment_outbox.release(request.transaction_id)
+        except Exception as e:
+            # After one lease period the hold check finds the payment completed and delivers it
+            logger.warning("[TID: %s] Failed to release transaction record: %s", request.transaction_id, e)
+        return result
+
+    async def _withdraw(transaction_id: str) -> bool:
+        """Take back a queued record that no worker has started posting; False if that failed."""
+        try:
+            return await payment_outbox.withdraw(transaction_id)
+        except Exception as e:
+            logger.error("[TID: %s] Failed to withdraw transaction record: %s", transaction_id, e)
+            return False
 
-    elements.append(table)
-    elements.append(Spacer(1, 0.5 * inch))
-    elements.append(
-        Paragraph("This is an electronically generated receipt.", footer_style)
+    logger.info(
+        "Payment tools registered successfully: payment_initiate, payment_authorize, payment_otp_verify."
     )
 
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-
-    return buffer
-
 
-def _validate_transaction_id(
+async def _validate_transaction_id(
+    payment_store: PaymentStore,
     transaction_id: str,
-) -> tuple[Optional[str], Optional[PaymentContext]]:
+) -> tuple[Optional[str], Optional[PaymentRecord]]:
     """
-    Validate transaction ID exists in cache.
+    Validate transaction ID exists in the payment store.
 
     Returns:
-        tuple: (error_message, payment_context) where error_message is None if valid,
-               payment_context is None if invalid.
+        tuple: (error_message, payment_record) where error_message is None if valid,
+               payment_record is None if invalid.
     """
     if not transaction_id:
         error_msg = (
@@ -420,8 +408,8 @@ def _validate_transaction_id(
         logger.info(error_msg)
         return error_msg, None
 
-    payment_context: Optional[PaymentContext] = payment_cache.get(transaction_id)
-    if not payment_context:
+    payment_record: Optional[PaymentRecord] = await payment_store.get(transaction_id)
+    if not payment_record:
         error_msg = (
             f"Error: Invalid transaction ID {transaction_id}. "
             f"Please ensure you use the correct transaction_id from the payment_authorize tool."
@@ -429,4 +417,44 @@ def _validate_transaction_id(
         logger.info(error_msg)
         return error_msg, None
 
-    return None, payment_context
+    return None, payment_record
+
+
+def _pending_transaction(payment_context: PaymentContext, completed_at: float) -> dict[str, Any]:
+    """A completed payment in the backend's transaction shape, for listing before the backend records it."""
+    booked_at: str = datetime.fromtimestamp(completed_at, timezone.utc).isoformat()
+    return {
+        "AccountId": payment_context.sender.account_id,
+        "TransactionId": payment_context.transaction_id,
+        "Amount": {"Amount": str(payment_context.amount), "Currency": payment_context.currency},
+        "CreditDebitIndicator": "Debit",
+        "Status": "PENDING",
+        "BookingDateTime": booked_at,
+        "ValueDateTime": booked_at,
+        "TransactionInformation": payment_context.remarks,
+        "DebtorAccount": {
+            "Identification": payment_context.sender.account_id,
+            "Name": payment_context.sender.name,
+        },
+        "CreditorAccount": {
+            "Identification": payment_context.beneficiary.account_id,
+            "Name": payment_context.beneficiary.name,
+        },
+    }
+
+
+def _completion_failed_message(transaction_id: str) -> str:
+    """Message for a verify that could not durably record the payment; it is safe to retry."""
+    return (
+        f"Error: Payment {transaction_id} could not be completed right now. "
+        f"No funds have been transferred. Please call payment_otp_verify again."
+    )
+
+
+def _state_conflict_message(transaction_id: str) -> str:
+    """Message for a payment that was moved on, declined or expired by another request."""
+    logger.info("[TID: %s] Payment state changed concurrently; step rejected.", transaction_id)
+    return (
+        f"Error: Transaction {transaction_id} can no longer be processed by this step. "
+        f"It may already be completed, declined or expired. Please check its status with the user."
+    )
@@ -22,19 +22,25 @@ from mcp.server.fastmcp import Context
 from pydantic import Field
 from typing_extensions import Annotated
 
+from ..cache import identity_hash
 from ..client import HTTPClient
 from ..config import ServerConfigs
+from ..logging_config import set_log_context
+from ..metrics import register_metrics_source
+from ..payees import PayeeDirectory
+from ..projection import ProfileView, project_profile, shape_response
 from ..utils import build_request_headers
 
 logger = logging.getLogger(__name__)
 
 
-def register_user_tools(mcp: FastMCP) -> None:
+def register_user_tools(mcp: FastMCP, http_client: HTTPClient) -> None:
     """Register user-related tools to the MCP server."""
     logger.info("Registering user tools...")
 
     configs: ServerConfigs = ServerConfigs()
-    http_client: HTTPClient = HTTPClient(configs=configs)
+    payee_directory: PayeeDirectory = PayeeDirectory(max_identities=configs.payee_index_max_identities)
+    register_metrics_source("payee_index", payee_directory.stats)
 
     @mcp.tool(
         description=(
@@ -44,8 +50,17 @@ def register_user_tools(mcp: FastMCP) -> None:
                 "DO NOT use this tool for account balances, transactions, or for general banking product information."
         )
     )
-    def get_user_profile(
+    async def get_user_profile(
             ctx: Context,
+            view: Annotated[
+                ProfileView,
+                Field(
+                    description=(
+                        "Response shape. 'full' (default): the complete profile including preferences and compliance "
+                        "data; 'compact': name, contact, employment, income, credit score and financial summary."
+                    )
+                ),
+            ] = "full",
     ) -> Annotated[
         Dict,
         Field(
@@ -56,17 +71,26 @@ def register_user_tools(mcp: FastMCP) -> None:
                     "- Banking relationship details (customer segment, preferences) "
                     "- Account summary (total balances, available credit) "
                     "- Verification and compliance status "
-                    "- Communication preferences and settings"
+                    "- Communication preferences and settings "
+                    "Unless 'view' is 'full', a compact subset wrapped as {'data': ..., 'meta': {...}}."
             )
         ),
     ]:
         """Fetch user profile information from the /me endpoint."""
+        set_log_context(tool="get_user_profile")
         user_url: str = configs.server_url.rstrip("/") + "/me"
 
         headers = build_request_headers(ctx, configs)
 
-        logger.info(f"Fetching user profile from URL: {user_url} with headers: {headers}")
-        return http_client.get(url=user_url, headers=headers)
+        logger.info("Fetching user profile from URL: %s", user_url)
+        result = await http_client.get(url=user_url, headers=headers)
+        return shape_response(
+            "get_user_profile",
+            result,
+            lambda payload: project_profile(payload, view),
+            view=view,
+            max_bytes=configs.projection_max_bytes,
+        )
 
     @mcp.tool(
         description=(
@@ -85,12 +109,57 @@ def register_user_tools(mcp: FastMCP) -> None:
         ),
     ]:
         """Fetch contact accounts from the API."""
+        set_log_context(tool="get_user_payees")
 
         # Fetch all contact accounts from the API
         contact_accounts_url: str = configs.server_url.rstrip("/") + "/payees"
         headers = build_request_headers(ctx, configs)
 
-        logger.info(f"Fetching payees from URL: {contact_accounts_url}")
-        return http_client.get(url=contact_accounts_url, headers=headers)
+        logger.info("Fetching payees from URL: %s", contact_accounts_url)
+        return await http_client.get(url=contact_accounts_url, headers=headers)
+
+    @mcp.tool(
+        description=(
+                "Finds the user's payees matching a name or account number and returns the best matches with scores. "
+                "Use this tool instead of get_user_payees when the user refers to a payee, e.g. 'pay Alice' or "
+                "'send money to the account ending 4329'. Matching tolerates partial names, accents and typos. "
+                "A score of 1.0 is an exact match; confirm with the user when several matches score similarly."
+        )
+    )
+    async def find_payee(
+            ctx: Context,
+            query: Annotated[
+                str,
+                Field(description="Payee name, part of a name, email name or the trailing digits of an account number."),
+            ],
+            top_k: Annotated[
+                int,
+                Field(description="Maximum number of matches to return."),
+            ] = 5,
+    ) -> Annotated[
+        Dict,
+        Field(
+            description=(
+                    "Ranked matches, each a payee record (name, account number, bank, email) with a 'score' between 0 and 1, "
+                    "together with the total number of payees searched."
+            )
+        ),
+    ]:
+        """Search the user's payees through a per-identity index built from /payees."""
+        set_log_context(tool="find_payee")
+        payees_url: str = configs.server_url.rstrip("/") + "/payees"
+        headers = build_request_headers(ctx, configs)
+
+        logger.info("Searching payees from URL: %s", payees_url)
+        result = await http_client.get(url=payees_url, headers=headers)
+        if isinstance(result, dict) and "error" in result:
+            return result
+        if not isinstance(result, list):
+            return {"error": "Unexpected payees payload"}
+
+        identity = identity_hash(headers.get("Authorization")) or "anonymous"
+        index = payee_directory.index(identity, result)
+        matches = index.search(query, top_k=top_k, min_score=configs.payee_min_score)
+        return {"query": query, "matches": matches, "payees": len(index)}
 
-    logger.info("User tools registered successfully: get_user_profile, get_user_payees. ")
+    logger.info("User tools registered successfully: get_user_profile, get_user_payees, find_payee. ")
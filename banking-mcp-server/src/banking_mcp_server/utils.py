@@ -14,8 +14,6 @@
 # specific language governing permissions and limitations
 # under the License.
 
-from io import BytesIO
-from pathlib import Path
 from typing import Dict
 
 from mcp.server.fastmcp import Context
@@ -47,28 +45,3 @@ def build_request_headers(ctx: Context, configs: ServerConfigs) -> Dict[str, str
 
     return headers
 
-
-async def save(filename: str, buffer: BytesIO, path: str = "/transactions",
-               extension: str = ".pdf") -> str:
-    """
-    Persist a file buffer to disk.
-    
-    Args:
-        filename: Name to use for the persisted file
-        buffer: BytesIO buffer containing file data
-        path: Directory path to save the file
-        extension: File extension for the file (default: .pdf)
-        
-    Returns:
-        File path to the persisted file
-    """
-    # Create receipts directory if it doesn't exist
-    receipts_dir = Path(f"/tmp/ai-banking-agent{path}")
-    receipts_dir.mkdir(parents=True, exist_ok=True)
-
-    # Persist to disk
-    file_path = receipts_dir / f"{filename}{extension}"
-    with open(file_path, 'wb') as f:
-        f.write(buffer.getvalue())
-
-    return str(file_path)
@@ -0,0 +1,229 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .cache import CacheEntry
+from .client import HTTPClient
+from .config import ServerConfigs
+
+logger = logging.getLogger(__name__)
+
+
+class WarmCacheStore:
+    """SQLite store for shared (public) cache entries, read back on startup.
+
+    Only the shared tier is persisted; per-customer responses never touch disk.
+    Expiry is stored as wall-clock time so it survives a restart.
+    """
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT NOT NULL, params TEXT NOT NULL, route TEXT NOT NULL, value TEXT NOT NULL, "
+            "etag TEXT, last_modified TEXT, expires_at REAL NOT NULL, stored_at REAL NOT NULL, "
+            "PRIMARY KEY (url, params))"
+        )
+        return connection
+
+    def load(self, max_age: float) -> list[tuple[str, dict[str, str], CacheEntry]]:
+        """Return stored entries no older than ``max_age`` seconds, with monotonic expiry times."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM entries WHERE stored_at < ?", (now - max_age,))
+            connection.commit()
+            rows = connection.execute(
+                "SELECT url, params, route, value, etag, last_modified, expires_at FROM entries"
+            ).fetchall()
+        finally:
+            connection.close()
+
+        restored = []
+        for url, params, route, value, etag, last_modified, expires_at in rows:
+            entry = CacheEntry(
+                value=json.loads(value),
+                expires_at=time.monotonic() + (expires_at - now),
+                route=route,
+                etag=etag,
+                last_modified=last_modified,
+            )
+            # Expired entries are only worth restoring if they can be revalidated
+            if expires_at > now or entry.revalidatable:
+                restored.append((url, json.loads(params), entry))
+        return restored
+
+    def save(self, entries: list[tuple[str, dict[str, str], CacheEntry]]) -> int:
+        """Upsert entries. Returns the number written."""
+        now, monotonic_now = time.time(), time.monotonic()
+        rows = [
+            (url, json.dumps(params, sort_keys=True), entry.route, json.dumps(entry.value),
+             entry.etag, entry.last_modified, now + (entry.expires_at - monotonic_now), now)
+            for url, params, entry in entries
+        ]
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            connection.close()
+        return len(rows)
+
+
+class WarmupScheduler:
+    """Background refresh-ahead scheduler run from the Starlette lifespan.
+
+    On start it restores persisted shared entries, opens backend connections and
+    fetches the configured warmup routes. Every ``warmup_interval`` (± jitter) it
+    refreshes shared entries that are hot or configured and due to expire within
+    ``warmup_refresh_ahead`` seconds, then persists the shared tier.
+    """
+
+    def __init__(self, configs: ServerConfigs, http_client: HTTPClient):
+        self._configs = configs
+        self._http_client = http_client
+        self._base_url: str = configs.server_url.rstrip("/")
+        self._store: Optional[WarmCacheStore] = WarmCacheStore(configs.warmup_store_path) \
+            if configs.warmup_store_path else None
+        self._task: Optional[asyncio.Task] = None
+        self._headers: dict[str, str] = {"api-key": configs.server_api_key} if configs.server_api_key else {}
+        self.restored = 0
+        self.connections = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.persisted = 0
+        self.runs = 0
+
+    async def start(self) -> None:
+        """Restore the warm-start store and schedule the background loop."""
+        if not self._configs.warmup_enabled or not self._configs.server_url:
+            return
+        await self._restore()
+        self._task = asyncio.create_task(self._run(), name="warmup-scheduler")
+        logger.info("Warmup scheduler started: interval=%ss, jitter=%s, refresh_ahead=%ss",
+                    self._configs.warmup_interval, self._configs.warmup_jitter, self._configs.warmup_refresh_ahead)
+
+    async def stop(self) -> None:
+        """Cancel the background loop and persist the shared tier one last time."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._persist()
+        logger.info("Warmup scheduler stopped.")
+
+    async def _run(self) -> None:
+        try:
+            await self._prewarm()
+        except Exception as e:
+            logger.warning("Warmup failed: %s", e)
+        while True:
+            await asyncio.sleep(self._next_delay())
+            try:
+                await self._refresh_due()
+            except Exception as e:
+                logger.warning("Warmup refresh run failed: %s", e)
+
+    def _next_delay(self) -> float:
+        jitter = self._configs.warmup_jitter
+        return max(0.1, self._configs.warmup_interval * (1.0 + random.uniform(-jitter, jitter)))
+
+    async def _restore(self) -> None:
+        if self._store is None:
+            return
+        try:
+            entries = await asyncio.to_thread(self._store.load, self._configs.warmup_store_max_age)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.warning("Could not read warm-start cache %s: %s", self._configs.warmup_store_path, e)
+            return
+        for url, params, entry in entries:
+            self._http_client.seed_shared(url, params or None, entry)
+        self.restored = len(entries)
+        logger.info("Restored %d cache entries from %s", self.restored, self._configs.warmup_store_path)
+
+    async def _prewarm(self) -> None:
+        started = time.perf_counter()
+        if self._configs.warmup_connections > 0:
+            self.connections = await self._http_client.prewarm(
+                self._base_url + self._configs.warmup_probe_path,
+                connections=self._configs.warmup_connections,
+                headers=self._headers,
+            )
+        for route in self._configs.warmup_routes:
+            await self._refresh(self._base_url + route, None)
+        await self._persist()
+        logger.info("Warmup completed in %.1f ms: %d connections, %d routes",
+                    (time.perf_counter() - started) * 1000, self.connections, len(self._configs.warmup_routes))
+
+    async def _refresh_due(self) -> None:
+        self.runs += 1
+        configured = {self._base_url + route for route in self._configs.warmup_routes}
+        deadline = time.monotonic() + self._configs.warmup_refresh_ahead
+        due = [
+            (url, params, entry) for url, params, entry in self._http_client.shared_entries()
+            if (entry.hits > 0 or url in configured) and entry.expires_at <= deadline
+        ]
+        for url, params, entry in due:
+            entry.hits = 0
+            await self._refresh(url, params or None)
+        if due:
+            await self._persist()
+
+    async def _refresh(self, url: str, params: Optional[dict[str, Any]]) -> None:
+        result = await self._http_client.get(url=url, headers=self._headers, params=params, refresh=True)
+        if isinstance(result, dict) and "error" in result:
+            self.refresh_errors += 1
+            logger.info("Warmup refresh of %s failed: %s", url, result["error"])
+        else:
+            self.refreshes += 1
+
+    async def _persist(self) -> None:
+        if self._store is None:
+            return
+        entries = self._http_client.shared_entries()
+        if not entries:
+            return
+        try:
+            self.persisted += await asyncio.to_thread(self._store.save, entries)
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logger.warning("Could not persist warm-start cache %s: %s", self._configs.warmup_store_path, e)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "restored": self.restored,
+            "connections": self.connections,
+            "runs": self.runs,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "persisted": self.persisted,
+        }
@@ -0,0 +1,58 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for transaction summaries over malformed and multi-currency histories."""
+
+import pytest
+
+from banking_mcp_server.analytics import TransactionColumns
+
+
+def transaction(amount, currency="GBP", booked="2025-03-04T10:00:00+00:00", indicator="Debit"):
+    return {
+        "Amount": {"Amount": amount, "Currency": currency},
+        "BookingDateTime": booked,
+        "CreditDebitIndicator": indicator,
+        "MerchantDetails": {"MerchantName": "Shop", "MerchantCategoryCode": "5411"},
+    }
+
+
+def test_malformed_rows_are_tolerated():
+    columns = TransactionColumns([
+        transaction("10.50"),
+        transaction("4", booked="not a date"),
+        transaction("x"),
+        {"Amount": "7", "MerchantDetails": None, "CreditDebitIndicator": "Debit"},
+        "not a transaction",
+    ])
+
+    assert len(columns) == 4
+    assert columns.summarize(group_by="none")["total"] == 14.5
+    # Rows without a readable booking date are left out of date filters and buckets
+    monthly = columns.summarize(group_by="month", start_date="2025-01-01")
+    assert monthly["transactions"] == 2
+    assert monthly["rows"] == [["2025-03", 10.5, 2, 5.25]]
+
+
+def test_currencies_are_never_added_together():
+    columns = TransactionColumns([transaction("10"), transaction("20", currency="EUR"), transaction("5")])
+
+    with pytest.raises(ValueError, match="EUR, GBP"):
+        columns.summarize(group_by="none")
+    summary = columns.summarize(group_by="none", currency="GBP")
+    assert (summary["currency"], summary["transactions"], summary["total"]) == ("GBP", 2, 15.0)
+    assert columns.summarize(group_by="none", currency="USD")["transactions"] == 0
@@ -0,0 +1,131 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the response cache: routing to tiers, hits, expiry, eviction and invalidation."""
+
+import time
+
+from banking_mcp_server.cache import (
+    PRIVATE_TIER,
+    SHARED_TIER,
+    CacheEntry,
+    ResponseCache,
+    TTLCache,
+    identity_hash,
+    match_route,
+)
+
+
+def make_cache(**options):
+    settings = dict(
+        shared_routes={"/products": 300.0},
+        private_routes={"/accounts": 30.0, "/me": 120.0},
+        shared_max_entries=8,
+        private_max_entries=8,
+    )
+    settings.update(options)
+    return ResponseCache(**settings)
+
+
+def test_routes_match_on_segment_boundaries():
+    routes = {"/accounts": 30.0, "/accounts/special": 5.0}
+
+    assert match_route("/accounts", routes) == ("/accounts", 30.0)
+    assert match_route("/accounts/A1/transactions", routes) == ("/accounts", 30.0)
+    assert match_route("/accounts/special/x", routes) == ("/accounts/special", 5.0)
+    assert match_route("/accountsX", routes) is None
+
+
+def test_resolve_picks_the_tier():
+    cache = make_cache()
+
+    assert cache.resolve("/products/P1", "Bearer a") == (SHARED_TIER, "/products", 300.0, None)
+    assert cache.resolve("/accounts/A1", "Bearer a") == (PRIVATE_TIER, "/accounts", 30.0, identity_hash("Bearer a"))
+    # Private data is never cached without a caller to key it by
+    assert cache.resolve("/accounts/A1", None) is None
+    assert cache.resolve("/payments", "Bearer a") is None
+
+
+def test_private_entries_are_keyed_by_caller():
+    cache = make_cache()
+    alice, bob = identity_hash("Bearer alice"), identity_hash("Bearer bob")
+    key_alice = ResponseCache.make_key("http://bank/accounts", {"page": 1}, alice)
+    key_bob = ResponseCache.make_key("http://bank/accounts", {"page": 1}, bob)
+
+    cache.set(PRIVATE_TIER, key_alice, ["alice"], route="/accounts", ttl=30, identity=alice)
+
+    assert cache.get(PRIVATE_TIER, key_alice) == ["alice"]
+    assert cache.get(PRIVATE_TIER, key_bob) is None
+    assert ResponseCache.make_key("u", {"b": 2, "a": 1}, None) == ResponseCache.make_key("u", {"a": "1", "b": "2"}, None)
+
+
+def test_hit_and_expiry():
+    cache = TTLCache(max_entries=4)
+    cache.set("fresh", CacheEntry(value=1, expires_at=time.monotonic() + 60))
+    cache.set("expired", CacheEntry(value=2, expires_at=time.monotonic() - 1))
+    cache.set("stale", CacheEntry(value=3, expires_at=time.monotonic() - 1, etag='"v3"'))
+
+    assert cache.lookup("fresh") == (cache.peek("fresh"), True)
+    assert cache.lookup("expired") == (None, False)
+    assert cache.peek("expired") is None
+    # Entries with validators stay around as stale so they can be revalidated
+    entry, fresh = cache.lookup("stale")
+    assert entry.value == 3 and not fresh
+    assert cache.get("stale") is None
+    assert cache.stats.as_dict() == {"hits": 1, "misses": 3, "evictions": 0, "expirations": 3, "revalidations": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2)
+    later = time.monotonic() + 60
+    cache.set("a", CacheEntry(value=1, expires_at=later))
+    cache.set("b", CacheEntry(value=2, expires_at=later))
+    cache.get("a")
+    cache.set("c", CacheEntry(value=3, expires_at=later))
+
+    assert [key for key, _ in cache.items()] == ["a", "c"]
+    assert cache.stats.evictions == 1
+
+
+def test_zero_ttl_and_zero_capacity_store_nothing():
+    cache = make_cache(shared_max_entries=0)
+    key = ResponseCache.make_key("http://bank/products", None, None)
+
+    cache.set(SHARED_TIER, key, [1], route="/products", ttl=300, identity=None)
+    cache.set(PRIVATE_TIER, key, [1], route="/accounts", ttl=0, identity=None)
+
+    assert cache.get(SHARED_TIER, key) is None
+    assert cache.get(PRIVATE_TIER, key) is None
+
+
+def test_write_invalidates_only_the_callers_route():
+    cache = make_cache()
+    alice, bob = identity_hash("Bearer alice"), identity_hash("Bearer bob")
+    for identity in (alice, bob):
+        cache.set(PRIVATE_TIER, ResponseCache.make_key("http://bank/accounts", None, identity), [identity],
+                  route="/accounts", ttl=30, identity=identity)
+        cache.set(PRIVATE_TIER, ResponseCache.make_key("http://bank/me", None, identity), {"me": identity},
+                  route="/me", ttl=120, identity=identity)
+
+    assert cache.invalidate_private("Bearer alice", "/accounts/A1/transactions") == 1
+    assert cache.invalidate_private(None, "/accounts") == 0
+    assert cache.invalidate_private("Bearer alice", "/payments") == 0
+
+    assert cache.get(PRIVATE_TIER, ResponseCache.make_key("http://bank/accounts", None, alice)) is None
+    assert cache.get(PRIVATE_TIER, ResponseCache.make_key("http://bank/me", None, alice)) == {"me": alice}
+    assert cache.get(PRIVATE_TIER, ResponseCache.make_key("http://bank/accounts", None, bob)) == [bob]
@@ -0,0 +1,262 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the backend HTTP client against a mock transport."""
+
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from banking_mcp_server.client import HTTPClient
+from banking_mcp_server.config import ServerConfigs
+
+BASE = "http://bank.test/api"
+
+
+class Backend:
+    """Answers requests from a handler and records what the client sent."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.handler(request)
+
+    def paths(self) -> list[str]:
+        return [request.url.path for request in self.requests]
+
+
+def make_client(backend: Backend, **options) -> HTTPClient:
+    client = HTTPClient(ServerConfigs(server_url=BASE, **options))
+    client._session = httpx.AsyncClient(transport=httpx.MockTransport(backend))
+    return client
+
+
+def echo_path(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"data": {"path": request.url.path, "n": len(request.url.path)}})
+
+
+def test_shared_route_is_served_from_cache():
+    backend = Backend(echo_path)
+
+    async def scenario():
+        client = make_client(backend)
+        first = await client.get(f"{BASE}/products", headers={"Authorization": "Bearer a"})
+        second = await client.get(f"{BASE}/products", headers={"Authorization": "Bearer b"})
+        return first, second, client.cache_stats()
+
+    first, second, stats = asyncio.run(scenario())
+
+    assert first == second == {"path": "/api/products", "n": 13}
+    assert backend.paths() == ["/api/products"]
+    assert stats["shared"]["hits"] == 1
+
+
+def test_private_route_is_cached_per_caller_and_invalidated_by_writes():
+    backend = Backend(echo_path)
+
+    async def scenario():
+        client = make_client(backend)
+        for token in ("Bearer a", "Bearer a", "Bearer b"):
+            await client.get(f"{BASE}/accounts", headers={"Authorization": token})
+        await client.post(f"{BASE}/accounts/A1", json={}, headers={"Authorization": "Bearer a"})
+        await client.get(f"{BASE}/accounts", headers={"Authorization": "Bearer a"})
+        await client.get(f"{BASE}/accounts", headers={"Authorization": "Bearer b"})
+
+    asyncio.run(scenario())
+
+    assert backend.paths() == ["/api/accounts", "/api/accounts", "/api/accounts/A1", "/api/accounts"]
+    assert [r.headers["Authorization"] for r in backend.requests if r.method == "GET"] == \
+        ["Bearer a", "Bearer b", "Bearer a"]
+
+
+def test_errors_are_not_cached():
+    calls = []
+
+    def flaky(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, json={"error": "busy"})
+        return httpx.Response(200, content=json.dumps({"data": [1]}))
+
+    async def scenario():
+        client = make_client(Backend(flaky))
+        return [await client.get(f"{BASE}/products") for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+
+    assert set(first) == {"error"}
+    assert second == third == [1]
+    assert len(calls) == 2
+
+
+def test_identical_concurrent_gets_share_one_request():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return echo_path(request)
+
+        client = HTTPClient(ServerConfigs(server_url=BASE, cache_enabled=False))
+        client._session = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        headers = {"Authorization": "Bearer a"}
+        same = [asyncio.create_task(client.get(f"{BASE}/accounts", headers=headers)) for _ in range(4)]
+        other_caller = asyncio.create_task(client.get(f"{BASE}/accounts", headers={"Authorization": "Bearer b"}))
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*same, other_caller)
+        return results, client.coalescing_stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert all(result == {"path": "/api/accounts", "n": 13} for result in results)
+    assert stats == {"enabled": True, "leaders": 2, "followers": 3, "inflight": 0}
+
+
+def test_expired_entry_is_revalidated_with_its_etag():
+    def conditional(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"data": [{"ProductId": "P1"}]}, headers={"ETag": '"v1"'})
+
+    backend = Backend(conditional)
+
+    async def scenario():
+        client = make_client(backend, cache_shared_routes={"/products": 0.05})
+        first = await client.get(f"{BASE}/products")
+        await asyncio.sleep(0.1)
+        second = await client.get(f"{BASE}/products")
+        third = await client.get(f"{BASE}/products")
+        return first, second, third, client.cache_stats()
+
+    first, second, third, stats = asyncio.run(scenario())
+
+    assert first == second == third == [{"ProductId": "P1"}]
+    assert second is first
+    assert [r.headers.get("If-None-Match") for r in backend.requests] == [None, '"v1"']
+    assert stats["shared"]["revalidations"] == 1
+    assert stats["shared"]["hits"] == 1
+
+
+def test_refresh_revalidates_a_fresh_entry():
+    versions = iter(['"v1"', '"v2"'])
+
+    def changing(request):
+        etag = next(versions)
+        return httpx.Response(200, json={"data": {"etag": etag}}, headers={"ETag": etag})
+
+    backend = Backend(changing)
+
+    async def scenario():
+        client = make_client(backend)
+        await client.get(f"{BASE}/products")
+        refreshed = await client.get(f"{BASE}/products", refresh=True)
+        return refreshed, await client.get(f"{BASE}/products")
+
+    refreshed, cached = asyncio.run(scenario())
+
+    assert refreshed == cached == {"etag": '"v2"'}
+    assert [r.headers.get("If-None-Match") for r in backend.requests] == [None, '"v1"']
+
+
+def test_expired_entry_without_validators_is_fetched_again():
+    backend = Backend(echo_path)
+
+    async def scenario():
+        client = make_client(backend, cache_shared_routes={"/products": 0.05})
+        await client.get(f"{BASE}/products")
+        await asyncio.sleep(0.1)
+        await client.get(f"{BASE}/products")
+
+    asyncio.run(scenario())
+
+    assert [r.headers.get("If-None-Match") for r in backend.requests] == [None, None]
+
+
+def test_compressed_responses_are_decoded_and_measured():
+    payload = json.dumps({"data": [{"TransactionId": f"T{i}", "Status": "Booked"} for i in range(200)]}).encode()
+    compressed = gzip.compress(payload)
+
+    def gzipped(request):
+        # Streamed, so the client reads and counts the bytes as they come off the wire
+        return httpx.Response(200, stream=httpx.ByteStream(compressed), headers={"Content-Encoding": "gzip"})
+
+    backend = Backend(gzipped)
+
+    async def scenario():
+        client = make_client(backend, cache_enabled=False)
+        result = await client.get(f"{BASE}/accounts/A1/transactions", headers={"Authorization": "Bearer a"})
+        return result, client.transfer_stats()
+
+    result, stats = asyncio.run(scenario())
+
+    assert len(result) == 200
+    assert "gzip" in backend.requests[0].headers["Accept-Encoding"]
+    route = stats["/accounts/{id}/transactions"]
+    assert route["encodings"] == {"gzip": 1}
+    assert route["decoded_bytes"] == len(payload)
+    assert route["wire_bytes"] == len(compressed)
+    assert route["compression_ratio"] > 5
+
+
+def test_configured_accept_encoding_is_sent():
+    backend = Backend(echo_path)
+
+    async def scenario():
+        client = HTTPClient(ServerConfigs(server_url=BASE, http_accept_encoding="identity"))
+        await client.start()
+        # Keep the session headers start() configured, on a mock transport
+        client._session = httpx.AsyncClient(transport=httpx.MockTransport(backend),
+                                            headers=client._session.headers)
+        await client.get(f"{BASE}/products")
+
+    asyncio.run(scenario())
+
+    assert backend.requests[0].headers["Accept-Encoding"] == "identity"
+
+
+def test_slow_reads_are_hedged_and_writes_never_are():
+    async def scenario():
+        calls = []
+
+        async def slow(request):
+            calls.append(request.method)
+            # The first read and every write are slower than the hedge delay
+            if calls.count("GET") == 1 and request.method == "GET":
+                await asyncio.sleep(1)
+            elif request.method == "POST":
+                await asyncio.sleep(0.1)
+            return echo_path(request)
+
+        client = HTTPClient(ServerConfigs(server_url=BASE, cache_enabled=False, http_hedge_enabled=True,
+                                          http_hedge_initial_delay=0.02, http_hedge_budget_burst=5.0))
+        client._session = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        read = await asyncio.wait_for(client.get(f"{BASE}/accounts", headers={"Authorization": "Bearer a"}), 0.5)
+        await client.post(f"{BASE}/accounts/A1/payments", json={})
+        return read, calls, client.hedging_stats()
+
+    read, calls, stats = asyncio.run(scenario())
+
+    assert read == {"path": "/api/accounts", "n": 13}
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    assert calls == ["GET", "GET", "POST"]
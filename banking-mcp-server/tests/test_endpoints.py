@@ -0,0 +1,174 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for the receipt and metrics endpoints: caching headers, byte ranges and access control."""
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from banking_mcp_server.endpoints import (
+    RECEIPT_CACHE_CONTROL,
+    ReceiptSliceResponse,
+    get_receipt_endpoint,
+    metrics_endpoint,
+)
+from banking_mcp_server.receipts import Receipt, content_etag
+from banking_mcp_server.render_pool import PoolSaturated
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+class FakeReceipts:
+    """Serves fixed receipts by transaction ID, as the receipt service would."""
+
+    def __init__(self, receipts, saturated=False):
+        self._receipts = receipts
+        self._saturated = saturated
+
+    async def receipt(self, transaction_id):
+        if self._saturated:
+            raise PoolSaturated("full")
+        body = self._receipts.get(transaction_id)
+        if body is None:
+            return None
+        return Receipt(body, content_etag(PDF))
+
+
+def make_client(receipts, metrics_token=""):
+    app = Starlette(routes=[
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/transactions/{transaction_id}/receipt", get_receipt_endpoint, methods=["GET", "HEAD"]),
+    ])
+    app.state.receipts = receipts
+    app.state.metrics_token = metrics_token
+    return TestClient(app)
+
+
+@pytest.fixture(params=["segments", "files"])
+def client(request, tmp_path):
+    if request.param == "files":
+        path = tmp_path / "t1.pdf"
+        path.write_bytes(PDF)
+        body = path
+    else:
+        # Segment receipts are slices of a memory map
+        body = memoryview(bytearray(b"header" + PDF))[6:]
+    return make_client(FakeReceipts({"t1": body}))
+
+
+def test_full_receipt(client):
+    response = client.get("/transactions/t1/receipt")
+
+    assert response.status_code == 200
+    assert response.content == PDF
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["etag"] == content_etag(PDF)
+    assert response.headers["cache-control"] == RECEIPT_CACHE_CONTROL
+    assert 'filename="t1.pdf"' in response.headers["content-disposition"]
+
+
+@pytest.mark.parametrize("if_none_match", [content_etag(PDF), f'"other", W/{content_etag(PDF)}', "*"])
+def test_matching_etag_is_not_modified(client, if_none_match):
+    response = client.get("/transactions/t1/receipt", headers={"If-None-Match": if_none_match})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == content_etag(PDF)
+    assert response.headers["cache-control"] == RECEIPT_CACHE_CONTROL
+
+
+def test_other_etag_gets_the_receipt(client):
+    response = client.get("/transactions/t1/receipt", headers={"If-None-Match": '"other"'})
+
+    assert response.status_code == 200
+    assert response.content == PDF
+
+
+@pytest.mark.parametrize("http_range, start, end", [
+    ("bytes=0-99", 0, 100),
+    ("bytes=100-", 100, len(PDF)),
+    ("bytes=-50", len(PDF) - 50, len(PDF)),
+    ("bytes=1000-99999", 1000, len(PDF)),
+])
+def test_byte_range(client, http_range, start, end):
+    response = client.get("/transactions/t1/receipt", headers={"Range": http_range})
+
+    assert response.status_code == 206
+    assert response.content == PDF[start:end]
+    assert response.headers["content-range"] == f"bytes {start}-{end - 1}/{len(PDF)}"
+    assert response.headers["etag"] == content_etag(PDF)
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/transactions/t1/receipt", headers={"Range": f"bytes={len(PDF)}-"})
+
+    assert response.status_code == 416
+    # Starlette's FileResponse leaves out the unit
+    assert response.headers["content-range"].endswith(f"*/{len(PDF)}")
+
+
+def test_range_ignored_when_if_range_is_stale(client):
+    response = client.get("/transactions/t1/receipt", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == PDF
+
+
+def test_head_sends_headers_only(client):
+    response = client.head("/transactions/t1/receipt")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(len(PDF))
+    assert response.headers["etag"] == content_etag(PDF)
+
+
+def test_unknown_receipt(client):
+    assert client.get("/transactions/unknown/receipt").status_code == 404
+
+
+def test_busy_render_pool():
+    response = make_client(FakeReceipts({}, saturated=True)).get("/transactions/t1/receipt")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_metrics_token():
+    client = make_client(FakeReceipts({}), metrics_token="secret")
+
+    missing = client.get("/metrics")
+    wrong = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    allowed = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+    assert missing.status_code == 401
+    assert missing.headers["www-authenticate"] == "Bearer"
+    assert wrong.status_code == 401
+    assert allowed.status_code == 200
+    assert "metrics" in allowed.json()
+
+
+def test_segment_receipt_body_is_not_copied():
+    segment = bytearray(b"header" + PDF)
+    response = ReceiptSliceResponse(memoryview(segment)[6:], headers={})
+
+    assert isinstance(response.body, memoryview)
+    assert response.body.obj is segment
+    assert response.headers["content-length"] == str(len(PDF))
+    assert response.headers["content-type"] == "application/pdf"
@@ -0,0 +1,129 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the filter engine: local predicates and backend pushdown agreeing on results."""
+
+import pytest
+
+from banking_mcp_server.filters import (
+    FilterCondition,
+    apply_filters,
+    compile_filters,
+    filter_payload,
+    transaction_pushdown,
+)
+
+TRANSACTIONS = [
+    {
+        "TransactionId": f"T{i}",
+        "CreditDebitIndicator": "Debit" if i % 3 else "Credit",
+        "BookingDateTime": f"2026-03-{i % 28 + 1:02d}T{i % 24:02d}:30:00Z",
+        "Amount": {"Amount": f"{i * 7 % 300}.25", "Currency": "USD"},
+        "TransactionInformation": ["Coffee shop", "Grocery store", "Salary", "Rent"][i % 4],
+        "MerchantDetails": {"MerchantName": ["Bean Co", "FreshMart", "", "Homes Ltd"][i % 4]},
+    }
+    for i in range(120)
+]
+
+
+def backend_filter(records, params):
+    """The backend's documented query semantics, for comparing against the local engine."""
+    selected = []
+    for record in records:
+        day = record["BookingDateTime"][:10]
+        if "type" in params and record["CreditDebitIndicator"].lower() != params["type"].lower():
+            continue
+        if "startDate" in params and day < params["startDate"]:
+            continue
+        if "endDate" in params and day > params["endDate"]:
+            continue
+        if "category" in params:
+            needle = params["category"].lower()
+            haystack = (record["TransactionInformation"] + " " + record["MerchantDetails"]["MerchantName"]).lower()
+            if needle not in haystack:
+                continue
+        selected.append(record)
+    return selected
+
+
+def conditions(*specs):
+    return [FilterCondition(field=field, op=op, value=value) for field, op, value in specs]
+
+
+CASES = [
+    conditions(("CreditDebitIndicator", "eq", "Debit")),
+    conditions(("BookingDateTime", "gte", "2026-03-10"), ("BookingDateTime", "lte", "2026-03-20")),
+    conditions(("BookingDateTime", "gt", "2026-03-10"), ("BookingDateTime", "lt", "2026-03-20")),
+    conditions(("BookingDateTime", "gte", "2026-03-10T12:00:00Z")),
+    conditions(("TransactionInformation", "contains", "shop"), ("CreditDebitIndicator", "eq", "Credit")),
+    conditions(("MerchantDetails.MerchantName", "contains", "mart"), ("Amount.Amount", "gt", 100)),
+    conditions(("Amount.Amount", "lte", "50.25"), ("CreditDebitIndicator", "ne", "Debit")),
+]
+
+
+@pytest.mark.parametrize("filters", CASES)
+def test_pushdown_then_local_filter_matches_local_filter(filters):
+    params, exact = transaction_pushdown(filters)
+
+    pushed = backend_filter(TRANSACTIONS, params)
+    expected = apply_filters(TRANSACTIONS, filters)
+
+    assert apply_filters(pushed, filters) == expected
+    assert expected
+    if exact:
+        # Exact pushdown is what makes backend limit/offset safe
+        assert pushed == expected
+
+
+def test_pushdown_parameters_and_exactness():
+    assert transaction_pushdown(CASES[0]) == ({"type": "Debit"}, True)
+    assert transaction_pushdown(CASES[1]) == ({"startDate": "2026-03-10", "endDate": "2026-03-20"}, True)
+    assert transaction_pushdown(CASES[2]) == ({"startDate": "2026-03-10", "endDate": "2026-03-20"}, False)
+    assert transaction_pushdown(CASES[4]) == ({"category": "shop", "type": "Credit"}, False)
+    assert transaction_pushdown(CASES[5])[1] is False
+    assert transaction_pushdown(None) == ({}, True)
+
+
+def test_comparisons_coerce_numbers_dates_and_text():
+    record = {"Amount": {"Amount": "99.50"}, "BookingDateTime": "2026-03-05T23:59:00Z", "Status": "Booked"}
+
+    def matches(*specs):
+        return compile_filters(conditions(*specs))(record)
+
+    assert matches(("Amount.Amount", "gt", 99))
+    assert not matches(("Amount.Amount", "gt", "100"))
+    assert matches(("BookingDateTime", "eq", "2026-03-05"))
+    assert matches(("BookingDateTime", "lt", "2026-03-06"))
+    assert matches(("Status", "eq", "booked"))
+    assert matches(("Missing.Field", "ne", "x"))
+    assert not matches(("Missing.Field", "gte", 0))
+
+
+def test_identical_filters_share_a_compiled_predicate():
+    assert compile_filters(CASES[1]) is compile_filters(list(CASES[1]))
+
+
+def test_payload_filtering_leaves_the_cached_payload_alone():
+    payload = {"transactions": TRANSACTIONS, "pagination": {"total": 120, "count": 120}}
+
+    result = filter_payload(payload, CASES[0], limit=5)
+
+    assert len(result["transactions"]) == 5
+    assert result["pagination"] == {"total": 120, "count": 5}
+    assert payload["pagination"]["count"] == 120 and len(payload["transactions"]) == 120
+    assert filter_payload(payload, None) is payload
@@ -0,0 +1,146 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for hedged reads: the hedge budget, latency-based delays and first-good-result wins."""
+
+import asyncio
+
+from banking_mcp_server.hedging import HedgeBudget, Hedger, LatencyTracker
+
+
+def is_error(result):
+    return isinstance(result, dict) and "error" in result
+
+
+def make_hedger(**options):
+    settings = dict(percentile=95.0, initial_delay=0.01, min_delay=0.005, max_delay=1.0,
+                    budget_ratio=0.5, budget_burst=2.0, min_samples=5)
+    settings.update(options)
+    return Hedger(**settings)
+
+
+def test_budget_caps_hedges_to_the_ratio():
+    budget = HedgeBudget(ratio=0.1, burst=2.0)
+
+    granted = 0
+    for _ in range(100):
+        budget.on_request()
+        granted += budget.try_acquire()
+
+    # The burst plus one token per ten requests
+    assert granted == 2 + 9
+    assert budget.stats()["hedges"] == granted
+    assert budget.stats()["denied"] == 100 - granted
+
+
+def test_tracker_reports_the_percentile_once_warm():
+    tracker = LatencyTracker(window=100, percentile=90.0, min_samples=10)
+    for value in range(1, 10):
+        tracker.record(value / 100)
+    assert tracker.value() is None
+
+    # The percentile is recomputed every 16 samples once warm: at 10, 26, ..., 90
+    for value in range(10, 91):
+        tracker.record(value / 100)
+    assert tracker.value() == 0.81
+    for value in range(91, 101):
+        tracker.record(value / 100)
+    assert tracker.value() == 0.81
+
+
+def test_delay_is_clamped_and_falls_back_to_initial():
+    hedger = make_hedger(min_delay=0.05, max_delay=0.2)
+    assert hedger.delay_for("/accounts") == 0.01
+
+    for _ in range(5):
+        hedger._record("/fast", 0.001)
+        hedger._record("/slow", 5.0)
+    assert hedger.delay_for("/fast") == 0.05
+    assert hedger.delay_for("/slow") == 0.2
+
+
+def test_fast_primary_is_not_hedged():
+    async def scenario():
+        hedger = make_hedger()
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            return "ok"
+
+        return await hedger.run("/accounts", attempt, is_error), len(calls), hedger.stats()
+
+    result, calls, stats = asyncio.run(scenario())
+
+    assert (result, calls) == ("ok", 1)
+    assert stats["hedges"] == 0
+
+
+def test_slow_primary_loses_to_the_hedge():
+    async def scenario():
+        hedger = make_hedger()
+        started = []
+
+        async def attempt():
+            started.append(1)
+            if len(started) == 1:
+                await asyncio.sleep(1)
+                return "primary"
+            return "hedge"
+
+        return await hedger.run("/accounts", attempt, is_error), hedger.stats()
+
+    result, stats = asyncio.run(scenario())
+
+    assert result == "hedge"
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_fast_error_does_not_beat_a_slower_success():
+    async def scenario():
+        hedger = make_hedger()
+        started = []
+
+        async def attempt():
+            started.append(1)
+            if len(started) == 1:
+                await asyncio.sleep(0.05)
+                return "primary"
+            return {"error": "reset"}
+
+        return await hedger.run("/accounts", attempt, is_error)
+
+    assert asyncio.run(scenario()) == "primary"
+
+
+def test_exhausted_budget_waits_for_the_primary():
+    async def scenario():
+        hedger = make_hedger(budget_ratio=0.0, budget_burst=0.0)
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            await asyncio.sleep(0.03)
+            return "primary"
+
+        return await hedger.run("/accounts", attempt, is_error), len(calls), hedger.stats()
+
+    result, calls, stats = asyncio.run(scenario())
+
+    assert (result, calls) == ("primary", 1)
+    assert stats["denied"] == 1 and stats["hedges"] == 0
@@ -0,0 +1,147 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the loan comparison engine: payment, cost and APR figures, eligibility and ranking."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from banking_mcp_server.loans import CatalogCache, LoanCatalog, age_on
+
+
+def loan(product_id, rate, *, fees=(), min_amount=1000, max_amount=50000, min_term=12, max_term=60,
+         term_unit="months", product_type="PersonalLoan", **eligibility):
+    return {
+        "ProductId": product_id,
+        "ProductName": f"Loan {product_id}",
+        "ProductType": product_type,
+        "LoanInterestRate": {"RepresentativeRate": rate},
+        "LoanDetails": {"MinAmount": min_amount, "MaxAmount": max_amount, "MinTerm": min_term,
+                        "MaxTerm": max_term, "TermUnit": term_unit},
+        "Fees": [{"FeeType": fee_type, "Amount": amount} for fee_type, amount in fees],
+        "Eligibility": eligibility,
+    }
+
+
+def rows_by_product(result):
+    columns = result["columns"]
+    return {(row[0], row[2]): dict(zip(columns, row)) for row in result["rows"]}
+
+
+def compare(catalog, **options):
+    settings = dict(amount=10000.0, terms=np.array([12, 24]), annual_income=120000.0)
+    settings.update(options)
+    return catalog.compare(**settings)
+
+
+def test_annuity_payment_interest_and_apr():
+    catalog = LoanCatalog([loan("P1", 12.0), loan("ZERO", 0.0)])
+
+    rows = rows_by_product(compare(catalog))
+
+    # 10,000 at 1% a month over 12 months
+    assert rows[("P1", 12)]["monthly_payment"] == 888.49
+    assert rows[("P1", 12)]["total_interest"] == 661.85
+    assert rows[("P1", 12)]["total_cost"] == 661.85
+    assert rows[("P1", 12)]["apr"] == 12.68
+    assert rows[("P1", 24)]["monthly_payment"] == 470.73
+    assert rows[("ZERO", 12)]["monthly_payment"] == pytest.approx(833.33)
+    assert rows[("ZERO", 12)]["total_interest"] == 0.0
+
+
+def test_upfront_fees_raise_the_apr_but_conditional_fees_do_not():
+    catalog = LoanCatalog([
+        loan("FEE", 12.0, fees=[("Arrangement", "200"), ("LatePayment", "25")]),
+        loan("PLAIN", 12.0),
+    ])
+
+    rows = rows_by_product(compare(catalog, terms=np.array([12])))
+    fee_row = rows[("FEE", 12)]
+
+    assert fee_row["fees"] == 200.0
+    assert fee_row["total_cost"] == 861.85
+    # The APR is the rate at which the payments repay the 9,800 actually advanced
+    monthly = (1 + fee_row["apr"] / 100) ** (1 / 12) - 1
+    present_value = fee_row["monthly_payment"] * (1 - (1 + monthly) ** -12) / monthly
+    assert present_value == pytest.approx(9800, abs=1)
+    assert fee_row["apr"] > rows[("PLAIN", 12)]["apr"]
+
+
+def test_ranking_and_top_n():
+    catalog = LoanCatalog([loan("HIGH", 15.0), loan("LOW", 6.0), loan("MID", 9.0)])
+
+    by_cost = compare(catalog, top_n=2)
+    by_payment = compare(catalog, rank_by="monthly_payment", top_n=3)
+
+    assert [(row[0], row[2]) for row in by_cost["rows"]] == [("LOW", 12), ("MID", 12)]
+    assert [(row[0], row[2]) for row in by_payment["rows"]] == [("LOW", 24), ("MID", 24), ("HIGH", 24)]
+    assert by_cost["evaluated"] == 6 and by_cost["eligible"] == 6
+
+
+def test_ineligible_products_report_their_reasons():
+    catalog = LoanCatalog([
+        loan("OK", 8.0),
+        loan("SMALL", 8.0, max_amount=5000),
+        loan("RICH", 8.0, MinIncome=200000, MinCreditScore=800),
+        loan("EMPLOYED", 8.0, Employment=["Employed"]),
+        loan("LONG", 8.0, min_term=5, max_term=10, term_unit="years"),
+        loan("OLD", 8.0, MaxAge=42),
+    ])
+
+    result = compare(catalog, credit_score=700, age=40.5, employment_status="Retired")
+
+    assert {row[0] for row in result["rows"]} == {"OK", "OLD"}
+    assert {row[2] for row in result["rows"] if row[0] == "OLD"} == {12}
+    assert result["ineligible_products"] == {
+        "SMALL": ["amount_out_of_range"],
+        "RICH": ["income_below_minimum", "credit_score_below_minimum"],
+        "EMPLOYED": ["employment_not_accepted"],
+        "LONG": ["term_out_of_range"],
+    }
+
+
+def test_affordability_uses_income_and_expenses():
+    catalog = LoanCatalog([loan("P1", 12.0)])
+
+    tight = compare(catalog, annual_income=24000.0, monthly_expenses=1600.0)
+    comfortable = compare(catalog, annual_income=24000.0)
+
+    # 40% of 2,000 a month covers the 24-month payment only; expenses leave 400
+    assert [row[2] for row in comfortable["rows"]] == [24]
+    assert tight["rows"] == []
+    assert tight["ineligible_products"] == {"P1": ["unaffordable"]}
+
+
+def test_catalog_skips_non_loans_and_is_reused_for_the_same_payload():
+    products = [loan("P1", 5.0), {"ProductId": "SAV", "ProductType": "Savings"}, "junk"]
+    cache = CatalogCache()
+
+    first = cache.catalog(products)
+    assert cache.catalog(products) is first
+    assert cache.catalog(list(products)) is not first
+
+    assert first.product_ids == ["P1"]
+    assert first.term_bounds() == (12, 60)
+    assert cache.stats() == {"products": 1, "builds": 2, "reuses": 1}
+
+
+def test_age_from_date_of_birth():
+    assert age_on("1990-06-15", date(2026, 6, 15)) == pytest.approx(36, abs=0.01)
+    assert age_on("not a date") is None
@@ -0,0 +1,329 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for the payment outbox: claims, settlements, leases and held entries."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from banking_mcp_server.outbox import DEAD, DEFER, DELIVER, DISCARD, PaymentOutbox, _is_permanent
+
+
+class FakeBackend:
+    """Records posts and answers them from a script of results, delivering by default."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.posts = []
+
+    async def post(self, url, json, headers):
+        self.posts.append((url, json, headers))
+        if self.results:
+            return self.results.pop(0)
+        return {"TransactionId": json.get("transaction_id")}
+
+
+def make_outbox(path, backend=None, **options):
+    settings = dict(workers=1, batch_size=8, max_attempts=3, retry_base=0.01, retry_max=0.02, lease=30.0,
+                    poll_interval=0.01)
+    settings.update(options)
+    return PaymentOutbox(str(path), backend, **settings)
+
+
+async def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.01)
+
+
+def test_delivers_entries_with_idempotency_key(tmp_path):
+    backend = FakeBackend()
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend, service_headers={"api-key": "service"})
+    delivered = []
+    outbox.add_listener(lambda entry, result: delivered.append((entry.idempotency_key, result)))
+
+    async def scenario():
+        await outbox.start()
+        try:
+            assert await outbox.enqueue("t1", "http://backend/tx", {"transaction_id": "t1"}, {"X-Request-ID": "r1"})
+            assert not await outbox.enqueue("t1", "http://backend/tx", {"transaction_id": "t1"}, {})
+            await wait_until(lambda: outbox.stats()["depth"] == 0)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    assert backend.posts == [
+        ("http://backend/tx", {"transaction_id": "t1"},
+         {"X-Request-ID": "r1", "api-key": "service", "Idempotency-Key": "t1"})
+    ]
+    assert delivered == [("t1", {"TransactionId": "t1"})]
+    assert outbox.stats()["delivered"] == 1
+
+
+def test_user_credentials_are_never_stored(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    outbox = make_outbox(path)
+
+    async def scenario():
+        await outbox.start()
+        try:
+            with pytest.raises(ValueError, match="authorization"):
+                await outbox.enqueue("t1", "u", {}, {"authorization": "Bearer user"})
+            assert await outbox.state("t1") is None
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+
+    # Entries written by earlier versions lose their credentials on the next start
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "INSERT INTO outbox (idempotency_key, url, body, headers, state, attempts, next_attempt_at, "
+            "lease_until, created_at) VALUES ('t2', 'u', '{}', ?, 'pending', 0, 0, 0, 0)",
+            ('{"Authorization": "Bearer user", "api-key": "key", "X-Request-ID": "r2"}',),
+        )
+    reopened = make_outbox(path)
+    reopened._open()
+    [entry] = reopened._claim(8)
+    reopened._close()
+    assert entry.headers == {"X-Request-ID": "r2"}
+
+
+def test_rejected_service_credential_is_retried(tmp_path):
+    unauthorized = {"error": "Client error '401 Unauthorized' for url 'http://backend/tx'"}
+    backend = FakeBackend(unauthorized, unauthorized)
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend)
+
+    async def scenario():
+        await outbox.start()
+        try:
+            await outbox.enqueue("t1", "u", {}, {})
+            await wait_until(lambda: outbox.stats()["delivered"] == 1)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    assert outbox.stats()["retries"] == 2
+    assert outbox.stats()["dead"] == 0
+
+
+def test_retries_then_parks_dead_entries(tmp_path):
+    server_error = {"error": "Server error '503 Service Unavailable' for url 'http://backend/tx'"}
+    not_found = {"error": "Client error '404 Not Found' for url 'http://backend/tx'"}
+    backend = FakeBackend(server_error, server_error, server_error, not_found)
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend)
+
+    async def scenario():
+        await outbox.start()
+        try:
+            await outbox.enqueue("retried", "u", {}, {})
+            await wait_until(lambda: outbox.stats()["dead"] == 1)
+            await outbox.enqueue("permanent", "u", {}, {})
+            await wait_until(lambda: outbox.stats()["dead"] == 2)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    stats = outbox.stats()
+    assert stats["retries"] == 2
+    assert stats["dead_lettered"] == 2
+    assert stats["delivered"] == 0
+    assert [body for _, body, headers in backend.posts] == [{}] * 4
+    with sqlite3.connect(tmp_path / "outbox.sqlite3") as connection:
+        rows = connection.execute("SELECT idempotency_key, state, attempts FROM outbox ORDER BY id").fetchall()
+    assert rows == [("retried", DEAD, 3), ("permanent", DEAD, 1)]
+
+    # Dead entries are reported again after a restart
+    async def reopen():
+        reopened = make_outbox(tmp_path / "outbox.sqlite3", backend)
+        await reopened.start()
+        try:
+            return reopened.stats()["dead"], await reopened.state("retried")
+        finally:
+            await reopened.stop()
+
+    assert asyncio.run(reopen()) == (2, DEAD)
+
+
+def test_claim_failure_does_not_stop_the_workers(tmp_path):
+    backend = FakeBackend()
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend)
+    claim = outbox._claim
+    failures = []
+
+    def locked_once(limit):
+        if not failures:
+            failures.append(limit)
+            raise sqlite3.OperationalError("database is locked")
+        return claim(limit)
+
+    outbox._claim = locked_once
+
+    async def scenario():
+        await outbox.start()
+        try:
+            await outbox.enqueue("t1", "u", {}, {})
+            await wait_until(lambda: outbox.stats()["depth"] == 0)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    assert failures
+    assert len(backend.posts) == 1
+
+
+def test_concurrent_claims_never_share_an_entry(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    first, second = make_outbox(path), make_outbox(path)
+    first._open()
+    second._open()
+    for index in range(300):
+        first._insert(f"t{index}", "u", "{}", "{}", 0.0, False)
+
+    claimed = []
+
+    def drain(outbox):
+        while batch := outbox._claim(7):
+            claimed.extend(entry.id for entry in batch)
+
+    threads = [threading.Thread(target=drain, args=(outbox,)) for outbox in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    first._close()
+    second._close()
+
+    assert len(claimed) == 300
+    assert len(set(claimed)) == 300
+
+
+def test_restart_leaves_live_leases_alone(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    running = make_outbox(path)
+    running._open()
+    running._insert("t1", "u", "{}", "{}", 0.0, False)
+    assert [entry.idempotency_key for entry in running._claim(8)] == ["t1"]
+
+    # Another worker starting up must not take over an entry whose lease still holds
+    restarted = make_outbox(path)
+    restarted._open()
+    assert restarted._claim(8) == []
+    restarted._close()
+
+    # A clean shutdown hands the lease back
+    running._close()
+    restarted._open()
+    assert [entry.idempotency_key for entry in restarted._claim(8)] == ["t1"]
+    restarted._close()
+
+
+def test_settle_only_touches_entries_it_still_leases(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    slow = make_outbox(path, lease=0.05)
+    fast = make_outbox(path)
+    slow._open()
+    fast._open()
+    slow._insert("t1", "u", "{}", "{}", 0.0, False)
+    [stale] = slow._claim(8)
+
+    # The slow worker's lease runs out and another worker claims the entry again
+    time.sleep(0.1)
+    [current] = fast._claim(8)
+    assert current.id == stale.id
+
+    assert slow._settle([(stale, "Server error '503 Service Unavailable'")]) == (set(), 0, 0)
+    assert fast._settle([(current, None)]) == ({current.id}, 0, 0)
+    assert slow._settle([(stale, None)]) == (set(), 0, 0)
+    slow._close()
+    fast._close()
+
+
+def test_held_entry_waits_for_release(tmp_path):
+    backend = FakeBackend()
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend)
+
+    async def scenario():
+        await outbox.start()
+        try:
+            await outbox.enqueue("held", "u", {}, {}, held=True)
+            await outbox.enqueue("withdrawn", "u", {}, {}, held=True)
+            await asyncio.sleep(0.1)
+            assert backend.posts == []
+
+            assert await outbox.withdraw("withdrawn")
+            assert not await outbox.withdraw("withdrawn")
+            await outbox.release("held")
+            await wait_until(lambda: outbox.stats()["depth"] == 0)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    assert [headers["Idempotency-Key"] for _, _, headers in backend.posts] == ["held"]
+
+
+def test_unreleased_entries_go_through_the_hold_check(tmp_path):
+    backend = FakeBackend()
+    outbox = make_outbox(tmp_path / "outbox.sqlite3", backend, lease=0.05)
+    verdicts = {"deliver": [DELIVER], "discard": [DISCARD], "dead": [DEAD], "defer": [DEFER, DELIVER],
+                "broken": [RuntimeError("store down"), DELIVER]}
+    checked = []
+
+    async def check(entry):
+        checked.append(entry.idempotency_key)
+        verdict = verdicts[entry.idempotency_key].pop(0)
+        if isinstance(verdict, Exception):
+            raise verdict
+        return verdict
+
+    outbox.set_hold_check(check)
+
+    async def scenario():
+        await outbox.start()
+        try:
+            for key in verdicts:
+                await outbox.enqueue(key, "u", {}, {}, held=True)
+            await outbox.enqueue("released", "u", {}, {}, held=True)
+            await outbox.release("released")
+            await wait_until(lambda: outbox.stats()["depth"] == 0)
+            return await outbox.state("dead")
+        finally:
+            await outbox.stop()
+
+    assert asyncio.run(scenario()) == DEAD
+    posted = sorted(headers["Idempotency-Key"] for _, _, headers in backend.posts)
+    assert posted == ["broken", "defer", "deliver", "released"]
+    assert "released" not in checked
+    assert sorted(checked) == ["broken", "broken", "dead", "defer", "defer", "deliver", "discard"]
+    stats = outbox.stats()
+    assert (stats["held_deferred"], stats["held_discarded"], stats["dead"]) == (2, 1, 1)
+
+
+@pytest.mark.parametrize("error, permanent", [
+    ("Client error '404 Not Found' for url 'u'", True),
+    ("Client error '429 Too Many Requests' for url 'u'", False),
+    ("Client error '401 Unauthorized' for url 'u'", False),
+    ("Server error '500 Internal Server Error' for url 'u'", False),
+    ("Request failed: timed out", False),
+])
+def test_only_non_retryable_client_errors_are_permanent(error, permanent):
+    assert _is_permanent(error) is permanent
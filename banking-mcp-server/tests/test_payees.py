@@ -0,0 +1,112 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for payee search: exact, prefix, account-number and fuzzy matches, and index upkeep."""
+
+from banking_mcp_server.payees import PayeeDirectory, PayeeIndex, normalize
+
+PAYEES = [
+    {"Name": "John Smith", "AccountNumber": "GB29 NWBK 6016 1331 9268 19", "Email": "jsmith@example.com"},
+    {"Name": "Johnny Appleseed", "AccountNumber": "12345678", "Email": "orchard@example.com"},
+    {"Name": "José Álvarez", "AccountNumber": "87654329", "Email": "jose.alvarez@example.com"},
+    {"Name": "Smithfield Hardware Ltd", "AccountNumber": "55501234", "Email": "billing@smithfield.example"},
+]
+
+
+def make_index(payees=PAYEES):
+    index = PayeeIndex()
+    index.update(payees)
+    return index
+
+
+def names(results):
+    return [result["Name"] for result in results]
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("  José  Álvarez-O'Neil ") == "jose alvarez o neil"
+    assert normalize(None) == ""
+
+
+def test_exact_name_scores_highest():
+    results = make_index().search("john smith")
+
+    assert results[0]["Name"] == "John Smith"
+    assert results[0]["score"] == 1.0
+
+
+def test_prefixes_of_every_word_must_match():
+    results = make_index().search("joh smi")
+
+    assert names(results)[0] == "John Smith"
+    assert 0.8 <= results[0]["score"] < 1.0
+    assert "Johnny Appleseed" not in names(results[:1])
+
+
+def test_shorter_names_rank_first_among_prefix_matches():
+    results = make_index().search("smith", top_k=2)
+
+    assert names(results) == ["John Smith", "Smithfield Hardware Ltd"]
+
+
+def test_account_number_suffix_and_full_number():
+    index = make_index()
+
+    assert index.search("ending in 4329")[0]["Name"] == "José Álvarez"
+    assert index.search("ending in 4329")[0]["score"] == 0.95
+    assert index.search("12345678")[0] == {"score": 1.0, **PAYEES[1]}
+
+
+def test_email_local_part_is_searchable():
+    assert make_index().search("orchard")[0]["Name"] == "Johnny Appleseed"
+
+
+def test_typos_fall_back_to_trigram_similarity():
+    results = make_index().search("jon smiht", min_score=0.2)
+
+    assert names(results)[0] == "John Smith"
+    assert results[0]["score"] < 0.8
+
+
+def test_update_adds_removes_and_reindexes_changed_payees():
+    index = make_index()
+    changed = {**PAYEES[1], "Email": "seeds@example.com"}
+
+    added, removed = index.update([PAYEES[0], changed, {"Name": "New Person", "AccountNumber": "999000"}])
+
+    assert (added, removed) == (1, 2)
+    assert len(index) == 3
+    assert index.search("alvarez", min_score=0.5) == []
+    assert index.search("seeds")[0]["Email"] == "seeds@example.com"
+    assert index.search("orchard", min_score=0.8) == []
+    assert index.search("new")[0]["Name"] == "New Person"
+
+
+def test_directory_reuses_an_index_for_the_same_payload_and_evicts_lru():
+    directory = PayeeDirectory(max_identities=2)
+    payload = list(PAYEES)
+
+    first = directory.index("alice", payload)
+    assert directory.index("alice", payload) is first
+    directory.index("bob", PAYEES[:1])
+    directory.index("carol", PAYEES[:2])
+
+    assert directory.stats() == {"identities": 2, "payees": 3, "syncs": 3, "reuses": 1}
+    # A new payload object for a known identity syncs the existing index in place
+    assert directory.index("carol", list(PAYEES)) is not first
+    assert directory.stats()["payees"] == 5
@@ -0,0 +1,211 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for the payment state stores: state machine, compare-and-set and expiry."""
+
+import asyncio
+
+import pytest
+
+from banking_mcp_server.payment_store import (
+    AUTHORIZED,
+    COMPLETED,
+    DECLINED,
+    INITIATED,
+    MemoryPaymentStore,
+    PaymentRecord,
+    PaymentStore,
+    SQLitePaymentStore,
+)
+
+TTLS = {INITIATED: 60.0, AUTHORIZED: 60.0, DECLINED: 60.0, COMPLETED: 60.0}
+
+
+def record(transaction_id: str, state: str = INITIATED) -> PaymentRecord:
+    return PaymentRecord.from_dict({
+        "transaction_id": transaction_id,
+        "currency": "GBP",
+        "amount": 12.5,
+        "sender": {"account_id": "acc-1", "name": "Alice"},
+        "beneficiary": {"account_id": "acc-2", "name": "Bob", "bank_name": "Other Bank"},
+        "remarks": "Rent",
+    }, state=state)
+
+
+def memory_store(**options):
+    settings = dict(capacity=100, ttls=TTLS, sweep_interval=0)
+    settings.update(options)
+    return MemoryPaymentStore(**settings)
+
+
+def sqlite_store(path, **options):
+    settings = dict(capacity=100, ttls=TTLS, sweep_interval=0)
+    settings.update(options)
+    return SQLitePaymentStore(str(path), **settings)
+
+
+def test_incomplete_store_cannot_be_created():
+    class ReadOnly(PaymentStore):
+        async def get(self, transaction_id):
+            return None
+
+    with pytest.raises(TypeError, match="transition"):
+        ReadOnly()
+
+
+def test_memory_records_expire_per_state():
+    store = memory_store(ttls={**TTLS, INITIATED: 0.05})
+
+    async def scenario():
+        await store.put(record("short"))
+        await store.put(record("long", AUTHORIZED))
+        await asyncio.sleep(0.1)
+        assert await store.get("short") is None
+        assert (await store.get("long")).state == AUTHORIZED
+        assert store.stats()["expirations"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_sweep_skips_superseded_expiry_entries():
+    store = memory_store(ttls={**TTLS, INITIATED: 0.05, AUTHORIZED: 60.0})
+
+    async def scenario():
+        await store.put(record("moved"))
+        await store.put(record("expired"))
+        # The move re-arms the expiry; the earlier heap item must not drop the record
+        await store.transition("moved", (INITIATED,), AUTHORIZED, otp="1234")
+        await asyncio.sleep(0.1)
+        assert store.sweep() == 1
+        assert len(store) == 1
+        assert (await store.get("moved")).otp == "1234"
+        stats = store.stats()
+        assert stats["states"] == {INITIATED: 0, AUTHORIZED: 1, DECLINED: 0, COMPLETED: 0}
+        assert stats["expiry_queue"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_evicts_least_recently_used_at_capacity():
+    store = memory_store(capacity=2)
+
+    async def scenario():
+        await store.put(record("a"))
+        await store.put(record("b"))
+        await store.get("a")
+        await store.put(record("c"))
+        assert await store.get("b") is None
+        assert await store.get("a") is not None
+        assert store.stats()["evictions"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_transition_is_compare_and_set():
+    store = memory_store()
+
+    async def scenario():
+        await store.put(record("t1", AUTHORIZED))
+        results = await asyncio.gather(*(
+            store.transition("t1", (AUTHORIZED,), COMPLETED, result=f"done by {index}") for index in range(5)
+        ))
+        assert [result.result for result in results if result is not None] == ["done by 0"]
+        with pytest.raises(ValueError):
+            await store.transition("t1", (COMPLETED,), AUTHORIZED)
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_compare_and_set_has_one_winner_across_workers(tmp_path):
+    path = tmp_path / "payments.sqlite3"
+    # Two stores on one file stand in for two worker processes, each with its own store thread
+    stores = [sqlite_store(path), sqlite_store(path)]
+
+    async def scenario():
+        for store in stores:
+            await store.start()
+        try:
+            await stores[0].put(record("t1", AUTHORIZED))
+            results = await asyncio.gather(*(
+                stores[index % 2].transition("t1", (AUTHORIZED,), COMPLETED, result=f"done by {index}")
+                for index in range(20)
+            ))
+            winners = [result for result in results if result is not None]
+            assert len(winners) == 1
+            stored = await stores[1].get("t1")
+            assert (stored.state, stored.result) == (COMPLETED, winners[0].result)
+            assert sum(store.stats()["conflicts"] for store in stores) == 19
+        finally:
+            for store in stores:
+                await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_transition_rules_and_changes(tmp_path):
+    store = sqlite_store(tmp_path / "payments.sqlite3")
+
+    async def scenario():
+        await store.start()
+        try:
+            await store.put(record("t1"))
+            with pytest.raises(ValueError, match="initiated -> completed"):
+                await store.transition("t1", (INITIATED,), COMPLETED)
+            assert await store.transition("t1", (AUTHORIZED,), DECLINED) is None
+            assert await store.transition("missing", (INITIATED,), AUTHORIZED) is None
+
+            authorized = await store.transition("t1", (INITIATED,), AUTHORIZED, otp="1234")
+            assert (authorized.state, authorized.otp) == (AUTHORIZED, "1234")
+            stored = await store.get("t1")
+            assert stored.as_dict() == authorized.as_dict()
+            assert stored.sender_name == "Alice"
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_records_expire_per_state_and_survive_restarts(tmp_path):
+    path = tmp_path / "payments.sqlite3"
+    ttls = {**TTLS, INITIATED: 0.05}
+
+    async def scenario():
+        store = sqlite_store(path, ttls=ttls, capacity=2)
+        await store.start()
+        await store.put(record("short"))
+        await store.put(record("kept", AUTHORIZED))
+        await asyncio.sleep(0.1)
+        assert await store.get("short") is None
+        await store.stop()
+
+        reopened = sqlite_store(path, ttls=ttls, capacity=2)
+        await reopened.start()
+        try:
+            assert (await reopened.get("kept")).state == AUTHORIZED
+            stats = reopened.stats()
+            assert (stats["size"], stats["expirations"]) == (1, 1)
+
+            # Over capacity, the least recently written records go first
+            await reopened.put(record("second", AUTHORIZED))
+            await reopened.put(record("third", AUTHORIZED))
+            assert await reopened._run(reopened.sweep) == 1
+            assert await reopened.get("kept") is None
+            assert reopened.stats()["states"][AUTHORIZED] == 2
+        finally:
+            await reopened.stop()
+
+    asyncio.run(scenario())
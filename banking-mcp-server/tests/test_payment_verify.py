@@ -0,0 +1,275 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for payment completion: OTP verification is idempotent and never completes a payment twice."""
+
+import asyncio
+import contextlib
+import time
+from types import SimpleNamespace
+
+import pytest
+from mcp.server import FastMCP
+
+from banking_mcp_server.cache import identity_hash
+from banking_mcp_server.config import ServerConfigs
+from banking_mcp_server.outbox import PaymentOutbox
+from banking_mcp_server.payment_models import Party, PaymentRequest
+from banking_mcp_server.payment_store import AUTHORIZED, COMPLETED, MemoryPaymentStore, create_payment_store
+from banking_mcp_server.receipt_store import FileReceiptStore
+from banking_mcp_server.receipts import ReceiptService
+from banking_mcp_server.render_pool import RenderPool
+from banking_mcp_server.sync import TransactionSync
+from banking_mcp_server.tools.payment_tools import ConsentRequest, OTPRequest, register_payment_tools
+
+CONTEXT = SimpleNamespace(
+    request_context=SimpleNamespace(request=SimpleNamespace(headers={"x-forwarded-authorization": "token"}))
+)
+
+
+class FakeBackend:
+    """Accepts every transaction post and records it."""
+
+    def __init__(self):
+        self.posts = []
+        self.open = asyncio.Event()
+        self.open.set()
+
+    async def post(self, url, json, headers):
+        await self.open.wait()
+        self.posts.append((url, json, headers))
+        return {"TransactionId": json["transaction_id"], "Status": "SUCCESS"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def configs(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("OB_SERVER_URL", "http://backend")
+    monkeypatch.setenv("OB_MCP_SERVER_URL", "http://mcp")
+    return ServerConfigs(payment_store_backend=request.param, payment_store_path=str(tmp_path / "payments.sqlite3"))
+
+
+@contextlib.asynccontextmanager
+async def payment_server(configs, tmp_path, lease=30.0):
+    backend = FakeBackend()
+    payment_store = create_payment_store(configs)
+    payment_outbox = PaymentOutbox(str(tmp_path / "outbox.sqlite3"), backend, workers=1, batch_size=8,
+                                   max_attempts=3, retry_base=0.01, retry_max=0.02, lease=lease, poll_interval=0.01,
+                                   service_headers={"api-key": "service"})
+    receipt_store = FileReceiptStore(str(tmp_path / "receipts"))
+    render_pool = RenderPool(kind="thread", workers=1, queue_size=4, submit_timeout=5.0)
+    receipt_service = ReceiptService(payment_store, render_pool, receipt_store)
+    transaction_sync = TransactionSync(max_transactions=100, refresh_interval=0)
+    mcp = FastMCP("test")
+    register_payment_tools(mcp, transaction_sync, payment_store, payment_outbox, receipt_service)
+    await payment_store.start()
+    await payment_outbox.start()
+    await render_pool.start()
+    try:
+        yield SimpleNamespace(
+            tool=lambda name: mcp._tool_manager.get_tool(name).fn,
+            backend=backend,
+            payment_store=payment_store,
+            payment_outbox=payment_outbox,
+            receipt_store=receipt_store,
+            render_pool=render_pool,
+            receipt_service=receipt_service,
+            transaction_sync=transaction_sync,
+        )
+    finally:
+        await render_pool.stop()
+        await payment_outbox.stop(drain_timeout=1.0)
+        await payment_store.stop()
+
+
+async def authorized_payment(server) -> tuple[str, str]:
+    """Initiate and authorize a payment; returns its transaction ID and OTP."""
+    initiated = await server.tool("payment_initiate")(PaymentRequest(
+        currency="USD",
+        amount=25.0,
+        sender=Party(account_id="acc-1", name="Alice"),
+        beneficiary=Party(account_id="acc-2", name="Bob", bank_name="Other Bank"),
+        remarks="Rent",
+    ))
+    transaction_id = initiated.split("Transaction ID: ")[1].split("\n")[0]
+    await server.tool("payment_authorize")(ConsentRequest(transaction_id=transaction_id, consent=True))
+    record = await server.payment_store.get(transaction_id)
+    return transaction_id, record.otp
+
+
+async def settled(server) -> None:
+    deadline = time.monotonic() + 5.0
+    while server.payment_outbox.stats()["depth"]:
+        assert time.monotonic() < deadline, "outbox did not drain"
+        await asyncio.sleep(0.01)
+
+
+def test_repeated_and_concurrent_verifies_complete_once(configs, tmp_path):
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            transaction_id, otp = await authorized_payment(server)
+            verify = server.tool("payment_otp_verify")
+            request = OTPRequest(transaction_id=transaction_id, otp=otp)
+
+            concurrent = await asyncio.gather(*(verify(CONTEXT, request) for _ in range(10)))
+            repeated = await verify(CONTEXT, request)
+            await settled(server)
+
+            assert len(set(concurrent + [repeated])) == 1
+            assert repeated.startswith("Payment completed successfully!")
+            assert f"http://mcp/transactions/{transaction_id}/receipt" in repeated
+            assert (await server.payment_store.get(transaction_id)).state == COMPLETED
+            assert server.payment_outbox.stats()["enqueued"] == 1
+            [(url, body, headers)] = server.backend.posts
+            assert url == "http://backend/accounts/acc-1/transactions"
+            assert body["transaction_id"] == transaction_id
+            assert "otp" not in body
+            # Posted as the server, never with the user's token
+            assert headers == {"api-key": "service", "Idempotency-Key": transaction_id}
+
+    asyncio.run(scenario())
+
+
+def test_wrong_otp_does_not_complete(configs, tmp_path):
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            transaction_id, otp = await authorized_payment(server)
+            response = await server.tool("payment_otp_verify")(
+                CONTEXT, OTPRequest(transaction_id=transaction_id, otp=otp + "0")
+            )
+
+            assert response.startswith("OTP verification failed.")
+            assert (await server.payment_store.get(transaction_id)).state == AUTHORIZED
+            assert server.payment_outbox.stats()["enqueued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_enqueue_leaves_payment_authorized(configs, tmp_path, monkeypatch):
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            transaction_id, otp = await authorized_payment(server)
+            verify = server.tool("payment_otp_verify")
+            request = OTPRequest(transaction_id=transaction_id, otp=otp)
+            enqueue = server.payment_outbox.enqueue
+
+            async def unavailable(*args, **kwargs):
+                raise OSError("disk full")
+
+            monkeypatch.setattr(server.payment_outbox, "enqueue", unavailable)
+            failed = await verify(CONTEXT, request)
+            assert "could not be completed" in failed
+            assert (await server.payment_store.get(transaction_id)).state == AUTHORIZED
+
+            # The user retries once the outbox is back
+            monkeypatch.setattr(server.payment_outbox, "enqueue", enqueue)
+            completed = await verify(CONTEXT, request)
+            await settled(server)
+
+            assert completed.startswith("Payment completed successfully!")
+            assert len(server.backend.posts) == 1
+
+    asyncio.run(scenario())
+
+
+def test_dead_lettered_record_is_not_confirmed(configs, tmp_path):
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            transaction_id, otp = await authorized_payment(server)
+            outbox = server.payment_outbox
+            await outbox.enqueue(transaction_id, "u", {}, {}, held=True)
+            await outbox._run(outbox._connection.execute, "UPDATE outbox SET state = 'dead'")
+
+            response = await server.tool("payment_otp_verify")(
+                CONTEXT, OTPRequest(transaction_id=transaction_id, otp=otp)
+            )
+
+            assert "could not be recorded" in response
+            assert (await server.payment_store.get(transaction_id)).state == AUTHORIZED
+
+    asyncio.run(scenario())
+
+
+def test_unreleased_record_is_posted_only_for_completed_payments(configs, tmp_path, monkeypatch):
+    async def scenario():
+        async with payment_server(configs, tmp_path, lease=0.05) as server:
+            outbox = server.payment_outbox
+
+            # The verify completed the payment but could not release its record
+            completed_id, otp = await authorized_payment(server)
+
+            async def unavailable(*args, **kwargs):
+                raise OSError("disk full")
+
+            monkeypatch.setattr(outbox, "release", unavailable)
+            response = await server.tool("payment_otp_verify")(
+                CONTEXT, OTPRequest(transaction_id=completed_id, otp=otp)
+            )
+            assert response.startswith("Payment completed successfully!")
+
+            # A verify queued the record and crashed; the user then declined the payment
+            crashed_id, _ = await authorized_payment(server)
+            await outbox.enqueue(crashed_id, "u", {"transaction_id": crashed_id}, {}, held=True)
+            await server.receipt_store.save_snapshot(crashed_id, b"{}")
+            await server.tool("payment_authorize")(ConsentRequest(transaction_id=crashed_id, consent=False))
+
+            await settled(server)
+            assert [body["transaction_id"] for _, body, _ in server.backend.posts] == [completed_id]
+            assert outbox.stats()["held_discarded"] == 1
+            assert await server.receipt_store.load_snapshot(crashed_id) is None
+
+    asyncio.run(scenario())
+
+
+def test_receipt_outlives_the_payment_record(configs, tmp_path):
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            transaction_id, otp = await authorized_payment(server)
+            await server.tool("payment_otp_verify")(CONTEXT, OTPRequest(transaction_id=transaction_id, otp=otp))
+
+            # A payment store that has evicted or expired the record
+            forgetful = MemoryPaymentStore(capacity=10, ttls={}, sweep_interval=0)
+            receipts = ReceiptService(forgetful, server.render_pool, server.receipt_store)
+            receipt = await receipts.receipt(transaction_id)
+
+            assert receipt is not None
+            assert receipt.body.read_bytes().startswith(b"%PDF")
+            assert await server.receipt_store.load_snapshot(transaction_id) is None
+
+    asyncio.run(scenario())
+
+
+def test_completed_payment_is_listed_before_delivery(configs, tmp_path):
+    async def no_history(params):
+        return {"accountName": "Current", "transactions": []}
+
+    async def scenario():
+        async with payment_server(configs, tmp_path) as server:
+            identity = identity_hash("Bearer token")
+            transaction_id, otp = await authorized_payment(server)
+            server.backend.open.clear()
+            await server.tool("payment_otp_verify")(CONTEXT, OTPRequest(transaction_id=transaction_id, otp=otp))
+
+            [listed] = (await server.transaction_sync.transactions(identity, "acc-1", no_history))["transactions"]
+            assert (listed["TransactionId"], listed["Status"]) == (transaction_id, "PENDING")
+            assert listed["Amount"] == {"Amount": "25.0", "Currency": "USD"}
+
+            server.backend.open.set()
+            await settled(server)
+            [recorded] = (await server.transaction_sync.transactions(identity, "acc-1", no_history))["transactions"]
+            assert recorded == {"TransactionId": transaction_id, "Status": "SUCCESS"}
+
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for response projection: views, the byte budget and untouched cached payloads."""
+
+import copy
+
+from banking_mcp_server.projection import (
+    TRUNCATION_KEY,
+    enforce_budget,
+    project_accounts_payload,
+    project_transaction,
+    shape_response,
+)
+
+
+def transaction(index: int) -> dict:
+    return {
+        "TransactionId": f"T{index}",
+        "BookingDateTime": f"2026-01-{index % 28 + 1:02d}T10:00:00Z",
+        "Amount": {"Amount": f"{index}.50", "Currency": "USD"},
+        "CreditDebitIndicator": "Debit" if index % 2 else "Credit",
+        "TransactionInformation": f"Purchase number {index} with a long description",
+    }
+
+
+def account() -> dict:
+    return {
+        "AccountId": "A1",
+        "Nickname": "Everyday",
+        "Currency": "USD",
+        "AccountSubType": "CurrentAccount",
+        "Status": "Enabled",
+        "Balance": [{"Type": "InterimAvailable", "Amount": {"Amount": "120.00", "Currency": "USD"}}],
+        "Transactions": [transaction(i) for i in range(40)],
+    }
+
+
+def test_transaction_is_signed_and_flattened():
+    assert project_transaction(transaction(3)) == {
+        "id": "T3", "date": "2026-01-04", "amount": -3.5, "desc": "Purchase number 3 with a long description",
+    }
+    assert project_transaction(transaction(4))["amount"] == 4.5
+
+
+def test_account_views():
+    compact = project_accounts_payload([account()], "compact", 3)[0]
+    assert compact["balance"] == 120.0
+    assert [t["id"] for t in compact["recent"]] == ["T27", "T26", "T25"]
+    assert compact["transaction_count"] == 40
+
+    balances = project_accounts_payload(account(), "balances", 3)
+    assert balances == {"id": "A1", "name": "Everyday", "currency": "USD", "balances": {"InterimAvailable": 120.0}}
+
+
+def test_budget_trims_the_largest_list_with_a_marker():
+    data = {"small": [1, 2], "rows": [{"text": "x" * 50} for _ in range(100)]}
+
+    trimmed, omitted = enforce_budget(data, 1000)
+
+    assert len(str(trimmed)) < len(str(data))
+    assert omitted > 0
+    assert trimmed["rows"][-1] == {TRUNCATION_KEY: omitted}
+    assert trimmed["small"] == [1, 2]
+    assert len(data["rows"]) == 100
+
+
+def test_payload_within_budget_is_returned_as_is():
+    data = {"rows": [1, 2, 3]}
+    assert enforce_budget(data, 1000) == (data, 0)
+    assert enforce_budget(data, 1000)[0] is data
+
+
+def test_shaping_never_trims_the_cached_payload():
+    # Unrecognised shapes pass through projection and share the cached lists
+    cached = [[f"row {i}" * 10 for i in range(200)]]
+    before = copy.deepcopy(cached)
+
+    shaped = shape_response("tool", cached, lambda payload: payload, view="compact", max_bytes=500)
+
+    assert shaped["meta"]["truncated_items"] > 0
+    assert cached == before
+
+
+def test_batch_style_projection_leaves_cached_items_alone():
+    cached = {"results": [{"account_id": "A1", "data": {"rows": [[i] * 20 for i in range(100)]}}]}
+    before = copy.deepcopy(cached)
+
+    def project(batch):
+        return {**batch, "results": [{**item, "data": project_accounts_payload(item["data"], "compact", 5)}
+                                     for item in batch["results"]]}
+
+    shaped = shape_response("batch", cached, project, view="compact", max_bytes=400)
+
+    assert shaped["meta"]["truncated_items"] > 0
+    assert cached == before
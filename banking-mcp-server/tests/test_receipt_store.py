@@ -0,0 +1,216 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for the receipt stores: snapshots, expiry, and segment compaction under concurrent lookups."""
+
+import asyncio
+import os
+from io import BytesIO
+
+import pytest
+
+from banking_mcp_server.receipt_store import FileReceiptStore, ReceiptStore, SegmentReceiptStore
+
+
+def make_segment_store(root, **options):
+    settings = dict(segment_max_bytes=4096, retention=0, compact_interval=0, compact_ratio=0.5)
+    settings.update(options)
+    return SegmentReceiptStore(str(root), **settings)
+
+
+def receipt_bytes(transaction_id: str, version: int) -> bytes:
+    return f"%PDF {transaction_id} v{version} ".encode() * 20
+
+
+def test_incomplete_store_cannot_be_created():
+    class LookupOnly(ReceiptStore):
+        async def lookup(self, transaction_id):
+            return None
+
+    with pytest.raises(TypeError, match="save_snapshot"):
+        LookupOnly()
+
+
+def test_file_store_round_trip(tmp_path):
+    store = FileReceiptStore(str(tmp_path))
+
+    async def scenario():
+        assert await store.lookup("t1") is None
+        await store.save_snapshot("t1", b'{"payment": {}}')
+        assert await store.load_snapshot("t1") == b'{"payment": {}}'
+        path = await store.save("t1", BytesIO(b"%PDF"))
+        await store.drop_snapshot("t1")
+
+        assert await store.lookup("t1") == path
+        assert path.read_bytes() == b"%PDF"
+        assert await store.load_snapshot("t1") is None
+        assert await store.lookup("../t1") is None
+
+    asyncio.run(scenario())
+
+
+def test_segment_store_survives_restart(tmp_path):
+    async def scenario():
+        store = make_segment_store(tmp_path)
+        await store.start()
+        await store.save("t1", BytesIO(b"%PDF one"))
+        await store.save_snapshot("t2", b"snapshot")
+        await store.stop()
+
+        reopened = make_segment_store(tmp_path)
+        await reopened.start()
+        try:
+            assert bytes(await reopened.lookup("t1")) == b"%PDF one"
+            assert await reopened.lookup("t2") is None
+            assert await reopened.load_snapshot("t2") == b"snapshot"
+        finally:
+            await reopened.stop()
+
+    asyncio.run(scenario())
+
+
+def test_segment_store_expires_receipts_and_snapshots(tmp_path):
+    async def scenario():
+        store = make_segment_store(tmp_path, retention=0.2)
+        await store.start()
+        try:
+            await store.save("old", BytesIO(b"%PDF old"))
+            await store.save_snapshot("stale", b"snapshot")
+            await asyncio.sleep(0.3)
+            await store.save("new", BytesIO(b"%PDF new"))
+            await store.compact()
+
+            assert await store.lookup("old") is None
+            assert await store.load_snapshot("stale") is None
+            assert bytes(await store.lookup("new")) == b"%PDF new"
+        finally:
+            await store.stop()
+
+    asyncio.run(scenario())
+
+
+def test_compaction_with_concurrent_lookups(tmp_path):
+    transaction_ids = [f"t{index}" for index in range(200)]
+    # Overwriting most receipts leaves the early segments mostly dead; the rest has to be moved
+    rewritten = set(transaction_ids[::5]) ^ set(transaction_ids)
+    expected = {
+        transaction_id: receipt_bytes(transaction_id, 2 if transaction_id in rewritten else 1)
+        for transaction_id in transaction_ids
+    }
+
+    async def scenario():
+        store = make_segment_store(tmp_path)
+        await store.start()
+        try:
+            for transaction_id in transaction_ids:
+                await store.save(transaction_id, BytesIO(receipt_bytes(transaction_id, 1)))
+            for transaction_id in transaction_ids:
+                if transaction_id in rewritten:
+                    await store.save(transaction_id, BytesIO(receipt_bytes(transaction_id, 2)))
+            segments = store.stats()["segments"]
+
+            errors = []
+            lookups = 0
+            compacting = True
+
+            async def read_while_compacting():
+                nonlocal lookups
+                while compacting:
+                    for transaction_id, data in expected.items():
+                        try:
+                            view = await store.lookup(transaction_id)
+                            if view is None or bytes(view) != data:
+                                errors.append(transaction_id)
+                        except Exception as e:
+                            errors.append(repr(e))
+                        lookups += 1
+                    await asyncio.sleep(0)
+
+            reader = asyncio.create_task(read_while_compacting())
+            reclaimed = await store.compact()
+            compacting = False
+            await reader
+
+            assert errors == []
+            assert lookups > 0
+            assert reclaimed > 0
+            assert store.stats()["segments"] < segments
+            for transaction_id, data in expected.items():
+                assert bytes(await store.lookup(transaction_id)) == data
+        finally:
+            await store.stop()
+
+        # The repointed index was committed
+        reopened = make_segment_store(tmp_path)
+        await reopened.start()
+        try:
+            for transaction_id, data in expected.items():
+                assert bytes(await reopened.lookup(transaction_id)) == data
+        finally:
+            await reopened.stop()
+
+    asyncio.run(scenario())
+
+
+def test_segment_store_has_a_single_writer(tmp_path):
+    async def scenario():
+        store = make_segment_store(tmp_path)
+        await store.start()
+        try:
+            with pytest.raises(RuntimeError, match="one server process"):
+                await make_segment_store(tmp_path).start()
+        finally:
+            await store.stop()
+
+        # Released on stop
+        reopened = make_segment_store(tmp_path)
+        await reopened.start()
+        await reopened.stop()
+
+    asyncio.run(scenario())
+
+
+def test_file_store_expires_snapshots_that_were_never_rendered(tmp_path):
+    async def scenario():
+        store = FileReceiptStore(str(tmp_path), snapshot_retention=60)
+        await store.save_snapshot("TX-OLD", b'{"old": true}')
+        await store.save_snapshot("TX-NEW", b'{"new": true}')
+        await store.save("TX-OLD", BytesIO(receipt_bytes("TX-OLD", 1)))
+        old = store._sharded(store._snapshot_root, "TX-OLD", ".json")
+        stale = old.stat().st_mtime - 3600
+        os.utime(old, (stale, stale))
+
+        assert await store.sweep_snapshots() == 1
+        assert await store.load_snapshot("TX-OLD") is None
+        assert await store.load_snapshot("TX-NEW") == b'{"new": true}'
+        # Only snapshots are swept; the rendered receipt stays
+        assert store.path_for("TX-OLD").exists()
+        assert store.stats()["snapshots_expired"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_file_store_keeps_snapshots_without_retention(tmp_path):
+    async def scenario():
+        store = FileReceiptStore(str(tmp_path))
+        await store.save_snapshot("TX-1", b"{}")
+        path = store._sharded(store._snapshot_root, "TX-1", ".json")
+        os.utime(path, (0, 0))
+        assert await store.sweep_snapshots() == 0
+        assert await store.load_snapshot("TX-1") == b"{}"
+
+    asyncio.run(scenario())
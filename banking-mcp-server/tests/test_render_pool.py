@@ -0,0 +1,106 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the render pool: results off the event loop, admission control and failures."""
+
+import asyncio
+import operator
+import threading
+import time
+
+import pytest
+
+from banking_mcp_server.render_pool import PoolSaturated, RenderPool
+
+
+def make_pool(**options):
+    settings = dict(kind="thread", workers=1, queue_size=1, submit_timeout=0.05)
+    settings.update(options)
+    return RenderPool(**settings)
+
+
+def test_jobs_run_off_the_event_loop():
+    async def scenario():
+        pool = make_pool()
+        try:
+            worker = await pool.run(lambda: threading.current_thread().name)
+            return worker, threading.current_thread().name, pool.stats()
+        finally:
+            await pool.stop()
+
+    worker, loop_thread, stats = asyncio.run(scenario())
+
+    assert worker.startswith("render") and worker != loop_thread
+    assert stats["completed"] == 1 and stats["running"] == 0 and stats["queue_depth"] == 0
+
+
+def test_callers_beyond_capacity_are_rejected():
+    release = threading.Event()
+
+    async def scenario():
+        pool = make_pool(workers=1, queue_size=1)
+        try:
+            admitted = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            busy = pool.stats()
+            with pytest.raises(PoolSaturated):
+                await pool.run(time.sleep, 0)
+            release.set()
+            await asyncio.gather(*admitted)
+            # A slot is free again once the admitted jobs finish
+            await pool.run(time.sleep, 0)
+            return busy, pool.stats()
+        finally:
+            release.set()
+            await pool.stop()
+
+    busy, stats = asyncio.run(scenario())
+
+    assert (busy["running"], busy["queue_depth"]) == (1, 1)
+    assert (stats["rejected"], stats["completed"]) == (1, 3)
+
+
+def test_failures_are_raised_and_counted():
+    def broken():
+        raise RuntimeError("bad template")
+
+    async def scenario():
+        pool = make_pool()
+        try:
+            with pytest.raises(RuntimeError, match="bad template"):
+                await pool.run(broken)
+            return pool.stats()
+        finally:
+            await pool.stop()
+
+    stats = asyncio.run(scenario())
+
+    assert (stats["failed"], stats["completed"]) == (1, 0)
+
+
+def test_process_pool_preloads_workers_and_runs_picklable_jobs():
+    async def scenario():
+        pool = make_pool(kind="process", workers=2, submit_timeout=30,
+                         preload=["json", "banking_mcp_server.receipt_render:get_receipt_engine"])
+        await pool.start()
+        try:
+            return await asyncio.gather(*(pool.run(operator.mul, index, index) for index in range(4)))
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(scenario()) == [0, 1, 4, 9]
@@ -0,0 +1,108 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for single-flight coalescing of concurrent identical calls."""
+
+import asyncio
+
+import pytest
+
+from banking_mcp_server.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return {"value": len(calls)}
+
+        waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+        other = asyncio.create_task(flight.do("other", work))
+        await asyncio.sleep(0)
+        inflight = len(flight)
+        release.set()
+        results = await asyncio.gather(*waiters, other)
+        return calls, inflight, results, flight.stats()
+
+    calls, inflight, results, stats = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert inflight == 2
+    assert all(result is results[0] for result in results[:5])
+    assert stats == {"leaders": 2, "followers": 4, "inflight": 0}
+
+
+def test_later_calls_start_a_new_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        return [await flight.do("key", work) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
+
+
+def test_followers_receive_the_leaders_exception():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            raise RuntimeError("backend down")
+
+        waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters, return_exceptions=True), len(flight)
+
+    results, inflight = asyncio.run(scenario())
+
+    assert [str(result) for result in results] == ["backend down"] * 3
+    assert inflight == 0
+
+
+def test_cancelling_one_waiter_keeps_the_shared_call_running():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
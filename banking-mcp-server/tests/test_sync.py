@@ -0,0 +1,142 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""Tests for incremental transaction sync: delta merges, booking order and pending payments."""
+
+import asyncio
+
+from banking_mcp_server.sync import TransactionLog, TransactionSync
+
+
+def transaction(transaction_id, booked, amount="10.00", status="SUCCESS"):
+    return {
+        "TransactionId": transaction_id,
+        "BookingDateTime": booked,
+        "Amount": {"Amount": amount, "Currency": "GBP"},
+        "Status": status,
+    }
+
+
+class FakeBackend:
+    """Serves scripted transaction pages and records the query params of each fetch."""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.params = []
+
+    async def fetch(self, params):
+        self.params.append(params)
+        return {"accountName": "Current", "transactions": self.pages.pop(0)}
+
+
+def ids(payload):
+    return [row["TransactionId"] for row in payload["transactions"]]
+
+
+def test_delta_merge_keeps_booking_order():
+    backend = FakeBackend(
+        [transaction("a", "2025-03-01T09:00:00Z"), transaction("c", "2025-03-03T09:00:00Z")],
+        # The delta repeats the high-water day and brings a late-booked row
+        [transaction("c", "2025-03-03T09:00:00Z"), transaction("b", "2025-03-02T12:00:00Z"),
+         transaction("d", "2025-03-04T08:00:00Z")],
+    )
+    sync = TransactionSync(max_transactions=100, refresh_interval=0)
+
+    async def scenario():
+        first = await sync.transactions("alice", "acc-1", backend.fetch)
+        second = await sync.transactions("alice", "acc-1", backend.fetch)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert ids(first) == ["a", "c"]
+    assert ids(second) == ["a", "b", "c", "d"]
+    assert backend.params == [None, {"startDate": "2025-03-03"}]
+    assert second["pagination"]["total"] == 4
+    stats = sync.stats()
+    assert (stats["full_syncs"], stats["delta_syncs"], stats["delta_rows"], stats["transactions"]) == (1, 1, 3, 4)
+
+
+def test_high_water_compares_parsed_times():
+    log = TransactionLog("acc-1")
+    # Later as text, earlier in time: 10:00+02:00 is 08:00 UTC
+    log.merge([transaction("a", "2025-03-04T09:30:00Z"), transaction("b", "2025-03-04T10:00:00+02:00")])
+
+    assert log.high_water == "2025-03-04T09:30:00Z"
+    assert [row["TransactionId"] for row in log.transactions] == ["b", "a"]
+
+    log.merge([transaction("c", "not a date"), transaction("d", "2025-03-05T00:00:00")])
+    assert log.high_water == "2025-03-05T00:00:00"
+    assert [row["TransactionId"] for row in log.transactions] == ["c", "b", "a", "d"]
+
+
+def test_backend_rows_replace_held_ones():
+    log = TransactionLog("acc-1")
+    log.merge([transaction("a", "2025-03-01T09:00:00Z", status="PENDING")], authoritative=False)
+    held = log.transactions
+
+    assert log.high_water == ""
+    assert log.merge([transaction("a", "2025-03-01T09:00:05Z")]) == 0
+    assert log.transactions is not held
+    assert log.transactions == [transaction("a", "2025-03-01T09:00:05Z")]
+    # Local rows never overwrite the backend's
+    log.merge([transaction("a", "2025-03-01T09:00:00Z", status="PENDING")], authoritative=False)
+    assert log.transactions[0]["Status"] == "SUCCESS"
+
+
+def test_pending_payment_is_listed_until_reconciled():
+    backend = FakeBackend(
+        [transaction("a", "2025-03-01T09:00:00Z")],
+        [transaction("a", "2025-03-01T09:00:00Z")],
+        [transaction("p", "2025-03-05T10:00:01Z")],
+    )
+    sync = TransactionSync(max_transactions=100, refresh_interval=0)
+    pending = transaction("p", "2025-03-05T10:00:00Z", status="PENDING")
+
+    async def scenario():
+        # Completed before the payer's log was first synced
+        sync.add_pending("alice", "acc-1", pending)
+        synced = await sync.transactions("alice", "acc-1", backend.fetch)
+        assert ids(synced) == ["a", "p"]
+        assert (await sync.transactions("bob", "acc-1", backend.fetch))["transactions"] == [backend_a]
+
+        # Delivery swaps the backend's record into every log of the account
+        assert sync.reconcile("acc-1", transaction("p", "2025-03-05T10:00:01Z")) == 2
+        assert sync.stats()["pending"] == 0
+        return await sync.transactions("alice", "acc-1", backend.fetch)
+
+    backend_a = transaction("a", "2025-03-01T09:00:00Z")
+    latest = asyncio.run(scenario())
+    assert latest["transactions"] == [backend_a, transaction("p", "2025-03-05T10:00:01Z")]
+
+
+def test_recent_logs_are_read_locally_and_evicted_by_size():
+    backend = FakeBackend(
+        [transaction(f"a{index}", "2025-03-01T09:00:00Z") for index in range(3)],
+        [transaction(f"b{index}", "2025-03-01T09:00:00Z") for index in range(3)],
+    )
+    sync = TransactionSync(max_transactions=4, refresh_interval=60)
+
+    async def scenario():
+        await sync.transactions("alice", "acc-1", backend.fetch)
+        await sync.transactions("alice", "acc-1", backend.fetch)
+        await sync.transactions("alice", "acc-2", backend.fetch)
+
+    asyncio.run(scenario())
+    assert backend.params == [None, None]
+    assert sync.stats()["local_reads"] == 1
+    assert not sync.has_log("alice", "acc-1")
+    assert sync.has_log("alice", "acc-2")
@@ -0,0 +1,106 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com/) All Rights Reserved.
+
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+
+"""Tests for the warmup scheduler: opt-in start, warm-start store and refresh-ahead."""
+
+import asyncio
+import time
+
+import httpx
+
+from banking_mcp_server.cache import CacheEntry
+from banking_mcp_server.client import HTTPClient
+from banking_mcp_server.config import ServerConfigs
+from banking_mcp_server.warmup import WarmCacheStore, WarmupScheduler
+
+BASE = "http://bank.test/api"
+
+
+def make_client(configs, requests):
+    def handler(request):
+        requests.append(request.url.path)
+        return httpx.Response(200, json={"data": [{"ProductId": "P1"}]}, headers={"ETag": '"v1"'})
+
+    client = HTTPClient(configs)
+    client._session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_warmup_is_off_by_default(tmp_path):
+    async def scenario():
+        requests = []
+        configs = ServerConfigs(server_url=BASE, warmup_store_path=str(tmp_path / "warm.sqlite3"))
+        client = make_client(configs, requests)
+        scheduler = WarmupScheduler(configs, client)
+        await scheduler.start()
+        await scheduler.stop()
+        await client.aclose()
+        return requests, scheduler.stats()
+
+    requests, stats = asyncio.run(scenario())
+
+    assert ServerConfigs().warmup_enabled is False
+    assert requests == []
+    assert stats["running"] is False
+    assert not (tmp_path / "warm.sqlite3").exists()
+
+
+def test_store_round_trip_keeps_revalidatable_entries(tmp_path):
+    store = WarmCacheStore(str(tmp_path / "warm.sqlite3"))
+    fresh = CacheEntry(value=[{"id": 1}], expires_at=time.monotonic() + 60, route="/products")
+    stale = CacheEntry(value=[{"id": 2}], expires_at=time.monotonic() - 1, route="/products", etag='"v2"')
+    gone = CacheEntry(value=[{"id": 3}], expires_at=time.monotonic() - 1, route="/products")
+
+    assert store.save([
+        (f"{BASE}/products", {}, fresh),
+        (f"{BASE}/products", {"page": "2"}, stale),
+        (f"{BASE}/products", {"page": "3"}, gone),
+    ]) == 3
+    restored = {tuple(params.items()): entry for _, params, entry in store.load(max_age=3600)}
+
+    assert set(restored) == {(), (("page", "2"),)}
+    assert restored[()].value == [{"id": 1}]
+    assert restored[()].expires_at > time.monotonic()
+    assert restored[(("page", "2"),)].etag == '"v2"'
+    assert store.load(max_age=-1) == []
+
+
+def test_opted_in_scheduler_prewarms_and_restores(tmp_path):
+    store_path = str(tmp_path / "warm.sqlite3")
+
+    async def run_once():
+        requests = []
+        configs = ServerConfigs(server_url=BASE, warmup_enabled=True, warmup_store_path=store_path,
+                                warmup_connections=2, warmup_interval=3600)
+        client = make_client(configs, requests)
+        scheduler = WarmupScheduler(configs, client)
+        await scheduler.start()
+        while scheduler.stats()["persisted"] == 0:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        await client.aclose()
+        return requests, scheduler.stats()
+
+    requests, stats = asyncio.run(run_once())
+    assert requests.count("/api/health") == 2
+    assert requests.count("/api/products") == 1
+    assert stats["connections"] == 2 and stats["refreshes"] == 1
+
+    # A restart starts from the persisted shared tier
+    _, stats = asyncio.run(run_once())
+    assert stats["restored"] == 1
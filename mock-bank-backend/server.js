@@ -16,6 +16,7 @@
  * under the License.
  */
 
+import { createHash } from 'crypto';
 import express from 'express';
 import cors from 'cors';
 
@@ -25,6 +26,23 @@ const app = express();
 const PORT = process.env.PORT || 3001;
 const HOST = process.env.HOST || '0.0.0.0';
 
+// Last modification time of the mock data, advanced whenever a transaction is posted
+let dataLastModified = new Date();
+
+/**
+ * Attach cache validators for a resource payload.
+ *
+ * The ETag is derived from the `data` part only, since the envelope carries a
+ * per-request timestamp. Express compares these headers against If-None-Match /
+ * If-Modified-Since in res.json() and answers 304 Not Modified with no body.
+ */
+const setValidators = (res, data) => {
+  const digest = createHash('sha1').update(JSON.stringify(data)).digest('base64url');
+  res.set('ETag', `"${digest}"`);
+  res.set('Last-Modified', dataLastModified.toUTCString());
+  res.set('Cache-Control', 'private, no-cache');
+};
+
 // Middleware
 app.use(cors());
 app.use(express.json());
@@ -49,6 +67,7 @@ app.get('/', (req, res) => {
 // Get current user profile
 app.get('/me', (req, res) => {
   try {
+    setValidators(res, mockUser);
     res.json({
       success: true,
       data: mockUser,
@@ -66,6 +85,7 @@ app.get('/me', (req, res) => {
 // Get current user profile
 app.get('/payees', (req, res) => {
   try {
+    setValidators(res, mockPayees);
     res.json({
       success: true,
       data: mockPayees,
@@ -83,6 +103,7 @@ app.get('/payees', (req, res) => {
 // Get all accounts with transactions
 app.get('/accounts', (req, res) => {
   try {
+    setValidators(res, mockAccounts);
     res.json({
       success: true,
       data: mockAccounts,
@@ -112,6 +133,7 @@ app.get('/accounts/:accountId', (req, res) => {
       });
     }
 
+    setValidators(res, account);
     res.json({
       success: true,
       data: account,
@@ -177,19 +199,22 @@ app.get('/accounts/:accountId/transactions', (req, res) => {
     const endIndex = limit ? startIndex + parseInt(limit) : transactions.length;
     const paginatedTransactions = transactions.slice(startIndex, endIndex);
 
+    const data = {
+      accountId: account.AccountId,
+      accountName: account.Nickname,
+      transactions: paginatedTransactions,
+      pagination: {
+        total: totalCount,
+        count: paginatedTransactions.length,
+        offset: startIndex,
+        limit: limit ? parseInt(limit) : null
+      }
+    };
+
+    setValidators(res, data);
     res.json({
       success: true,
-      data: {
-        accountId: account.AccountId,
-        accountName: account.Nickname,
-        transactions: paginatedTransactions,
-        pagination: {
-          total: totalCount,
-          count: paginatedTransactions.length,
-          offset: startIndex,
-          limit: limit ? parseInt(limit) : null
-        }
-      },
+      data,
       timestamp: new Date().toISOString()
     });
   } catch (error) {
@@ -237,6 +262,18 @@ app.post('/accounts/:accountId/transactions', (req, res) => {
       });
     }
 
+    // Replayed deliveries (same Idempotency-Key or transaction_id) return the recorded
+    // transaction instead of booking and debiting it twice
+    const idempotencyKey = req.get('Idempotency-Key') || transaction_id;
+    const recorded = (account.Transactions || []).find(txn => txn.TransactionId === idempotencyKey);
+    if (recorded) {
+      return res.status(200).json({
+        success: true,
+        data: recorded,
+        timestamp: new Date().toISOString()
+      });
+    }
+
     // Create a new transaction object
     const newTransaction = {
       AccountId: accountId,
@@ -275,6 +312,7 @@ app.post('/accounts/:accountId/transactions', (req, res) => {
       account.Transactions = [];
     }
     account.Transactions.push(newTransaction);
+    dataLastModified = new Date();
 
     // Update account balance based on transaction type
     if (account.Balance && account.Balance.length > 0) {
@@ -341,6 +379,7 @@ app.get('/products', (req, res) => {
       );
     }
 
+    setValidators(res, products);
     res.json({
       success: true,
       data: products,
@@ -370,6 +409,7 @@ app.get('/products/:productId', (req, res) => {
       });
     }
 
+    setValidators(res, product);
     res.json({
       success: true,
       data: product,